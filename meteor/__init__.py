@@ -45,6 +45,12 @@ mail = Mail()
 # JWT Extension
 from meteor.users.authentication import jwt
 
+# Post-commit jobs (notifications etc.)
+from meteor.jobs import jobs
+
+# Persistent cache for external APIs (DOI, ORCID, etc)
+from meteor.external.cache import cache as external_cache
+
 from flask.json.provider import DefaultJSONProvider
 import datetime
 
@@ -132,6 +138,8 @@ def create_app(config_class=Config, config_json=None):
     dgraph.init_app(app)
     login_manager.init_app(app)
     mail.init_app(app)
+    jobs.init_app(app)
+    external_cache.init_app(app)
 
     # csrf = CSRFProtect(app)
 
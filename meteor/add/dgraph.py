@@ -3,7 +3,7 @@ from flask_login import current_user
 from meteor.users.constants import USER_ROLES
 from flask import flash
 from meteor.auxiliary import icu_codes_list
-from pydgraph import Txn
+from meteor.flaskdgraph.choices import choices_cache
 import json
 
 
@@ -20,15 +20,8 @@ async def generate_fieldoptions():
     query_string = '{ ' + query_channel + query_country + \
         query_dataset + query_archive + query_subunit + query_multinational + query_language + ' }'
 
-    # Use async query here because a lot of data is retrieved
-    query_future = dgraph.connection.txn().async_query(query_string)
-    res = Txn.handle_query_future(query_future)
-
-    # data = dgraph.query(query_string)
-
-    res = dgraph.connection.txn(read_only=True).query(query_string)
-    data = json.loads(res.json, object_hook=dgraph.datetime_hook)
-
+    data = choices_cache.query(query_string, ['Channel', 'Country', 'Dataset', 'Archive', 
+                                              'Subnational', 'Multinational', 'Language'])
 
     return data
 
@@ -6,6 +6,9 @@ import urllib.parse
 import re
 import json
 import asyncio
+import time
+from functools import wraps
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait, FIRST_COMPLETED
 from typing import Union, Tuple
 
 # external utils 
@@ -25,6 +28,8 @@ from dateutil.parser import isoparse
 
 from meteor import dgraph
 from meteor.errors import InventoryValidationError
+from meteor.external import session
+from meteor.add.htmlhead import HeadParser, parse_head, CHUNK_SIZE, MAX_PAGE_BYTES
 
 def geocode(address: str) -> dict:
     payload = {'q': address,
@@ -56,6 +61,17 @@ def reverse_geocode(lat, lon) -> dict:
 
 # Sitemaps & RSS/XML/Atom Feeds
 
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.45 Safari/537.36"
+
+# seconds to connect / to wait for data, per request to a website
+PROBE_TIMEOUT = (5, 10)
+# seconds until `probe_website` returns the results it has so far
+PROBE_DEADLINE = 20
+# feed candidates of a website that are validated at the same time
+FEED_CONCURRENCY = 8
+
+_probe_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix='probe_website')
+
 
 def build_url(site: str):
     if not isinstance(site, str):
@@ -71,30 +87,62 @@ def build_url(site: str):
     except Exception as e:
         return False
 
-def perform_request(site: str) -> requests.Response:
+def _ok(r: requests.Response) -> Union[requests.Response, bool]:
+    if r:
+        return r
+    r.close()
+    return False
+
+def perform_request(site: str, timeout=PROBE_TIMEOUT, **kwargs) -> requests.Response:
+    """
+        Falls back to requests without certificate verification (SSL errors)
+        and to plain http (SSL and connection errors).
+        Returns `False` for error status codes.
+        Other `kwargs` are passed to `session.get` (e.g., `stream=True`).
+    """
 
-    headers = {'user-agent':
-               "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.45 Safari/537.36"}
+    headers = {'user-agent': USER_AGENT}
 
     try:
-        r = requests.get(site, headers=headers)
-    except (requests.exceptions.SSLError, requests.exceptions.ConnectionError):
+        return _ok(session.get(site, headers=headers, timeout=timeout, cached=False, **kwargs))
+    except requests.exceptions.SSLError:
         try:
-            r = requests.get(site, verify=False, headers=headers)
-        except (requests.exceptions.SSLError, requests.exceptions.ConnectionError):
-            try:
-                r = requests.get(site.replace('https', 'http'), verify=False, headers=headers)
-            except Exception as e:
-                current_app.logger.error(f'Error when requesting {site}: {e}')
-                raise InventoryValidationError(
-                    f'''Could not verify this address exists: {site}.\n
-                        Please make sure the entered address is correct (e.g. starts with "https://") 
-                        and also make sure the website exists.\n
-                        If the issue persists please contact us.\n
-                        Error message: {e}
-                        '''
-                    )
-    return r or False
+            return _ok(session.get(site, verify=False, headers=headers, timeout=timeout, cached=False, **kwargs))
+        except requests.exceptions.ConnectionError:
+            pass
+    except requests.exceptions.ConnectionError:
+        # host is not reachable via https, skipping verification would not help
+        pass
+    try:
+        r = session.get(site.replace('https', 'http'), verify=False, headers=headers,
+                        timeout=timeout, cached=False, **kwargs)
+    except Exception as e:
+        current_app.logger.error(f'Error when requesting {site}: {e}')
+        raise InventoryValidationError(
+            f'''Could not verify this address exists: {site}.\n
+                Please make sure the entered address is correct (e.g. starts with "https://") 
+                and also make sure the website exists.\n
+                If the issue persists please contact us.\n
+                Error message: {e}
+                '''
+            )
+    return _ok(r)
+
+
+def fetch_head(site: str, anchors: bool = False, timeout=PROBE_TIMEOUT,
+               max_bytes: int = MAX_PAGE_BYTES) -> Union[HeadParser, bool]:
+    """
+        Read the page of `site` only until its head is parsed (see `meteor.add.htmlhead`).
+        Returns `False` if the page cannot be reached.
+    """
+    r = perform_request(site, timeout=timeout, stream=True)
+    if not r:
+        return False
+    try:
+        return parse_head(r.iter_content(CHUNK_SIZE), r.headers.get('Content-Type', ''),
+                          anchors=anchors, max_bytes=max_bytes)
+    finally:
+        r.close()
 
 def test_url(site):
     site = build_url(site)
@@ -111,6 +159,17 @@ def test_url(site):
     return False
 
 
+def robots_sitemaps(site: str, timeout=PROBE_TIMEOUT) -> list:
+    """ Sitemaps listed in robots.txt of `site` (without trailing slash) """
+    r = session.get(site + '/robots.txt', headers={'user-agent': USER_AGENT},
+                    timeout=timeout, cached=False)
+    if r.status_code != 200:
+        return []
+    rp = RobotFileParser()
+    rp.parse(r.text.splitlines())
+    return rp.site_maps() or []
+
+
 def find_sitemaps(site: str) -> list:
     site = build_url(site)
     if not site:
@@ -127,59 +186,29 @@ def find_sitemaps(site: str) -> list:
         raise requests.RequestException(
             f'Could not reach {site}. Status: {r.status_code}')
     try:
-        rp = RobotFileParser()
-        rp.set_url(site + '/robots.txt')
-        rp.read()
-        if len(rp.sitemaps) > 0:
-            return rp.sitemaps
-        else:
-            return []
+        return robots_sitemaps(site)
     except Exception as e:
         current_app.logger.warning(f'Could not get sitemap from {site}: {e}')
         return []
 
 
-def find_feeds(site: str) -> list:
-    site = build_url(site)
-    if not site:
-        return []
-
-    if site.endswith('/'):
-        site = site[:-1]
+def is_feed(site: str) -> bool:
+    """ `site/rss` is served as XML / RSS (naive check, the body is not downloaded) """
+    r = perform_request(site + '/rss', stream=True)
+    if not r:
+        return False
+    r.close()
+    content_type = r.headers.get('Content-Type', '')
+    return 'xml' in content_type or 'rss' in content_type
 
-    # first: naive approach
-    try:
-        r = perform_request(site + '/rss')
-        if 'xml' in r.headers['Content-Type'] or 'rss' in r.headers['Content-Type']:
-            return [site + '/rss']
-    except Exception:
-        pass
 
-    r = perform_request(site)
-    if not r:
-        return []
+def feed_candidates(site: str, head: HeadParser) -> list:
+    """ Links on the page of `site` that might be feeds (absolute URLs, without duplicates) """
+    possible_feeds = head.feed_links()
 
-    result = []
-    possible_feeds = []
-    html = bs4(r.content, 'lxml')
-    feed_urls = html.find_all("link", rel="alternate")
-    if len(feed_urls) > 0:
-        for f in feed_urls:
-            t = f.get("type")
-            if t:
-                if "rss" in t or "xml" in t:
-                    href = f.get("href")
-                    if href:
-                        possible_feeds.append(href)
     parsed_url = urllib.parse.urlparse(site)
-    base = parsed_url.scheme + "://" + parsed_url.hostname
-    atags = html.find_all("a")
-    for a in atags:
-        href = a.get("href")
-        if href:
-            if "xml" in href or "rss" in href or "feed" in href:
-                possible_feeds.append(href)
-    for url in list(set(possible_feeds)):
+    candidates = []
+    for url in possible_feeds:
         parsed_feed_url = urllib.parse.urlparse(url)
         if parsed_feed_url.scheme == '':
             scheme = 'https'
@@ -190,34 +219,87 @@ def find_feeds(site: str) -> list:
         else:
             netloc = parsed_feed_url.netloc
         feed_url = scheme + '://' + netloc + parsed_feed_url.path
-        f = feedparser.parse(feed_url)
-        if len(f.entries) > 0:
-            if feed_url not in result:
-                result.append(feed_url)
-    return result
+        if feed_url not in candidates:
+            candidates.append(feed_url)
+    return candidates
 
 
-def parse_meta(url: str) -> dict:
+def validate_feed(url: str, timeout=PROBE_TIMEOUT) -> bool:
+    """ `url` is a feed with at least one entry """
+    try:
+        r = session.get(url, headers={'user-agent': USER_AGENT}, timeout=timeout, cached=False)
+    except requests.RequestException:
+        return False
+    if not r.ok:
+        return False
+    return len(feedparser.parse(r.content).entries) > 0
+
+
+def validate_feeds(candidates: list, deadline: float) -> Tuple[list, bool]:
+    """
+        Validate up to `FEED_CONCURRENCY` candidates at the same time until
+        the `deadline` (`time.monotonic()`).
+        Returns the valid feeds (in the order of `candidates`) and whether
+        all candidates were validated.
+    """
+    queue = iter(candidates)
+    futures = {}
+    pending = set()
+    valid = set()
+    while True:
+        for url in queue:
+            future = _probe_executor.submit(validate_feed, url)
+            futures[future] = url
+            pending.add(future)
+            if len(pending) >= FEED_CONCURRENCY:
+                break
+        if not pending:
+            break
+        done, pending = wait(pending, timeout=max(deadline - time.monotonic(), 0),
+                             return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        for future in done:
+            if future.exception() is None and future.result():
+                valid.add(futures[future])
+    for future in pending:
+        future.cancel()
+    return [url for url in candidates if url in valid], not pending
 
-    urls = []
-    names = []
 
-    site = build_url(url)
+def find_feeds(site: str) -> list:
+    site = build_url(site)
     if not site:
-        return {'names': False, 'urls': False}
+        return []
 
-    r = perform_request(site)
+    if site.endswith('/'):
+        site = site[:-1]
 
-    if not r:
-        return {'names': False, 'urls': False}
+    # first: naive approach
+    try:
+        if is_feed(site):
+            return [site + '/rss']
+    except Exception:
+        pass
 
-    if not r.ok:
-        return {'names': False, 'urls': False}
+    head = fetch_head(site, anchors=True)
+    if not head:
+        return []
 
-    soup = bs4(r.content, 'lxml')
+    feeds, _ = validate_feeds(feed_candidates(site, head),
+                              time.monotonic() + PROBE_DEADLINE)
+    return feeds
 
-    ogtitle, ogurl = opengraph(soup)
-    schema_name, schema_url = schemaorg(soup)
+
+def html_meta(head: HeadParser) -> Tuple[list, list]:
+    """ Names and URLs of a website from OpenGraph and schema.org tags """
+
+    urls = []
+    names = []
+
+    ogtitle = head.opengraph.get('og:title')
+    ogurl = head.opengraph.get('og:url')
+    schema_name, schema_url = parse_schemaorg(head.schemas)
 
     if ogtitle:
         names.append(ogtitle)
@@ -231,7 +313,23 @@ def parse_meta(url: str) -> dict:
     if schema_url:
         urls.append(schema_url)
 
-    return {'names': list(set(names)), 'urls': list(set(urls))}
+    return list(set(names)), list(set(urls))
+
+
+def parse_meta(url: str) -> dict:
+
+    site = build_url(url)
+    if not site:
+        return {'names': False, 'urls': False}
+
+    head = fetch_head(site)
+
+    if not head:
+        return {'names': False, 'urls': False}
+
+    names, urls = html_meta(head)
+
+    return {'names': names, 'urls': urls}
 
 
 def opengraph(soup: bs4) -> Tuple[str, str]:
@@ -250,6 +348,11 @@ def opengraph(soup: bs4) -> Tuple[str, str]:
 
 def schemaorg(soup: bs4) -> Tuple[str, str]:
     schemas = soup.find_all('script', type=re.compile(r'json'))
+    return parse_schemaorg([item.string for item in schemas])
+
+
+def parse_schemaorg(schemas: list) -> Tuple[str, str]:
+    """ Name and URL of the schema.org `WebPage` in the content of JSON scripts """
     if len(schemas) == 0:
         return False, False
 
@@ -258,7 +361,7 @@ def schemaorg(soup: bs4) -> Tuple[str, str]:
 
     for item in schemas:
         try:
-            parsed = json.loads(item.string.replace('&q;', '"'))
+            parsed = json.loads(item.replace('&q;', '"'))
             if parsed.get('@type'):
                 if parsed.get('@type').lower() == "webpage":
                     url = parsed.get('url')
@@ -279,7 +382,7 @@ def siterankdata(site: str) -> Union[int, bool]:
         site = site[:-1]
 
     current_app.logger.debug(f'requesting: {"https://siterankdata.com/" + site}')
-    r = requests.get("https://siterankdata.com/" + site, timeout=30)
+    r = session.get("https://siterankdata.com/" + site, timeout=PROBE_TIMEOUT, cached=False)
 
     if r.status_code != 200:
         current_app.logger.debug(f'Getting siterankdata failed! Status code: {r.status_code}')
@@ -298,6 +401,94 @@ def siterankdata(site: str) -> Union[int, bool]:
         return False
 
 
+def _in_app_context(app, f):
+    """ `f` runs in a worker thread of `_probe_executor` """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            return f(*args, **kwargs)
+    return wrapper
+
+
+def probe_website(url: str, deadline: float = PROBE_DEADLINE) -> dict:
+    """
+        Everything we can find out about a website at once: names and URLs (`parse_meta`),
+        daily visitors (`siterankdata`), sitemaps (`find_sitemaps`) and feeds (`find_feeds`).
+
+        The homepage is read only as far as needed (`fetch_head`), all other requests run concurrently
+        (each with `PROBE_TIMEOUT`). After `deadline` seconds the results found so far
+        are returned and `complete` is `False`. `names` and `urls` are `False`
+        if the website could not be reached.
+    """
+    end = time.monotonic() + deadline
+    result = {'names': False, 'urls': False, 'daily_visitors': None,
+              'sitemaps': [], 'feeds': [], 'complete': False}
+
+    site = build_url(url)
+    if not site:
+        return result
+    if site.endswith('/'):
+        site = site[:-1]
+
+    app = current_app._get_current_object()
+
+    def submit(f, *args):
+        return _probe_executor.submit(_in_app_context(app, f), *args)
+
+    def remaining() -> float:
+        return max(end - time.monotonic(), 0)
+
+    homepage = submit(fetch_head, site, True)
+    naive_feed = submit(is_feed, site)
+    sitemaps = submit(robots_sitemaps, site)
+    visitors = submit(siterankdata, url)
+
+    try:
+        head = homepage.result(timeout=remaining())
+    except TimeoutError:
+        current_app.logger.warning(f'Probing {site}: no response within {deadline} seconds')
+        return result
+    except Exception as e:
+        current_app.logger.debug(f'Probing {site}: could not reach website: {e}')
+        return result
+    if not head:
+        return result
+
+    result['names'], result['urls'] = html_meta(head)
+    complete = True
+
+    try:
+        naive = naive_feed.result(timeout=remaining())
+    except TimeoutError:
+        naive, complete = False, False
+    except Exception:
+        naive = False
+    if naive:
+        result['feeds'] = [site + '/rss']
+    else:
+        result['feeds'], complete_feeds = validate_feeds(feed_candidates(site, head), end)
+        complete = complete and complete_feeds
+
+    try:
+        result['sitemaps'] = sitemaps.result(timeout=remaining())
+    except TimeoutError:
+        complete = False
+    except Exception as e:
+        current_app.logger.warning(f'Could not get sitemap from {site}: {e}')
+
+    try:
+        result['daily_visitors'] = visitors.result(timeout=remaining())
+    except TimeoutError:
+        complete = False
+    except Exception as e:
+        current_app.logger.warning(f'Could not fetch siterankdata for {url}! Exception: {e}')
+
+    result['complete'] = complete
+    if not complete:
+        current_app.logger.warning(f'Probing {site}: returning partial results after {deadline} seconds')
+    return result
+
+
 def login_instagram():
 
     L = instaloader.Instaloader()
@@ -404,7 +595,7 @@ def lookup_wikidata_id(query):
     result = {}
 
     try:
-        r = requests.get(api, params=params)
+        r = session.get(api, params=params)
         get_id = r.json()
         wikidataid = get_id['search'][0]['id']
         return wikidataid
@@ -680,7 +871,7 @@ def cran(pkg) -> Union[dict, bool]:
 
     api = 'https://crandb.r-pkg.org/'
 
-    r = requests.get(api + pkg)
+    r = session.get(api + pkg)
 
     if r.status_code != 200:
         return False
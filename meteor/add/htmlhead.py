@@ -0,0 +1,141 @@
+"""
+    Streaming parser for the `<head>` of websites
+
+    To resolve a website we only need a few tags: OpenGraph `<meta>`, schema.org
+    JSON (`<script type="application/ld+json">`) and feed links (`<link rel="alternate">`).
+    Instead of downloading the whole page and building a DOM tree, `parse_head()`
+    feeds the response in chunks to `HeadParser` (events of `html.parser`) and stops
+    as soon as the head is complete, or after `MAX_PAGE_BYTES`.
+
+    With `anchors=True` the parser also looks for `<a href>` that look like feeds
+    (contain "xml", "rss" or "feed"), but only if the head has no feed links.
+    Then the page is read until `MAX_PAGE_BYTES`.
+"""
+
+import re
+import codecs
+import typing as t
+from html.parser import HTMLParser
+
+# bytes of a page that are read at most
+MAX_PAGE_BYTES = 1024 * 1024
+CHUNK_SIZE = 16 * 1024
+
+# any other element ends the head (like in browsers, if `</head>` is missing),
+# except inside `<noscript>` (e.g., tracking pixels: `<noscript><img ...></noscript>`)
+HEAD_TAGS = {'html', 'head', 'title', 'meta', 'link', 'script', 'style',
+             'base', 'noscript', 'template'}
+OPENGRAPH_PROPERTIES = ('og:title', 'og:url')
+FEED_HINTS = ('xml', 'rss', 'feed')
+
+_header_charset = re.compile(r'charset=["\']?([\w.:-]+)', re.I)
+_meta_charset = re.compile(rb'<meta[^>]+charset=["\']?([\w.:-]+)', re.I)
+_boms = ((codecs.BOM_UTF8, 'utf-8'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+
+
+class HeadParser(HTMLParser):
+
+    def __init__(self, anchors: bool = False) -> None:
+        super().__init__(convert_charrefs=True)
+        self.anchors = anchors
+        # key = OpenGraph property, value = content of the first tag
+        self.opengraph = {}
+        # content of JSON scripts (schema.org)
+        self.schemas = []
+        # `href` of `<link rel="alternate">` with RSS / XML type
+        self.alternates = []
+        # `href` of `<a>` that look like feeds
+        self.links = []
+        self.in_head = True
+        # depth of open `<noscript>` elements
+        self._noscript = 0
+        # nothing else is needed from the page
+        self.done = False
+        self.bytes_read = 0
+        self._script = None
+
+    def _end_head(self) -> None:
+        if self.in_head:
+            self.in_head = False
+            self.done = not self.anchors or len(self.alternates) > 0
+
+    def handle_starttag(self, tag: str, attrs: t.List[tuple]) -> None:
+        if tag == 'body' or (tag not in HEAD_TAGS and self._noscript == 0):
+            self._end_head()
+        if tag == 'noscript':
+            self._noscript += 1
+        attrs = dict(attrs)
+        if tag == 'meta':
+            prop = attrs.get('property')
+            if prop in OPENGRAPH_PROPERTIES and attrs.get('content') is not None:
+                self.opengraph.setdefault(prop, attrs['content'])
+        elif tag == 'link':
+            rel = (attrs.get('rel') or '').lower().split()
+            link_type = attrs.get('type') or ''
+            if 'alternate' in rel and ('rss' in link_type or 'xml' in link_type) and attrs.get('href'):
+                self.alternates.append(attrs['href'])
+        elif tag == 'script':
+            if 'json' in (attrs.get('type') or ''):
+                self._script = []
+        elif tag == 'a' and self.anchors and not self.done:
+            href = attrs.get('href')
+            if href and any(hint in href for hint in FEED_HINTS):
+                self.links.append(href)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == 'noscript':
+            self._noscript = max(self._noscript - 1, 0)
+        elif tag == 'script' and self._script is not None:
+            self.schemas.append(''.join(self._script))
+            self._script = None
+        elif tag == 'head':
+            self._end_head()
+
+    def handle_data(self, data: str) -> None:
+        if self._script is not None:
+            self._script.append(data)
+
+    def feed_links(self) -> t.List[str]:
+        """ Links that might be feeds, in order of appearance """
+        return self.alternates + self.links
+
+
+def detect_encoding(start: bytes, content_type: str = '') -> str:
+    """ Encoding of a page: BOM, HTTP header, `<meta charset>`, or UTF-8 """
+    for bom, encoding in _boms:
+        if start.startswith(bom):
+            return encoding
+    match = _header_charset.search(content_type or '')
+    if match is None:
+        match = _meta_charset.search(start[:4096])
+    if match is not None:
+        encoding = match.group(1)
+        if isinstance(encoding, bytes):
+            encoding = encoding.decode('ascii', errors='ignore')
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            pass
+    return 'utf-8'
+
+
+def parse_head(chunks: t.Iterable[bytes], content_type: str = '',
+               anchors: bool = False, max_bytes: int = MAX_PAGE_BYTES) -> HeadParser:
+    """
+        Feed `chunks` of a page (e.g., `Response.iter_content()`) to a `HeadParser`
+        until it is done or `max_bytes` are read
+    """
+    parser = HeadParser(anchors=anchors)
+    decoder = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(detect_encoding(chunk, content_type))(errors='replace')
+        chunk = chunk[:max_bytes - parser.bytes_read]
+        parser.bytes_read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or parser.bytes_read >= max_bytes:
+            break
+    parser.close()
+    return parser
@@ -0,0 +1,479 @@
+"""
+    Caching of API responses
+
+    Some routes only depend on the Schema (e.g., `/openapi.json`, `/schema/types`)
+    and do not change while the app is running. Their responses are rendered once
+    per process and stored as precompressed bytes (gzip and brotli, if installed).
+    The cache is keyed on `APP_VERSION` and a hash of the Schema, so a new release
+    or a schema change never serves outdated documents.
+
+    Public read routes (detail views, queries) opt in with `api.route(cache=...)`,
+    see `TaggedResponseCache`. Their responses are tagged and dropped
+    by the mutating routes.
+
+    Clients receive a strong `ETag` (one per content encoding) and a `Cache-Control`
+    header and can revalidate with `If-None-Match` (-> `304 Not Modified`).
+"""
+
+import os
+import time
+import gzip
+import pickle
+import sqlite3
+import hashlib
+import threading
+import typing as t
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import wraps, lru_cache
+
+from flask import current_app, request, Response
+import flask_jwt_extended as jwtx
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from meteor.flaskdgraph import Schema
+from meteor.flaskdgraph.dgraph_types import UID
+from meteor.flaskdgraph.utils import validate_uid
+
+# upper bound of cached responses, protects against arbitrary path parameters
+MAX_ENTRIES = 1024
+
+
+@lru_cache(maxsize=None)
+def schema_hash() -> str:
+    """ Hash of the (frozen) Schema, changes whenever a type or predicate changes """
+    return hashlib.sha1(Schema.generate_dgraph_schema().encode('utf-8')).hexdigest()[:12]
+
+
+class PrecompressedResponse:
+
+    """
+        Rendered response body alongside its compressed variants and ETag
+    """
+
+    __slots__ = "data", "gzip", "br", "etag", "mimetype"
+
+    def __init__(self, data: bytes, mimetype: str = 'application/json', 
+                 compresslevel: int = 9, brotli_quality: int = 11) -> None:
+        self.data = data
+        self.mimetype = mimetype
+        self.etag = hashlib.sha1(data).hexdigest()
+        self.gzip = gzip.compress(data, compresslevel=compresslevel)
+        if brotli is not None:
+            self.br = brotli.compress(data, quality=brotli_quality)
+        else:
+            self.br = None
+
+    def variants(self) -> t.List[str]:
+        """ ETags of all encodings, each encoding has its own ETag (`<sha>-gzip`) """
+        etags = [self.etag, f'{self.etag}-gzip']
+        if self.br is not None:
+            etags.append(f'{self.etag}-br')
+        return etags
+
+    def to_response(self, max_age: int = 3600, private: bool = False) -> Response:
+        """ Serve the best encoding accepted by the client, or `304` if the client has a fresh copy """
+        encoding = None
+        data = self.data
+        if self.br is not None and 'br' in request.accept_encodings:
+            encoding, data = 'br', self.br
+        elif 'gzip' in request.accept_encodings:
+            encoding, data = 'gzip', self.gzip
+        etag = f'{self.etag}-{encoding}' if encoding else self.etag
+        # any variant is fine: all encodings have the same content
+        if any(variant in request.if_none_match for variant in self.variants()):
+            response = Response(status=304)
+        else:
+            response = Response(data, mimetype=self.mimetype)
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f'{"private" if private else "public"}, max-age={max_age}'
+        response.vary.add('Accept-Encoding')
+        return response
+
+
+class ResponseCache:
+
+    """
+        Process wide store of `PrecompressedResponse`s.
+        All entries are dropped when the version key (`APP_VERSION` + Schema hash) changes.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._version = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def version() -> str:
+        return f"{current_app.config.get('APP_VERSION')}-{schema_hash()}"
+
+    def get(self, key: tuple) -> t.Union[PrecompressedResponse, None]:
+        if self._version != self.version():
+            return None
+        return self._entries.get(key)
+
+    def set(self, key: tuple, entry: PrecompressedResponse) -> None:
+        version = self.version()
+        with self._lock:
+            if self._version != version or len(self._entries) >= self.max_entries:
+                self._entries = {}
+                self._version = version
+            self._entries[key] = entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+
+
+response_cache = ResponseCache()
+
+
+def cached_response(f):
+    """
+        Decorator for routes that only depend on the Schema.
+
+        The response is cached per route, host and parameters.
+        Only successful JSON responses are cached, errors are passed through.
+        Responses that already have a `Cache-Control` header (i.e., the route
+        handles caching itself) are passed through as well.
+        Apply it below `@api.route`, so the parameters are already parsed.
+    """
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        key = (f.__name__, request.host_url, repr(args), repr(sorted(kwargs.items())))
+        entry = response_cache.get(key)
+        if entry is None:
+            response = current_app.make_response(f(*args, **kwargs))
+            if response.status_code != 200 or not response.is_json or 'Cache-Control' in response.headers:
+                return response
+            entry = PrecompressedResponse(response.get_data(), mimetype=response.mimetype)
+            response_cache.set(key, entry)
+        return entry.to_response(max_age=current_app.config.get('API_SCHEMA_CACHE_MAX_AGE', 3600))
+
+    return wrapper
+
+
+"""
+    Tagged response cache for public read routes
+"""
+
+# tag of responses that depend on any entry (lists, search results)
+ANY_ENTRY = 'Entry'
+
+
+def collect_uids(data: t.Any, uids: set = None) -> t.Set[str]:
+    """ Collect all UIDs in a (nested) structure: `uid` keys of dicts and `UID` objects """
+    if uids is None:
+        uids = set()
+    if isinstance(data, UID):
+        uid = validate_uid(str(data))
+        if uid:
+            uids.add(uid)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if key == 'uid' and isinstance(value, (str, UID)):
+                uid = validate_uid(str(value))
+                if uid:
+                    uids.add(uid)
+            else:
+                collect_uids(value, uids)
+    elif isinstance(data, (list, tuple, set)):
+        for item in data:
+            collect_uids(item, uids)
+    return uids
+
+
+class MemoryBackend:
+
+    """ LRU cache in the worker process, invalidation is local to the process """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        # key = cache key, value = (expires, tags, response)
+        self._entries = OrderedDict()
+        # key = tag, value = set of cache keys
+        self._tags = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: str) -> t.Union[PrecompressedResponse, None]:
+        with self._lock:
+            try:
+                expires, _, response = self._entries[key]
+            except KeyError:
+                return None
+            if expires < time.time():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return response
+
+    def set(self, key: str, response: PrecompressedResponse, tags: t.Set[str], ttl: int, generation: int) -> None:
+        with self._lock:
+            # the response was rendered before an invalidation, it might be outdated
+            if generation != self._generation:
+                return
+            self._drop(key)
+            self._entries[key] = (time.time() + ttl, tags, response)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, tags: t.Set[str]) -> None:
+        with self._lock:
+            self._generation += 1
+            for tag in tags:
+                for key in list(self._tags.get(tag, [])):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._tags.clear()
+
+
+class SQLiteBackend:
+
+    """ 
+        Local SQLite store shared by all worker processes of the host,
+        invalidations are visible to all workers immediately 
+    """
+
+    # delete expired entries every n-th write
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, path: str, max_entries: int = MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._store() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY,
+                                expires REAL NOT NULL,
+                                response BLOB NOT NULL)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS tags (
+                                tag TEXT NOT NULL,
+                                key TEXT NOT NULL)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS tags_tag ON tags (tag)')
+            conn.execute('CREATE INDEX IF NOT EXISTS tags_key ON tags (key)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS generation (
+                                id INTEGER PRIMARY KEY CHECK (id = 0),
+                                value INTEGER NOT NULL)''')
+            conn.execute('INSERT OR IGNORE INTO generation (id, value) VALUES (0, 0)')
+
+    @contextmanager
+    def _store(self) -> t.Iterator[sqlite3.Connection]:
+        """ Connection that commits on success and is always closed """
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def generation(self) -> int:
+        with self._store() as conn:
+            return conn.execute('SELECT value FROM generation WHERE id = 0').fetchone()[0]
+
+    def get(self, key: str) -> t.Union[PrecompressedResponse, None]:
+        with self._store() as conn:
+            row = conn.execute('SELECT response FROM responses WHERE key = ? AND expires >= ?',
+                               (key, time.time())).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0])
+
+    def set(self, key: str, response: PrecompressedResponse, tags: t.Set[str], ttl: int, generation: int) -> None:
+        data = pickle.dumps(response, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._store() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            current = conn.execute('SELECT value FROM generation WHERE id = 0').fetchone()[0]
+            if current != generation:
+                return
+            conn.execute('DELETE FROM tags WHERE key = ?', (key,))
+            conn.execute('INSERT OR REPLACE INTO responses (key, expires, response) VALUES (?, ?, ?)',
+                         (key, time.time() + ttl, data))
+            conn.executemany('INSERT INTO tags (tag, key) VALUES (?, ?)', [(tag, key) for tag in tags])
+            self._writes += 1
+            if self._writes % self.PRUNE_INTERVAL == 0:
+                self._prune(conn)
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        conn.execute('DELETE FROM responses WHERE expires < ?', (time.time(),))
+        conn.execute('''DELETE FROM responses WHERE key IN (
+                            SELECT key FROM responses ORDER BY expires DESC LIMIT -1 OFFSET ?)''',
+                     (self.max_entries,))
+        conn.execute('DELETE FROM tags WHERE key NOT IN (SELECT key FROM responses)')
+
+    def invalidate(self, tags: t.Set[str]) -> None:
+        tags = list(tags)
+        with self._store() as conn:
+            conn.execute('UPDATE generation SET value = value + 1 WHERE id = 0')
+            for i in range(0, len(tags), 500):
+                chunk = tags[i:i + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                conn.execute(f'''DELETE FROM responses WHERE key IN (
+                                    SELECT key FROM tags WHERE tag IN ({placeholders}))''', chunk)
+                conn.execute(f'DELETE FROM tags WHERE tag IN ({placeholders})', chunk)
+
+    def clear(self) -> None:
+        with self._store() as conn:
+            conn.execute('UPDATE generation SET value = value + 1 WHERE id = 0')
+            conn.execute('DELETE FROM responses')
+            conn.execute('DELETE FROM tags')
+
+
+class TaggedResponseCache:
+
+    """
+        Response cache for public read routes, enabled per route with `api.route(cache=...)`:
+
+        - `cache=True`: the response is tagged with all UIDs it contains
+            (and the `uid` path parameter)
+        - `cache=('Entry', )`: additionally tagged with the given tags, 
+            e.g., DGraph Types of entries that might show up in the response
+
+        Responses are keyed on the path, the normalized query parameters and 
+        the auth class of the client (public route, anonymous, or the logged in user).
+        Only successful JSON responses are cached.
+
+        Mutating routes call `api_cache.invalidate()` with the UIDs and DGraph Types
+        they touched, which drops all responses with any of these tags.
+        Entries expire after `API_RESPONSE_CACHE_TTL` seconds (default: 300).
+
+        Backend is selected with `API_RESPONSE_CACHE`:
+        
+        - `"sqlite"` (or `True`): shared local store (`API_RESPONSE_CACHE_PATH`),
+            invalidation is visible to all workers of the host (default)
+        - `"memory"`: LRU in each worker, invalidation is local to the process.
+            Only use it with a single worker process, otherwise other workers
+            serve outdated responses until they expire.
+        - `None`: disabled (default when `TESTING`)
+    """
+
+    def __init__(self) -> None:
+        self._backends = {}
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self) -> t.Union[MemoryBackend, SQLiteBackend, None]:
+        name = current_app.config.get('API_RESPONSE_CACHE',
+                                      None if current_app.config.get('TESTING') else 'sqlite')
+        if not name:
+            return None
+        if name is True:
+            name = 'sqlite'
+        max_entries = current_app.config.get('API_RESPONSE_CACHE_MAX_ENTRIES', MAX_ENTRIES)
+        if name == 'sqlite':
+            path = current_app.config.get('API_RESPONSE_CACHE_PATH',
+                                          os.path.join(current_app.instance_path, 'responses.sqlite'))
+            key = (name, path)
+        elif name == 'memory':
+            key = (name, None)
+        else:
+            raise ValueError(f'Unknown response cache backend <{name}>')
+        try:
+            return self._backends[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._backends:
+                if name == 'sqlite':
+                    self._backends[key] = SQLiteBackend(path, max_entries=max_entries)
+                else:
+                    self._backends[key] = MemoryBackend(max_entries=max_entries)
+            return self._backends[key]
+
+    @staticmethod
+    def auth_class(authentication: bool) -> str:
+        if not authentication:
+            return 'public'
+        user = jwtx.current_user
+        if user is None or not user.is_authenticated:
+            return 'anonymous'
+        return f'user:{user.id}:{user._role}'
+
+    @staticmethod
+    def key(authentication: bool) -> str:
+        args = sorted((k, v) for k, v in request.args.items(multi=True) if v != '')
+        raw = repr((request.host_url, request.path, args, TaggedResponseCache.auth_class(authentication)))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def invalidate(self, *tags: t.Union[str, UID]) -> None:
+        """ Drop all responses that are tagged with any of the UIDs or DGraph Types """
+        backend = self.backend
+        if backend is None:
+            return
+        normalized = set()
+        for tag in tags:
+            if not tag:
+                continue
+            uid = validate_uid(str(tag)) if str(tag).startswith('0x') else None
+            normalized.add(uid or str(tag))
+        if normalized:
+            backend.invalidate(normalized)
+
+    def clear(self) -> None:
+        for backend in self._backends.values():
+            backend.clear()
+
+    def cached(self, f: t.Callable, tags: t.Union[bool, t.Iterable[str]], authentication: bool = False) -> t.Callable:
+        """ Wrap a route function (see `api.route(cache=...)`) """
+        static_tags = set() if tags is True else set(tags)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            backend = self.backend
+            if backend is None or request.method != 'GET':
+                return f(*args, **kwargs)
+            key = self.key(authentication)
+            max_age = current_app.config.get('API_RESPONSE_CACHE_MAX_AGE', 0)
+            private = authentication and jwtx.current_user is not None
+            entry = backend.get(key)
+            if entry is None:
+                generation = backend.generation()
+                response = current_app.make_response(f(*args, **kwargs))
+                if response.status_code != 200 or not response.is_json or 'Cache-Control' in response.headers:
+                    return response
+                entry = PrecompressedResponse(response.get_data(), mimetype=response.mimetype,
+                                              compresslevel=6, brotli_quality=5)
+                response_tags = static_tags | collect_uids(response.get_json())
+                if validate_uid(kwargs.get('uid')):
+                    response_tags.add(validate_uid(kwargs['uid']))
+                backend.set(key, entry, response_tags, 
+                            current_app.config.get('API_RESPONSE_CACHE_TTL', 300), 
+                            generation)
+            response = entry.to_response(max_age=max_age, private=private)
+            if authentication:
+                response.vary.add('Authorization')
+            return response
+
+        return wrapper
+
+
+api_cache = TaggedResponseCache()
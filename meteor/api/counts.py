@@ -0,0 +1,132 @@
+"""
+    Materialized predicate counts
+
+    `/schema/predicate/counts/<predicate>` aggregates `has(predicate) @groupby(predicate)`
+    over the whole graph. The frontend requests it for every facet of the query form,
+    but the counts only change when entries are added, edited or reviewed.
+
+    The counts are computed once per predicate (and optional DGraph Type) and
+    kept in memory as precompressed responses with an ETag. Mutating routes
+    call `predicate_counts.invalidate()` with the DGraph Types they touched,
+    which drops all counts that depend on these types. Every count is
+    recomputed after `PREDICATE_COUNTS_TTL` seconds (default: 3600) at the latest,
+    this also reconciles changes made by other workers.
+"""
+
+import time
+import threading
+import typing as t
+
+from flask import current_app, jsonify
+
+from meteor import dgraph
+from meteor.flaskdgraph import Schema
+from meteor.api.cache import PrecompressedResponse
+
+
+def count_predicate(predicate, dgraph_type: str = None) -> t.List[dict]:
+    """
+        Aggregate the number of entries per value of a predicate.
+        Optionally, only count entries of a DGraph Type
+    """
+    type_filter = f"@filter(type({dgraph_type}))" if dgraph_type else ""
+
+    if 'uid' in predicate.dgraph_predicate_type:
+
+        query_predicates = [predicate.predicate]
+
+        if predicate.predicate_alias:
+            query_predicates += predicate.predicate_alias
+
+        query_string = "{ "
+        query_vars = []
+        for i, p in enumerate(query_predicates):
+            query_string += f"var(func: has({p})) {type_filter} @groupby({p}) {{ v{i} as count(uid) }} "
+            query_vars.append(f'v{i}')
+
+        query_string += f"""q(func: uid({', '.join(query_vars)}), orderasc: name) {{
+            name _unique_name uid opted_scope dgraph.type
+            entries: math({' + '.join(query_vars)}) }}
+            }}"""
+
+        result = dgraph.query(query_string)['q']
+        for entry in result:
+            try:
+                entry['dgraph.type'].remove('Entry')
+            except:
+                pass
+
+    else:
+        query_string = f""" {{
+            q(func: has({predicate.predicate})) {type_filter} @groupby({predicate.predicate}) {{
+                entries: count(uid)
+                }}
+            }}
+        """
+
+        result = dgraph.query(query_string)['q']
+        result = result[0]["@groupby"] if result else []
+        for r in result:
+            r['value'] = r.pop(predicate.predicate)
+            r['name'] = predicate.choices[r['value']]
+
+    return result
+
+
+def dependencies(predicate) -> t.Union[frozenset, None]:
+    """
+        DGraph Types that affect the counts of a predicate:
+        all types that have the predicate (or one of its aliases), and the
+        types the predicate links to (names of related entries are part of the result).
+        `None` means any type.
+    """
+    dgraph_types = set()
+    for p in [predicate.predicate] + list(predicate.predicate_alias or []):
+        dgraph_types.update(Schema.__predicates_types__.get(p, []))
+    if 'uid' in predicate.dgraph_predicate_type:
+        constraint = getattr(predicate, 'relationship_constraint', None)
+        if not constraint:
+            return None
+        dgraph_types.update(constraint)
+    return frozenset(dgraph_types)
+
+
+class PredicateCounts:
+
+    def __init__(self, ttl: int = 3600) -> None:
+        self.ttl = ttl
+        # key = (predicate, dgraph type), value = (expires, dependencies, response)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, predicate, dgraph_type: str = None) -> PrecompressedResponse:
+        """ Get the materialized counts or compute them """
+        now = time.monotonic()
+        try:
+            expires, _, response = self._entries[(key, dgraph_type)]
+            if expires > now:
+                return response
+        except KeyError:
+            pass
+
+        result = count_predicate(predicate, dgraph_type=dgraph_type)
+        rendered = current_app.make_response(jsonify(result))
+        response = PrecompressedResponse(rendered.get_data(), mimetype=rendered.mimetype)
+        ttl = current_app.config.get('PREDICATE_COUNTS_TTL', self.ttl)
+        with self._lock:
+            self._entries[(key, dgraph_type)] = (now + ttl, dependencies(predicate), response)
+        return response
+
+    def invalidate(self, *dgraph_types: str) -> None:
+        """ Drop all counts that depend on any of the given DGraph Types """
+        dgraph_types = set(dgraph_types)
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items()
+                             if v[1] is not None and v[1].isdisjoint(dgraph_types)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+
+
+predicate_counts = PredicateCounts()
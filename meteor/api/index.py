@@ -0,0 +1,151 @@
+"""
+    Base class of the in-memory indexes (search index, ownership graph, similarity index)
+
+    Each index keeps a snapshot of DGraph data in every worker process:
+
+    - The index is built on first use (`ensure_ready()`) and rebuilt in a background
+      thread once it is older than `max_age()` seconds, which also picks up changes
+      made by other workers.
+    - Mutating routes call `invalidate()`, the changed entries are fetched again
+      before the next request (`_refresh()`).
+    - Entries that are invalidated while a snapshot is fetched are fetched again
+      after the snapshot was swapped in, the snapshot might not contain their changes.
+
+    Subclasses implement `fetch()`, `_swap()` and `_update()`.
+"""
+
+import time
+import threading
+import typing as t
+
+from flask import current_app
+
+from meteor.flaskdgraph.utils import validate_uid
+
+
+class InMemoryIndex:
+
+    # used in log messages
+    name = 'index'
+    # config key of the maximum age (seconds) and its default
+    max_age_key = None
+    default_max_age = 300
+
+    def __init__(self) -> None:
+        self.built = 0.0
+        self._ready = False
+        # uids that have to be fetched again before the next request
+        self._pending = set()
+        # uids that were invalidated during a build, `None` if no build is running
+        self._invalidated = None
+        self._lock = threading.RLock()
+        # only one build at a time
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+
+    def max_age(self) -> float:
+        return current_app.config.get(self.max_age_key, self.default_max_age)
+
+    """
+        Implemented by subclasses
+    """
+
+    def fetch(self, uids: t.List[str] = None) -> t.List[dict]:
+        """ Get all entries of the index, or only `uids`, from DGraph """
+        raise NotImplementedError
+
+    def _snapshot(self, entries: t.List[dict]) -> t.Any:
+        """ Prepare the fetched `entries` for `_swap()`, runs without the lock """
+        return entries
+
+    def _swap(self, snapshot: t.Any) -> None:
+        """ Replace the content of the index (and `built`), runs with the lock """
+        raise NotImplementedError
+
+    def _update(self, uids: t.Set[str], entries: t.List[dict]) -> None:
+        """ Apply the current state of the changed `uids`, runs with the lock """
+        raise NotImplementedError
+
+    """
+        Building
+    """
+
+    def _replace(self, read: t.Callable[[], t.Any]) -> bool:
+        """
+            Swap in the snapshot returned by `read()`.
+            Returns `False` if `read()` has no snapshot (`None`).
+        """
+        with self._lock:
+            self._invalidated = set()
+        try:
+            snapshot = read()
+            if snapshot is None:
+                return False
+            with self._lock:
+                self._swap(snapshot)
+                self._pending.update(self._invalidated)
+                self._ready = True
+            return True
+        finally:
+            with self._lock:
+                self._invalidated = None
+
+    def _build(self) -> None:
+        """ Build the index from DGraph, the caller holds `_build_lock` """
+        self._replace(lambda: self._snapshot(self.fetch()))
+
+    def build(self) -> None:
+        with self._build_lock:
+            self._build()
+
+    def _first_build(self) -> None:
+        """ Called with `_build_lock` when the index is used for the first time """
+        self._build()
+
+    def _background_build(self) -> None:
+        self.build()
+
+    def _rebuild(self, app) -> None:
+        try:
+            with app.app_context():
+                self._background_build()
+        except Exception as e:
+            app.logger.error(f'Could not rebuild {self.name}: {e}', exc_info=True)
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def ensure_ready(self) -> None:
+        if not self._ready:
+            with self._build_lock:
+                if not self._ready:
+                    self._first_build()
+        if time.time() - self.built > self.max_age():
+            with self._lock:
+                start, self._rebuilding = not self._rebuilding, True
+            if start:
+                threading.Thread(target=self._rebuild,
+                                 args=(current_app._get_current_object(),),
+                                 daemon=True).start()
+        self._refresh()
+
+    """
+        Incremental updates
+    """
+
+    def invalidate(self, *uids: str) -> None:
+        """ Entries were added, edited, reviewed or deleted """
+        uids = set(filter(None, map(validate_uid, uids)))
+        with self._lock:
+            self._pending.update(uids)
+            if self._invalidated is not None:
+                self._invalidated.update(uids)
+
+    def _refresh(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+        entries = self.fetch(sorted(pending))
+        with self._lock:
+            self._update(pending, entries)
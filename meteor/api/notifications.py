@@ -1,6 +1,16 @@
+import time
+import json
+import datetime
+import threading
 import typing as t
+
+from flask import current_app
+
 from meteor import dgraph
+from meteor.jobs import jobs
+from meteor.flaskdgraph import Schema
 from meteor.flaskdgraph.utils import validate_uid
+from meteor.flaskdgraph.dgraph_types import UID, NewID, dict_to_nquad
 from meteor.main.model import Notification, User
 from meteor.users.constants import USER_ROLES
 
@@ -69,70 +79,215 @@ def dispatch_notification(user: User,
     res = dgraph.mutation(notify.as_dict())
     return res.uids[notify.as_dict()['uid'].replace('_:', '')]
 
-def notify_new_type(dgraph_type: str, 
-                    new_uid: str,
-                    role=USER_ROLES.Contributor) -> None:
-    # get all users who follow this type
-    query_string = """query UsersFollow($type: string, $role: int, $new_uid: string) {
-        q(func: eq(follows_types, $type)) @filter(ge(role, $role)) {
-            uid
-        }
-        entry(func: uid($new_uid)) {
-            name entry_review_status
-        }
-    }"""
+@jobs.task
+def follow_entity(user_uid: str, uid: str) -> None:
+    """ Subscribe a user to an entry """
+    follow = {"uid": user_uid,
+              "follows_entities": [{"uid": uid}]}
+    if not dgraph.mutation(follow):
+        raise Exception(f'Could not subscribe <{user_uid}> to <{uid}>')
 
-    res = dgraph.query(query_string, variables={'$type': dgraph_type, '$role': str(role), '$new_uid': new_uid})
-    users = [u['uid'] for u in res['q']]
-    entry = res['entry'][0]
-    message = f"A new entry for the type {dgraph_type} was added: {entry['name']}"
-    if entry['entry_review_status'] == 'pending':
-        message += "The new entry is awaiting review."
-    notifications = [Notification(_notify=user, 
-                                  _title=f"New {dgraph_type}",
-                                  _content=message,
-                                  _linked=new_uid).as_dict() for user in users]
-    res = dgraph.mutation(notifications)
-    logger.debug(f'Dispatched notifications: {res.uids}')
-    logger.debug(res)
+""" 
+    Notification Fan-out
 
-def notify_new_entity(uid: str, role=USER_ROLES.Contributor) -> None:
-    query_string = """query UsersFollow($uid: string, $role: int) {
-        entry(func: uid($uid)) {
+    An event (e.g., a new entry) can concern many users. All audiences
+    of an event are resolved in one query, every user is notified
+    only once per event, and all notifications are written as N-Quads
+    in batched mutations of `NOTIFICATIONS_CHUNK_SIZE` (default: 500).
+
+    Jobs are retried when a chunk fails. Notifications of a job get a
+    deterministic key (`_notification_key`: event and user), a retry only
+    writes the notifications whose key does not exist yet.
+"""
+
+class FanoutStats:
+
+    """ Process wide counters of dispatched notifications """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.events = 0
+            self.notifications = 0
+            self.duplicates = 0
+            self.mutations = 0
+            self.max_fanout = 0
+            self.duration = 0.0
+
+    def track(self, notifications: int, duplicates: int, mutations: int, duration: float) -> None:
+        with self._lock:
+            self.events += 1
+            self.notifications += notifications
+            self.duplicates += duplicates
+            self.mutations += mutations
+            self.max_fanout = max(self.max_fanout, notifications)
+            self.duration += duration
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {'events': self.events,
+                    'notifications': self.notifications,
+                    'duplicates': self.duplicates,
+                    'mutations': self.mutations,
+                    'max_fanout': self.max_fanout,
+                    'duration': self.duration}
+
+
+fanout_stats = FanoutStats()
+
+
+def _dispatched(keys: t.List[str]) -> t.Set[str]:
+    """ Keys of notifications that were already written (e.g., by a failed attempt of the job) """
+    query_string = f"""{{ q(func: eq(_notification_key, {json.dumps(keys)})) {{ _notification_key }} }}"""
+    res = dgraph.query(query_string)
+    return {notification['_notification_key'] for notification in res['q']}
+
+
+def dispatch_notifications(notifications: t.Dict[str, t.Tuple[str, str]],
+                           linked: str,
+                           event: str = None) -> int:
+    """ 
+        Send notifications about one entry to many users.
+
+        `notifications`: key = user uid, value = (title, content)
+
+        `event`: identifies the event (e.g., `new_entry:0x123:pending`), users
+        who already got a notification for this event are skipped.
+
+        Returns number of mutations
+    """
+    timestamp = datetime.datetime.now()
+    dgraph_types = Schema.resolve_inheritance(Notification)
+    users = list(notifications.items())
+    chunk_size = current_app.config.get('NOTIFICATIONS_CHUNK_SIZE', 500)
+    mutations = 0
+    for i in range(0, len(users), chunk_size):
+        chunk = users[i:i + chunk_size]
+        keys = [f'{event}:{user}' for user, _ in chunk] if event else [None] * len(chunk)
+        dispatched = _dispatched(keys) if event else set()
+        nquads = []
+        for j, ((user, (title, content)), key) in enumerate(zip(chunk, keys)):
+            if key in dispatched:
+                continue
+            notification = {'uid': NewID('_:notification', suffix=i + j),
+                            'dgraph.type': dgraph_types,
+                            '_notify': UID(user),
+                            '_title': title,
+                            '_content': content,
+                            '_linked': UID(linked),
+                            '_notification_date': timestamp,
+                            '_read': False,
+                            '_email_dispatched': False}
+            if key:
+                notification['_notification_key'] = key
+            nquads += dict_to_nquad(notification)
+        if dispatched:
+            logger.debug(f'Skipped {len(dispatched)} notifications for <{linked}>, already dispatched')
+        if not nquads:
+            continue
+        res = dgraph.upsert(None, set_nquads='\n'.join(nquads))
+        if not res:
+            raise ValueError(f'Could not dispatch notifications for <{linked}>')
+        mutations += 1
+        logger.debug(f'Dispatched notifications: {res.uids}')
+    return mutations
+
+
+def _entry_type(entry: dict) -> str:
+    dgraph_types = [dgraph_type for dgraph_type in entry['dgraph.type'] if dgraph_type != 'Entry']
+    return dgraph_types[0] if dgraph_types else entry['dgraph.type'][0]
+
+
+@jobs.task
+def notify_new_entry(uid: str,
+                     dgraph_type: str = None,
+                     role=USER_ROLES.Contributor,
+                     types: bool = True,
+                     entities: bool = True) -> int:
+    """
+        Notify users about a new entry. Users either follow the DGraph Type
+        of the entry (`types`) or entities that are related to the entry (`entities`).
+        Users who follow both only get the more specific notification about entities.
+
+        Returns number of dispatched notifications
+    """
+    start = time.perf_counter()
+    if types and dgraph_type is None:
+        # `type_followers` filters on the type, resolve it first
+        res = dgraph.query("""query EntryType($uid: string) {
+            entry(func: uid($uid)) { dgraph.type }
+        }""", variables={'$uid': uid})
+        dgraph_type = _entry_type(res['entry'][0])
+    blocks = ["""entry(func: uid($uid)) {
+            name entry_review_status dgraph.type
             expand(_all_) { u as uid }
-            dgraph.type
-        }
-        users(func: ge(role, $role)) @filter(uid_in(follows_entities, uid(u))) {
+        }"""]
+    if types:
+        blocks.append("""type_followers(func: eq(follows_types, $type)) @filter(ge(role, $role)) {
             uid
-            follows_entities @filter(uid(u)) {
-                    uid name _unique_name dgraph.type
-                }
-            }
-        }"""
-    
-    res = dgraph.query(query_string, variables={'$uid': uid, '$role': str(role)})
+        }""")
+    if entities:
+        blocks.append("""entity_followers(func: ge(role, $role)) @filter(uid_in(follows_entities, uid(u))) {
+            uid
+            follows_entities @filter(uid(u)) { name }
+        }""")
+    query_string = "query UsersFollow($uid: string, $type: string, $role: int) {\n" + "\n".join(blocks) + "\n}"
+
+    res = dgraph.query(query_string, variables={'$uid': uid, 
+                                                '$type': dgraph_type or '', 
+                                                '$role': str(role)})
     entry = res['entry'][0]
-    entry['dgraph.type'].remove('Entry')
-    dgraph_type = entry['dgraph.type'][0]
-    notifications = []
-    for user in res['users']:
-        message = (f'A new entry with the name "{entry["name"]}" ({dgraph_type}) was added. ')
+    if dgraph_type is None:
+        dgraph_type = _entry_type(entry)
+
+    notifications = {}
+    for user in res.get('entity_followers', []):
+        message = (f'A new entry with the name "{entry["name"]}" ({_entry_type(entry)}) was added. ')
         if entry['entry_review_status'] == 'pending':
             message += 'The entry is awaiting review.'
         message += f"You receive this notification, because you follow the entities: "
         message += ", ".join([follow['name'] for follow in user['follows_entities']])
-        notify = Notification(_notify=user['uid'], 
-                              _title=f"New {entry['entry_review_status']} {dgraph_type}: <{entry['name']}>!",
-                              _content=message,
-                              _linked=uid)
-        notifications.append(notify.as_dict())
-    res = dgraph.mutation(notifications)
-    logger.debug(f'Dispatched notifications: {res.uids}')
-    logger.debug(res)
+        notifications[user['uid']] = (f"New {entry['entry_review_status']} {_entry_type(entry)}: <{entry['name']}>!",
+                                      message)
+
+    duplicates = 0
+    for user in res.get('type_followers', []):
+        if user['uid'] in notifications:
+            duplicates += 1
+            continue
+        message = f"A new entry for the type {dgraph_type} was added: {entry['name']}. "
+        if entry['entry_review_status'] == 'pending':
+            message += "The new entry is awaiting review."
+        notifications[user['uid']] = (f"New {dgraph_type}", message)
+
+    # a retry of this job (or the type / entity job for the same event) skips users that were notified
+    mutations = dispatch_notifications(notifications, uid, 
+                                       event=f"new_entry:{uid}:{entry['entry_review_status']}")
+    fanout_stats.track(len(notifications), duplicates, mutations, time.perf_counter() - start)
+    logger.debug(f'Notified {len(notifications)} users about <{uid}> ({duplicates} duplicates skipped)')
+    return len(notifications)
+
+
+@jobs.task
+def notify_new_type(dgraph_type: str, 
+                    new_uid: str,
+                    role=USER_ROLES.Contributor) -> None:
+    """ Only notify users who follow the DGraph Type """
+    notify_new_entry(new_uid, dgraph_type=dgraph_type, role=role, entities=False)
+
+
+@jobs.task
+def notify_new_entity(uid: str, role=USER_ROLES.Contributor) -> None:
+    """ Only notify users who follow related entities """
+    notify_new_entry(uid, role=role, types=False)
 
 
 from meteor.users.emails import send_accept_email
 
+@jobs.task
 def send_review_notification(uid: str, status: t.Literal['accepted', 'revise', 'rejected']):
     # assummes uid is safe and exists
     query_string = """query getEntry($query: string) {
@@ -180,16 +335,8 @@ def send_comment_notifications(uid: str):
     
     res = dgraph.query(query_string, variables={'$uid': uid})
     entry = res['entry'][0]
-    entry['dgraph.type'].remove('Entry')
-    dgraph_type = entry['dgraph.type'][0]
-    notifications = []
-    for user in res['users']:
-        message = f'A new comment was posted on "{entry["name"]}" ({dgraph_type}).'
-        notify = Notification(_notify=user['uid'], 
-                              _title=f"New Comment on <{entry['name']}>!",
-                              _content=message,
-                              _linked=uid)
-        notifications.append(notify.as_dict())
-    res = dgraph.mutation(notifications)
-    logger.debug(f'Dispatched notifications: {res.uids}')
-    logger.debug(res)
+    dgraph_type = _entry_type(entry)
+    message = f'A new comment was posted on "{entry["name"]}" ({dgraph_type}).'
+    notifications = {user['uid']: (f"New Comment on <{entry['name']}>!", message) 
+                     for user in res['users']}
+    dispatch_notifications(notifications, uid)
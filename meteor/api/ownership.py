@@ -0,0 +1,248 @@
+"""
+    Ownership graph for `/view/ownership/<uid>`
+
+    The route used to run `@recurse` over `owns publishes ~owns ~publishes`
+    from the requested entry and then fetch every reached node again.
+    For large media conglomerates this touches thousands of nodes per request.
+
+    The ownership graph keeps all accepted Organizations, NewsSources and
+    PoliticalParties in memory with their outgoing `owns` / `publishes` edges
+    (adjacency lists) and the reverse edges. Connected components are precomputed,
+    so requests for small components are answered without a traversal. Larger
+    components are traversed breadth-first up to `OWNERSHIP_MAX_DEPTH` hops
+    (default: 10) and at most `OWNERSHIP_MAX_NODES` nodes (default: 1000).
+
+    Mutating routes call `ownership_graph.invalidate()`; the edges of these entries
+    are fetched again with the next request and only the affected components are
+    recomputed. Edges can also be edited from the target (e.g., `NewsSource.published_by`
+    is the reverse of `publishes`), so the current and previous sources of incoming
+    edges are fetched again as well. The graph is rebuilt in the background after `OWNERSHIP_GRAPH_MAX_AGE`
+    seconds (default: 1 hour), which also picks up changes made by other workers.
+    Set `OWNERSHIP_GRAPH = False` to use the `@recurse` query instead.
+"""
+
+import time
+import typing as t
+from collections import deque
+
+from flask import current_app
+
+from meteor import dgraph
+from meteor.api.index import InMemoryIndex
+
+OWNERSHIP_TYPES = ("Organization", "NewsSource", "PoliticalParty")
+OWNERSHIP_PREDICATES = ("owns", "publishes")
+
+FETCH_FIELDS = """uid name dgraph.type _unique_name entry_review_status
+                  channel { _unique_name uid name }
+                  owns { uid }
+                  publishes { uid }"""
+
+# sources of incoming edges, only fetched for incremental updates
+REVERSE_FIELDS = " ".join(f"~{predicate} {{ {FETCH_FIELDS} }}" for predicate in OWNERSHIP_PREDICATES)
+
+
+def fetch_nodes(uids: t.List[str] = None) -> t.List[dict]:
+    """
+        Get the nodes (and their outgoing edges) of the ownership graph from DGraph.
+        When `uids` are given, the sources of their incoming edges are included (`~owns`, `~publishes`)
+    """
+    if uids is None:
+        type_filter = ' OR '.join(f'type({dgraph_type})' for dgraph_type in OWNERSHIP_TYPES)
+        query_string = f"""{{ q(func: type(Entry))
+                                @filter(eq(entry_review_status, "accepted") AND ({type_filter})) {{
+                                {FETCH_FIELDS} }} }}"""
+    else:
+        query_string = f"{{ q(func: uid({', '.join(uids)})) {{ {FETCH_FIELDS} {REVERSE_FIELDS} }} }}"
+    return dgraph.query(query_string)['q']
+
+
+def _is_node(entry: dict) -> bool:
+    return (entry.get('entry_review_status') == 'accepted' and
+            any(dgraph_type in OWNERSHIP_TYPES for dgraph_type in entry.get('dgraph.type', [])))
+
+
+class OwnershipGraph(InMemoryIndex):
+
+    name = 'ownership graph'
+    max_age_key = 'OWNERSHIP_GRAPH_MAX_AGE'
+    default_max_age = 3600
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._clear()
+
+    def _clear(self) -> None:
+        # key = uid, value = attributes of the node
+        self._nodes = {}
+        # key = uid, value = {predicate: [target uids]}
+        self._edges = {}
+        # key = target uid, value = set of source uids (~owns, ~publishes)
+        self._reverse = {}
+        # key = uid, value = component id
+        self._component = {}
+        # key = component id, value = list of uids
+        self._members = {}
+        self._next_component = 0
+
+    @property
+    def enabled(self) -> bool:
+        return current_app.config.get('OWNERSHIP_GRAPH', True)
+
+    """
+        Maintaining the graph
+    """
+
+    def fetch(self, uids: t.List[str] = None) -> t.List[dict]:
+        entries = fetch_nodes(uids)
+        if uids is None:
+            return entries
+        # flatten: sources of incoming edges are updated as well
+        fetched = {}
+        for entry in entries:
+            for predicate in OWNERSHIP_PREDICATES:
+                for source in entry.pop('~' + predicate, []):
+                    fetched.setdefault(source['uid'], source)
+            fetched[entry['uid']] = entry
+        return list(fetched.values())
+
+    def invalidate(self, *uids: str) -> None:
+        """ Also fetch the current sources of incoming edges again, the edit might have removed their edge """
+        with self._lock:
+            sources = [source for uid in uids for source in self._reverse.get(uid, ())]
+        super().invalidate(*uids, *sources)
+
+    def _add(self, entry: dict) -> None:
+        uid = entry['uid']
+        node = {'name': entry.get('name'),
+                'uid': uid,
+                'dgraph.type': entry.get('dgraph.type', []),
+                '_unique_name': entry.get('_unique_name')}
+        if 'channel' in entry:
+            node['channel'] = entry['channel']
+        self._nodes[uid] = node
+        edges = {}
+        for predicate in OWNERSHIP_PREDICATES:
+            targets = [target['uid'] for target in entry.get(predicate, [])]
+            edges[predicate] = targets
+            for target in targets:
+                self._reverse.setdefault(target, set()).add(uid)
+        self._edges[uid] = edges
+
+    def _remove(self, uid: str) -> None:
+        self._nodes.pop(uid, None)
+        for targets in self._edges.pop(uid, {}).values():
+            for target in targets:
+                self._reverse.get(target, set()).discard(uid)
+
+    def neighbours(self, uid: str) -> t.Set[str]:
+        """ Nodes connected to `uid` by an edge in any direction """
+        neighbours = set(self._reverse.get(uid, set()))
+        for targets in self._edges.get(uid, {}).values():
+            neighbours.update(targets)
+        return {n for n in neighbours if n in self._nodes and n != uid}
+
+    def _recompute_components(self, seeds: t.Iterable[str]) -> None:
+        """ Dissolve all components that contain the seeds and compute them again """
+        seeds = set(seeds)
+        affected = {self._component[uid] for uid in seeds if uid in self._component}
+        for component in affected:
+            seeds.update(self._members.pop(component, []))
+        for uid in seeds:
+            self._component.pop(uid, None)
+        for seed in sorted(seeds):
+            if seed not in self._nodes or seed in self._component:
+                continue
+            component = self._next_component
+            self._next_component += 1
+            self._component[seed] = component
+            members = [seed]
+            queue = deque([seed])
+            while queue:
+                for neighbour in self.neighbours(queue.popleft()):
+                    if neighbour not in self._component:
+                        self._component[neighbour] = component
+                        members.append(neighbour)
+                        queue.append(neighbour)
+            self._members[component] = members
+
+    def _swap(self, entries: t.List[dict]) -> None:
+        self._clear()
+        for entry in entries:
+            self._add(entry)
+        self._recompute_components(self._nodes.keys())
+        self.built = time.time()
+
+    def _update(self, uids: t.Set[str], entries: t.List[dict]) -> None:
+        # includes the fetched sources of incoming edges
+        uids = set(uids) | {entry['uid'] for entry in entries}
+        # old and new neighbours: their components might be merged or split
+        seeds = set(uids)
+        for uid in uids:
+            seeds.update(self.neighbours(uid))
+            self._remove(uid)
+        for entry in entries:
+            if _is_node(entry):
+                self._add(entry)
+        for uid in uids:
+            seeds.update(self.neighbours(uid))
+        self._recompute_components(seeds)
+
+    """
+        Traversal
+    """
+
+    def component_size(self, uid: str) -> int:
+        return len(self._members.get(self._component.get(uid), []))
+
+    def traverse(self, uid: str, max_depth: int, max_nodes: int) -> t.List[str]:
+        """ Breadth-first search from `uid`, nearest nodes first """
+        visited = {uid}
+        order = [uid]
+        frontier = [uid]
+        for _ in range(max_depth):
+            following = []
+            for node in frontier:
+                for neighbour in sorted(self.neighbours(node)):
+                    if neighbour in visited:
+                        continue
+                    if len(order) >= max_nodes:
+                        return order
+                    visited.add(neighbour)
+                    order.append(neighbour)
+                    following.append(neighbour)
+            if not following:
+                break
+            frontier = following
+        return order
+
+    def _render(self, uid: str) -> dict:
+        node = dict(self._nodes[uid])
+        for predicate in OWNERSHIP_PREDICATES:
+            targets = [{'uid': target, '_unique_name': self._nodes[target]['_unique_name']}
+                       for target in self._edges[uid][predicate] if target in self._nodes]
+            if targets:
+                node[predicate] = targets
+        return node
+
+    def ownership(self, uid: str) -> t.Union[t.List[dict], None]:
+        """
+            All nodes connected to `uid` via `owns` / `publishes` (in both directions).
+            Returns `None` if `uid` is not part of the ownership graph
+            (e.g., the entry is not accepted yet).
+        """
+        self.ensure_ready()
+        max_depth = current_app.config.get('OWNERSHIP_MAX_DEPTH', 10)
+        max_nodes = current_app.config.get('OWNERSHIP_MAX_NODES', 1000)
+        with self._lock:
+            if uid not in self._nodes:
+                return None
+            if self.component_size(uid) <= min(max_nodes, max_depth + 1):
+                # small component: every node is within reach
+                uids = self._members[self._component[uid]]
+            else:
+                uids = self.traverse(uid, max_depth, max_nodes)
+            return [self._render(u) for u in uids]
+
+
+ownership_graph = OwnershipGraph()
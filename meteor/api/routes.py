@@ -33,6 +33,7 @@ from functools import wraps
 import inspect
 import re
 import collections
+from copy import copy
 
 from flask import Blueprint, jsonify, current_app, request, abort, url_for, render_template
 from flask.scaffold import F
@@ -44,12 +45,17 @@ from meteor.users.dgraph import AnonymousUser
 from meteor.errors import *
 from meteor.flaskdgraph import dql
 from meteor.flaskdgraph import build_query_string
+from meteor.flaskdgraph.query import next_cursor
 from meteor.flaskdgraph.utils import validate_uid, recursive_restore_sequence
-from meteor.api.view import get_entry, get_preview, get_reverse_relationships, get_rejected
+from meteor.api.cache import cached_response, api_cache, collect_uids, ANY_ENTRY
+from meteor.api.counts import predicate_counts
+from meteor.flaskdgraph.choices import choices_cache, related_types
+from meteor.api.view import load_entry, get_preview, get_preview_and_reverse_relationships, get_rejected
 from meteor.view.utils import can_view
 
 from meteor.external.dgraph import dgraph_resolve_doi
 from meteor.external.doi import clean_doi
+from meteor.external import session as external_session
 
 from meteor.main.model import *
 
@@ -315,12 +321,17 @@ class API(Blueprint):
                 return self.abort(400, message=f'Wrong API call, please review your provided parameters. Full error message: {e}')
         return logic
 
-    def route(self, rule: str, authentication: bool = False, **options: t.Any) -> t.Callable[[F], F]:
+    def route(self, rule: str, authentication: bool = False, 
+              cache: t.Union[bool, t.Iterable[str]] = False, **options: t.Any) -> t.Callable[[F], F]:
         """ Custom extension of Flask default routing / rule creation 
             This decorator extract function arguments and details and 
             stores it the blueprint class (the dict "routes")
             This enables serving the OpenAPI scheme
             The decorator also applies the @query_params decorator
+            
+            `cache`: cache the responses of this route (see `meteor.api.cache.TaggedResponseCache`).
+                `True` tags responses with the UIDs they contain, an iterable 
+                adds further tags (e.g., DGraph Types).
         """
 
         methods = options.get('methods', ['GET'])
@@ -374,6 +385,11 @@ class API(Blueprint):
             self.routes[rule]['path'] = re.sub(r'<(?P<converter>[a-zA-Z_][a-zA-Z0-9_]*\:).*?>', '', rule).replace('<', '{').replace('>', '}')
             self.routes[rule]['responses'] = sig.return_annotation
 
+            # Cache responses, the cache key depends on the current user,
+            # so the JWT has to be verified first
+            if cache:
+                f = api_cache.cached(f, cache, authentication=authentication)
+
             # Check if we need authentication
             if authentication:
                 self.routes[rule]['security'] = [{'BearerAuth': []}]
@@ -402,6 +418,7 @@ def swagger():
     return render_template('swagger/swagger.html')
 
 @api.route('/openapi.json')
+@cached_response
 def schema() -> dict:
     """ Serves the schema according to OpenAPI specifications """
     open_api = {
@@ -571,6 +588,7 @@ def schema() -> dict:
     return jsonify(open_api)
 
 @api.route('/schema/type/<dgraph_type>')
+@cached_response
 def get_dgraph_type(dgraph_type: str, new: bool = False, edit: bool = False) -> dict:
     """ 
         Get all predicates of given type alongside a description.
@@ -605,6 +623,7 @@ def get_dgraph_type(dgraph_type: str, new: bool = False, edit: bool = False) ->
 from meteor.api.responses import DGraphTypeDescription
 
 @api.route('/schema/types')
+@cached_response
 def list_dgraph_types() -> t.List[DGraphTypeDescription]:
     """ 
         List all public Dgraph Types alongside a description
@@ -622,6 +641,7 @@ def list_dgraph_types() -> t.List[DGraphTypeDescription]:
     
 
 @api.route('/schema/predicate/<predicate>')
+@cached_response
 def get_predicate(predicate: str, detailed: bool = False) -> t.TypedDict('Predicate', uid=str):
     """ 
         Get choices for given predicate. 
@@ -645,6 +665,7 @@ def get_predicate(predicate: str, detailed: bool = False) -> t.TypedDict('Predic
             - `entry_review_status`
             - `dgraph.type` 
     """
+    # exact predicate names only (no aliases or reverse predicates)
     try:
         predicate = Schema.predicates()[predicate]
     except KeyError:
@@ -655,18 +676,25 @@ def get_predicate(predicate: str, detailed: bool = False) -> t.TypedDict('Predic
     
     if 'uid' in predicate.dgraph_predicate_type:
         if predicate.autoload_choices:
+            # do not load choices into the shared predicate of the Schema
+            predicate = copy(predicate)
             predicate.get_choices()
         else:
             return jsonify({'warning': f'Available choices for <{predicate}> are not automatically loaded. Use the `lookup` endpoint instead.'})
 
         if detailed:
-            result = predicate.choices_dicts
-            for entry in result:
-                try:
-                    entry['dgraph.type'].remove('Entry')
-                except:
-                    pass
-            return jsonify(result)
+            # choices are shared with the choices cache, do not alter them
+            result = [{**entry, 'dgraph.type': [dt for dt in entry.get('dgraph.type', []) if dt != 'Entry']}
+                      for entry in predicate.choices_dicts]
+        else:
+            result = predicate.choices
+
+        # choices are loaded from the database: do not keep them in the schema cache,
+        # but clients can still revalidate their copy
+        response = jsonify(result)
+        response.cache_control.no_cache = True
+        response.add_etag()
+        return response.make_conditional(request)
 
     result = predicate.choices
 
@@ -674,7 +702,7 @@ def get_predicate(predicate: str, detailed: bool = False) -> t.TypedDict('Predic
     
 
 @api.route('/schema/predicate/counts/<predicate>')
-def get_predicate_counts(predicate: str) -> t.List[
+def get_predicate_counts(predicate: str, dgraph_type: str = None) -> t.List[
         t.TypedDict('Predicate', uid=str, _unique_name=str, name=str, entries=int, value=str)]:
     """ 
         Total number of entries for a predicate.
@@ -690,58 +718,29 @@ def get_predicate_counts(predicate: str) -> t.List[
         The return object has the following keys:
         `name` (for pretty printing), `value` (database value) and `entries` (total count of entries). 
 
+        Use the optional `dgraph_type` argument to only count entries of a specific type (e.g., `NewsSource`).
+
+        Counts are served from memory and revalidated with an `ETag`.
     """
     try:
-        predicate = Schema.get_queryable_predicates()[predicate]
+        queryable_predicate = Schema.get_queryable_predicates()[predicate]
     except KeyError:
         return api.abort(404)
 
-    if not hasattr(predicate, 'choices'):
-        return jsonify({'warning': f'Predicate <{predicate}> has no available choices'})
-
-    if 'uid' in predicate.dgraph_predicate_type:
-
-        query_predicates = [predicate.predicate]
+    if not hasattr(queryable_predicate, 'choices'):
+        return jsonify({'warning': f'Predicate <{queryable_predicate}> has no available choices'})
 
-        if predicate.predicate_alias:
-            query_predicates += predicate.predicate_alias
-
-        query_string = "{ "
-        query_vars = []
-        for i, p in enumerate(query_predicates):
-            query_string += f"var(func: has({p})) @groupby({p}) {{ v{i} as count(uid) }} "
-            query_vars.append(f'v{i}')
-
-        query_string += f"""q(func: uid({', '.join(query_vars)}), orderasc: name) {{ 
-            name _unique_name uid opted_scope dgraph.type
-            entries: math({' + '.join(query_vars)}) }} 
-            }}"""
-        
-        result = dgraph.query(query_string)['q']
-        for entry in result:
-            try:
-                entry['dgraph.type'].remove('Entry')
-            except:
-                pass
-    
-    else:
-        query_string = f""" {{
-            q(func: has({predicate.predicate})) @groupby({predicate.predicate}) {{ 
-                entries: count(uid) 
-                }} 
-            }}
-        """
-        
-        result = dgraph.query(query_string)['q'][0]["@groupby"]
-        for r in result:
-            r['value'] = r.pop(predicate.predicate)
-            r['name'] = predicate.choices[r['value']]
+    if dgraph_type:
+        dgraph_type = Schema.get_type(dgraph_type)
+        if dgraph_type is None:
+            return api.abort(404, message="Invalid DGraph type")
 
-    return jsonify(result)
+    counts = predicate_counts.get(predicate, queryable_predicate, dgraph_type=dgraph_type)
+    return counts.to_response(max_age=0)
 
 """ View Routes """
 
-@api.route('/view/recent')
+@api.route('/view/recent', cache=[ANY_ENTRY])
 def view_recent(limit: int = 5, dgraph_type: str = "Entry") -> t.List[Entry]:
     """ 
     
@@ -805,34 +804,36 @@ def view_random(limit: int = 5, dgraph_type: str = "Entry") -> t.List[Entry]:
                             }
                         }'''
     
-    count = dgraph.query(first_query, variables={'$type': dgraph_type})['q'][0]['count']
-
-    random_numbers = random.sample(range(1, count), limit)
-
-    query_string = 'query getRandom($type: string) {'
-    for i, num in enumerate(random_numbers):
-                    query_string += f'''var(func: type($type), first: 1, offset: {num}) 
-                            @filter(eq(entry_review_status, "accepted") AND has(_date_created)) {{
-                                random_{i} as uid
-                            }}
-                    '''
-    
-    query_string += "data(func: uid(" + ", ".join([f"random_{i}" for i in range(limit)]) + ')) '
-    query_string += """{
-                        uid
-                        _unique_name 
-                        name 
-                        dgraph.type 
-                        title
-                        _date_created
-                        channel { name }
-                        country { name }
-                        authors @facets(orderasc: sequence) { name uid _unique_name }
+    # count and offsets have to refer to the same state of the database
+    with dgraph.read_snapshot():
+        count = dgraph.query(first_query, variables={'$type': dgraph_type})['q'][0]['count']
+
+        random_numbers = random.sample(range(1, count), limit)
+
+        query_string = 'query getRandom($type: string) {'
+        for i, num in enumerate(random_numbers):
+                        query_string += f'''var(func: type($type), first: 1, offset: {num}) 
+                                @filter(eq(entry_review_status, "accepted") AND has(_date_created)) {{
+                                    random_{i} as uid
+                                }}
+                        '''
+    
+        query_string += "data(func: uid(" + ", ".join([f"random_{i}" for i in range(limit)]) + ')) '
+        query_string += """{
+                            uid
+                            _unique_name 
+                            name 
+                            dgraph.type 
+                            title
+                            _date_created
+                            channel { name }
+                            country { name }
+                            authors @facets(orderasc: sequence) { name uid _unique_name }
+                            }
                         }
-                    }
-                """
+                    """
 
-    result = dgraph.query(query_string, variables={'$type': dgraph_type})
+        result = dgraph.query(query_string, variables={'$type': dgraph_type})
 
     for entry in result['data']:
         if 'Entry' in entry['dgraph.type']:
@@ -840,7 +841,7 @@ def view_random(limit: int = 5, dgraph_type: str = "Entry") -> t.List[Entry]:
 
     return jsonify(result['data'])
 
-@api.route('/view/uid/<uid>', authentication=True, optional=True)
+@api.route('/view/uid/<uid>', authentication=True, optional=True, cache=True)
 def view_uid(uid: str) -> t.Union[Entry, PoliticalParty,
                                   Organization, JournalisticBrand, 
                                   NewsSource, Government, 
@@ -868,9 +869,9 @@ def view_uid(uid: str) -> t.Union[Entry, PoliticalParty,
     if not uid:
         return api.abort(404, message="Invalid UID")
 
-    try:
-        data = get_preview(uid=uid)
-    except InventoryDatabaseError:
+    # review status, `_added_by` and full entry in one request
+    data = load_entry(uid=uid)
+    if not data:
         return api.abort(404, message=f'The requested entry <{uid}> could not be found!')
 
     current_user = jwtx.current_user or AnonymousUser()
@@ -879,14 +880,11 @@ def view_uid(uid: str) -> t.Union[Entry, PoliticalParty,
             return api.abort(403, message="You do not have the permissions to view this entry.")
         else:
             return api.abort(401, message="You do not have the permissions to view this entry. Try to login?")
-    
-    data = get_entry(uid=uid)
 
     return jsonify(data)
 
 
-
-@api.route('/view/entry/<unique_name>', authentication=True, optional=True)
+@api.route('/view/entry/<unique_name>', authentication=True, optional=True, cache=True)
 def view_unique_name(unique_name: str) -> t.Union[Entry, PoliticalParty,
                                   Organization, JournalisticBrand, 
                                   NewsSource, Government, 
@@ -907,32 +905,23 @@ def view_unique_name(unique_name: str) -> t.Union[Entry, PoliticalParty,
                                   LearningMaterial]:
     """ detail view of a single entry by unique name (human readable ID) """
     
-    try:
-        data = get_preview(unique_name=unique_name)
-    except:
-        return api.abort(404, message=f'The requested entry with "_unique_name" <{unique_name}> could not be found!')
-
+    # review status, `_added_by` and full entry in one request
+    data = load_entry(unique_name=unique_name)
     if not data:
         return api.abort(404, message=f'The requested entry with "_unique_name" <{unique_name}> could not be found!')
     
     current_user = jwtx.current_user or AnonymousUser()
     if not can_view(data, current_user):
         if current_user.is_authenticated:
-            response = jsonify({
-                'status': 403,
-                'message': "You do not have the permissions to view this entry."})
-            response.status_code = 403
             return api.abort(403, message="You do not have the permissions to view this entry.")
         else:
             return api.abort(403, message="You do not have the permissions to view this entry. Try to login?")
-    
-    data = get_entry(uid=data['uid'])
 
     return jsonify(data)
 
 from meteor.api.responses import ReverseRelationships
 
-@api.route('/view/reverse/<uid>', authentication=True, optional=True)
+@api.route('/view/reverse/<uid>', authentication=True, optional=True, cache=[ANY_ENTRY])
 def view_reverse_relationships(uid: str) -> ReverseRelationships:
     """ 
         Get reverse (incoming) relationships for a given entry 
@@ -956,15 +945,19 @@ def view_reverse_relationships(uid: str) -> ReverseRelationships:
     if not uid:
         return api.abort(404)
     
-    dgraph_type = dgraph.get_dgraphtype(uid)
-    if not dgraph_type:
-        return api.abort(404)
-    if dgraph_type in ['Channel', 'Country', 'Multinational', 
-                       'Language', 'ProgrammingLanguage', 'TextType', 
-                       'Modality', 'Operation']:
-        return api.abort(400, f'Cannot perform this operation on dgraph.type <{dgraph_type}>. Try using the "/query" endpoint instead.')
+    # type lookup, permission check and relationships see the same state
+    with dgraph.read_snapshot():
+        dgraph_type = dgraph.get_dgraphtype(uid)
+        if not dgraph_type:
+            return api.abort(404)
+        if dgraph_type in ['Channel', 'Country', 'Multinational', 
+                           'Language', 'ProgrammingLanguage', 'TextType', 
+                           'Modality', 'Operation']:
+            return api.abort(400, f'Cannot perform this operation on dgraph.type <{dgraph_type}>. Try using the "/query" endpoint instead.')
+
+        # permission check and reverse relationships in one request
+        data, results = get_preview_and_reverse_relationships(uid, dgraph_type)
 
-    data = get_preview(uid=uid)
     if not data:
         return api.abort(404, message=f'The requested entry <{uid}> could not be found!')
 
@@ -978,11 +971,11 @@ def view_reverse_relationships(uid: str) -> ReverseRelationships:
             return api.abort(403, message="You do not have the permissions to view this entry.")
         else:
             return api.abort(403, message="You do not have the permissions to view this entry. Try to login?")
-    
-    results = get_reverse_relationships(uid)
 
     return jsonify(results)
 
+from meteor.api.ownership import ownership_graph
+
 @api.route('/view/ownership/<uid>')
 def view_ownership(uid: str) -> t.List[Entry]:
     """ get data for plotting ownership network """
@@ -990,6 +983,11 @@ def view_ownership(uid: str) -> t.List[Entry]:
     uid = validate_uid(uid)
     if not uid:
         return api.abort(404, message=f'Invalid UID <{uid}>')
+    if ownership_graph.enabled:
+        result = ownership_graph.ownership(uid)
+        if result is not None:
+            return jsonify(result)
+    # fallback: entry is not part of the ownership graph (e.g., not accepted yet)
     query_string = """query ownership($id: string) {
                         tmp(func: uid($id)) @recurse  {
                             u as uid owns publishes ~owns ~publishes                                     
@@ -1026,6 +1024,7 @@ def view_rejected(uid: str) -> Rejected:
     return jsonify(data)
 
 from meteor.api.view import get_similar
+from meteor.api.similarity import similarity_index, SIMILARITY_PREDICATES
 
 @api.route('/view/similar/<uid>')
 def view_similar(uid: str, max_results: int = 10) -> t.List[
@@ -1048,38 +1047,32 @@ def view_similar(uid: str, max_results: int = 10) -> t.List[
 
         Returns only "accepted" entries. max_results cannot exceed 50.
     """
-    dgraph_type = dgraph.get_dgraphtype(uid)
     if max_results > 50:
         max_results = 50
-    if dgraph_type in ['Dataset', 'Archive']:
-        return get_similar(uid, ["sources_included", "languages", "countries", "channels",
-                                 "text_types", "meta_variables", "concept_variables"],
-                           first=max_results)
-    elif dgraph_type == "ScientificPublication":
-        return get_similar(uid, ["methodologies", "concept_variables", "text_types",
-                                 "sources_included", "datasets_used", "countries", 
-                                 "languages"],
-                           first=max_results)
-    elif dgraph_type == 'Tool':
-        return get_similar(uid, ["used_for", "languages", "channels", "programming_languages"],
-                           first=max_results)
-    elif dgraph_type == 'Collection':
-        return get_similar(uid, ["entries_included", "languages", "countries", "tools",
-                                 "references", "materials", "concept_variables"],
-                           first=max_results)
-    elif dgraph_type == 'LearningMaterial':
-        return get_similar(uid, ["languages", "programming_languages", "channels", "tools",
-                                 "concept_variables", "methodologies", "datasets_used"],
-                           first=max_results)
 
-    else:
-        api.abort(501, "Cannot provide similar entries for this DGraph Type")
+    if similarity_index.enabled:
+        try:
+            result = similarity_index.similar(uid, first=max_results)
+        except ValueError as e:
+            return api.abort(404, message=f'{e}')
+        if result is None:
+            return api.abort(501, "Cannot provide similar entries for this DGraph Type")
+        return jsonify(result)
+
+    # fallback: compute similarity in DGraph
+    dgraph_type = dgraph.get_dgraphtype(uid)
+    if dgraph_type not in SIMILARITY_PREDICATES:
+        return api.abort(501, "Cannot provide similar entries for this DGraph Type")
+    return get_similar(uid, SIMILARITY_PREDICATES[dgraph_type], first=max_results)
 
 
 """ Query Routes """
 
 
-@api.route('/quicksearch')
+from meteor.api.search import search_index
+
+
+@api.route('/quicksearch', cache=[ANY_ENTRY])
 def quicksearch(term: str = None, limit: int = 10) -> t.List[Entry]:
     """ 
         perform text search in name fields of entries. 
@@ -1095,6 +1088,33 @@ def quicksearch(term: str = None, limit: int = 10) -> t.List[Entry]:
         limit = 50
     if limit < 1:
         limit = 1
+
+    if search_index.enabled:
+        uids = search_index.quicksearch(term, limit=limit)
+        if len(uids) == 0:
+            return jsonify([])
+        query_string = f'''{{
+            data(func: uid({', '.join(uids)})) 
+                @normalize @filter(eq(entry_review_status, "accepted")) {{
+                    uid 
+                    _unique_name: _unique_name 
+                    name: name 
+                    alternate_names: alternate_names
+                    type: dgraph.type 
+                    title: title
+                    channel {{ channel: _unique_name }}
+                    doi: doi
+                    arxiv: arxiv
+                }}
+            }}
+        '''
+        result = dgraph.query(query_string)
+        ranks = {uid: i for i, uid in enumerate(uids)}
+        result['data'].sort(key=lambda item: ranks[item['uid']])
+        for item in result['data']:
+            if 'Entry' in item['type']:
+                item['type'].remove('Entry')
+        return jsonify(result['data'])
     
     query_regex = f'/^{strip_query(term)}/i'
     query_string = f'''
@@ -1132,8 +1152,8 @@ def quicksearch(term: str = None, limit: int = 10) -> t.List[Entry]:
 
 
 # TODO: Add sorting parameter
-@api.route("/query")
-def query(_max_results: int = 25, _page: int = 1, _terms: str = None) -> t.List[Entry]:
+@api.route("/query", cache=[ANY_ENTRY])
+def query(_max_results: int = 25, _page: int = 1, _terms: str = None, _cursor: str = None, _explain: bool = False) -> t.List[Entry]:
     """ 
         Perform query based on dgraph query parameters.
 
@@ -1143,6 +1163,13 @@ def query(_max_results: int = 25, _page: int = 1, _terms: str = None) -> t.List[
         - `_max_results`: maximum entries per page (limit: 50)
         - `_page`: current page
         - `_terms`: free-text search (searches various text fields)
+        - `_cursor`: use cursor pagination instead of `_page`. Use `*` for the first page.
+            The response is then an object with the keys `result` (list of entries) 
+            and `next_cursor`. Pass `next_cursor` as `_cursor` to get the next page;
+            it is `null` on the last page. Cursors keep deep pages fast, use them for exports.
+            Entries are ordered by name, entries without a name follow at the end (ordered by UID).
+        - `_explain`: do not run the query, but return the query plan (root function, filters) 
+            and the generated DQL query string
 
         Default Behaviour for other query parameters:
 
@@ -1165,15 +1192,12 @@ def query(_max_results: int = 25, _page: int = 1, _terms: str = None) -> t.List[
     
     if len(r) > 0:
         try:
-            query_string = build_query_string(r)
+            if _explain:
+                return jsonify(build_query_string(r, explain=True))
+            query_string, variables = build_query_string(r, with_variables=True)
         except ValueError as e:
             return api.abort(400, message=f'{e}')  
           
-        search_terms = _terms
-        if search_terms is not None and search_terms.strip() != '':
-            variables = {'$searchTerms': search_terms.strip()}
-        else:
-            variables = None
         result = dgraph.query(query_string, variables=variables)
         result = result['q']
 
@@ -1187,13 +1211,19 @@ def query(_max_results: int = 25, _page: int = 1, _terms: str = None) -> t.List[
         except Exception as e:
             current_app.logger.error(f'Could not restore sequence. \nData: {result}.\nError: {e}')
 
+        if _cursor is not None:
+            # same limits as in `build_query_string`
+            max_results = _max_results if 0 <= _max_results <= 50 else 50
+            return jsonify({'result': result,
+                            'next_cursor': next_cursor(result, _cursor, max_results)})
+
         return jsonify(result)
     else:
         return api.abort(400)
 
 
-@api.route("/query/count")
-def query_count(_terms: str = None) -> int:
+@api.route("/query/count", cache=[ANY_ENTRY])
+def query_count(_terms: str = None, _explain: bool = False) -> int:
     """ get total number of hits for query """
 
     r = {k: v for k, v in request.args.to_dict(
@@ -1201,6 +1231,8 @@ def query_count(_terms: str = None) -> int:
     
     if len(r) > 0:
         try:
+            if _explain:
+                return jsonify(build_query_string(r, count=True, explain=True))
             query_string = build_query_string(r, count=True)
         except ValueError as e:
             return api.abort(400, message=f'{e}')  
@@ -1219,6 +1251,22 @@ def query_count(_terms: str = None) -> int:
 
 """ Lookup Routes """    
 
+LOOKUP_NAME_FETCH = ['uid', 
+                     '_unique_name', 
+                     'name@*',
+                     'name_abbrev',
+                     'name_abbrev@*',
+                     'title',
+                     'dgraph.type',
+                     'alternate_names',
+                     'affiliations',
+                     'countries { name uid _unique_name }',
+                     'country { name uid _unique_name }',
+                     'channel { name uid _unique_name }',
+                     'authors @facets(orderasc: sequence) { name uid _unique_name }',
+                     '_authors_fallback @facets(orderasc: sequence)']
+
+
 @api.route('/lookup')
 def lookup(query: str = None, predicate: str = None, dgraph_types: t.List[str] = ['Entry']) -> t.List[Entry]:
     """
@@ -1256,6 +1304,16 @@ def lookup(query: str = None, predicate: str = None, dgraph_types: t.List[str] =
     if any([Schema.is_private(t) for t in dgraph_types]):
         return api.abort(403, message='You cannot access this dgraph.type')
     
+    if predicate == 'name' and search_index.enabled:
+        uids = search_index.lookup(query, dgraph_types)
+        if len(uids) == 0:
+            return jsonify([])
+        data = dql.QueryBlock(dql.uid(", ".join(uids)),
+                              fetch=LOOKUP_NAME_FETCH,
+                              block_name="data")
+        result = dgraph.query(dql.DQLQuery('lookup', blocks=[data]))
+        return jsonify(result['data'])
+
     dgraph_types = [dql.type_(t) for t in dgraph_types]
     
     if predicate == 'name':
@@ -1284,20 +1342,7 @@ def lookup(query: str = None, predicate: str = None, dgraph_types: t.List[str] =
                                 block_name="field4 as var")
 
         data = dql.QueryBlock(dql.uid("field1, field2, field3, field4"),
-                            fetch=['uid', 
-                                   '_unique_name', 
-                                   'name@*',
-                                   'name_abbrev',
-                                   'name_abbrev@*',
-                                   'title',
-                                   'dgraph.type',
-                                   'alternate_names',
-                                   'affiliations',
-                                   'countries { name uid _unique_name }',
-                                   'country { name uid _unique_name }',
-                                   'channel { name uid _unique_name }',
-                                   'authors @facets(orderasc: sequence) { name uid _unique_name }',
-                                   '_authors_fallback @facets(orderasc: sequence)'],
+                            fetch=LOOKUP_NAME_FETCH,
                             block_name="data")
 
         dql_query = dql.DQLQuery('lookup', blocks=[field1, field2, field3, field4, data])
@@ -1382,7 +1427,7 @@ def duplicate_check(name: str = None, dgraph_type: str = None) -> t.List[Entry]:
     return jsonify(result['check'])
     
 from meteor.api.requests import EditablePredicates, PublicDgraphTypes
-from meteor.api.notifications import notify_new_type
+from meteor.api.notifications import notify_new_entry, follow_entity
 
 @api.route('/add/<dgraph_type>', methods=['POST'], authentication=True)
 def add_new_entry(dgraph_type: str, data: EditablePredicates, draft: bool = False) -> SuccessfulAPIOperation:
@@ -1486,12 +1531,24 @@ def add_new_entry(dgraph_type: str, data: EditablePredicates, draft: bool = Fals
                     'redirect': url_for('api.view_uid', uid=uid),
                     'uid': uid}
         
+        # New entries (and new related entries) change the available choices
+        choices_cache.invalidate(*Schema.resolve_inheritance(dgraph_type), 
+                                 *related_types(sanitizer.related_entries))
+        predicate_counts.invalidate(*Schema.resolve_inheritance(dgraph_type), 
+                                    *related_types(sanitizer.related_entries))
+        similarity_index.invalidate(uid)
+        search_index.invalidate(uid)
+        ownership_graph.invalidate(uid)
+        api_cache.invalidate(uid, *Schema.resolve_inheritance(dgraph_type),
+                             *related_types(sanitizer.related_entries),
+                             *collect_uids([sanitizer.entry, sanitizer.related_entries]))
+
+        # Side effects are executed after the response (see `meteor.jobs`)
         # Subscribe user to their new entry
-        jwtx.current_user.follow_entity(uid)
+        follow_entity.delay(jwtx.current_user.uid, uid)
 
         # Notify Reviewers about new Entry
-        notify_new_entity(uid, role=USER_ROLES.Reviewer)
-        notify_new_type(dgraph_type, uid, role=USER_ROLES.Reviewer)
+        notify_new_entry.delay(uid, dgraph_type, role=USER_ROLES.Reviewer)
         
         return jsonify(response)
     else:
@@ -1571,6 +1628,16 @@ def edit_uid(uid: str, data: EditablePredicates) -> SuccessfulAPIOperation:
             sanitizer.upsert_query, 
             del_nquads=sanitizer.delete_nquads, 
             set_nquads=sanitizer.set_nquads)
+        choices_cache.invalidate(*check['dgraph.type'], 
+                                 *related_types(sanitizer.related_entries))
+        predicate_counts.invalidate(*check['dgraph.type'], 
+                                    *related_types(sanitizer.related_entries))
+        similarity_index.invalidate(uid)
+        search_index.invalidate(uid)
+        ownership_graph.invalidate(uid)
+        api_cache.invalidate(uid, *check['dgraph.type'],
+                             *related_types(sanitizer.related_entries),
+                             *collect_uids([sanitizer.entry, sanitizer.related_entries]))
         return jsonify({'status': 'success',
                         'message': f'<{uid}> has been edited',
                         'uid': uid})
@@ -1591,6 +1658,10 @@ def delete_draft(uid: str) -> SuccessfulAPIOperation:
         return api.abort(403)
 
     draft_delete(check['uid'])
+    choices_cache.invalidate(*check['dgraph.type'])
+    predicate_counts.invalidate(*check['dgraph.type'])
+    search_index.invalidate(check['uid'])
+    api_cache.invalidate(check['uid'], *check['dgraph.type'])
 
     return jsonify({'status': 'success',
                     'message': 'Draft deleted!',
@@ -1600,7 +1671,7 @@ def delete_draft(uid: str) -> SuccessfulAPIOperation:
 
 from meteor.api import review
 from meteor.review.dgraph import accept_entry, reject_entry
-from meteor.api.notifications import send_review_notification, notify_new_entity
+from meteor.api.notifications import send_review_notification
 
 @api.route('/review', authentication=True)
 def overview(dgraph_type: str = None, 
@@ -1644,14 +1715,20 @@ def submit_review(uid: str,
             review.accept_entry(uid, jwtx.current_user)
 
             # Notify user who made new entry 
-            send_review_notification(uid, "accepted")
+            send_review_notification.delay(uid, "accepted")
             
-            # Notify Users about new entry for this dgraph type
+            # Notify Users who follow this dgraph type or 
+            # specific entities related to this new one
             dgraph_type = dgraph.get_dgraphtype(uid)
-            notify_new_type(dgraph_type, uid)
-
-            # Notify Users who follow specific entities related to this new one
-            notify_new_entity(uid)
+            notify_new_entry.delay(uid, dgraph_type)
+            if dgraph_type:
+                choices_cache.invalidate(*Schema.resolve_inheritance(dgraph_type))
+                predicate_counts.invalidate(*Schema.resolve_inheritance(dgraph_type))
+                api_cache.invalidate(*Schema.resolve_inheritance(dgraph_type))
+            similarity_index.invalidate(uid)
+            search_index.invalidate(uid)
+            ownership_graph.invalidate(uid)
+            api_cache.invalidate(uid)
 
             return jsonify({'status': 200,
                             'message': 'Entry has been accepted!',
@@ -1662,9 +1739,18 @@ def submit_review(uid: str,
     
     elif status == 'rejected':
         try:
+            dgraph_type = dgraph.get_dgraphtype(uid, clean=[])
             review.reject_entry(uid, jwtx.current_user)
+            if dgraph_type:
+                choices_cache.invalidate(*dgraph_type)
+                predicate_counts.invalidate(*dgraph_type)
+                api_cache.invalidate(*dgraph_type)
+            similarity_index.invalidate(uid)
+            search_index.invalidate(uid)
+            ownership_graph.invalidate(uid)
+            api_cache.invalidate(uid)
             # Notify user who made new entry 
-            send_review_notification(uid, "rejected")
+            send_review_notification.delay(uid, "rejected")
             
             return jsonify({'status': 200,
                             'message': 'Entry has been rejected!',
@@ -1678,7 +1764,7 @@ def submit_review(uid: str,
             review.mark_revise(uid, jwtx.current_user)
 
             # Notify user who made new entry 
-            send_review_notification(uid, "revise")
+            send_review_notification.delay(uid, "revise")
                 
             return jsonify({'status': 200,
                             'message': 'Entry marked as "revise"!',
@@ -1758,6 +1844,8 @@ def delete_comment(uid: str) -> SuccessfulAPIOperation:
 """ User Related """
 
 from meteor.api.responses import LoginToken, AccessToken
+from meteor.users.blocklist import revoke_token
+from meteor.users.cache import user_cache
 
 # @api.route('/user/login', methods=['POST'])
 # def login(email: str, password: str) -> LoginToken:
@@ -1864,12 +1952,7 @@ def logout() -> SuccessfulAPIOperation:
     """
 
     response = jsonify({"message": "logout successful"})
-    token = jwtx.get_jwt()
-    dgraph.mutation({'uid': '_:jwt', 
-                     'dgraph.type': '_JWT', 
-                     '_jti': token["jti"],
-                     '_token_type': token['type'], 
-                     '_revoked_timestamp': datetime.datetime.now().isoformat()})
+    revoke_token(jwtx.get_jwt())
     jwtx.unset_jwt_cookies(response)
     return response
 
@@ -2031,6 +2114,9 @@ def update_profile(data: UserProfile) -> SuccessfulAPIOperation:
     """
     try:
         jwtx.current_user.update_profile(data)
+        user_cache.invalidate(jwtx.current_user.id)
+        # display name is shown in `_added_by` of cached views
+        api_cache.invalidate(jwtx.current_user.id)
         return jsonify({'status': 200,
                         'message': 'Profile updated'})
     except Exception as e:
@@ -2060,14 +2146,10 @@ def delete_account() -> SuccessfulAPIOperation:
     dgraph.delete({'uid': jwtx.current_user.id,
                    'follows_entities': None,
                    'follows_types': None})
+    user_cache.invalidate(jwtx.current_user.id)
 
     response = jsonify({"message": "Account deleted"})
-    token = jwtx.get_jwt()
-    dgraph.mutation({'uid': '_:jwt', 
-                     'dgraph.type': '_JWT', 
-                     '_jti': token["jti"],
-                     '_token_type': token['type'], 
-                     '_revoked_timestamp': datetime.datetime.now().isoformat()})
+    revoke_token(jwtx.get_jwt())
     jwtx.unset_jwt_cookies(response)
 
     return response
@@ -2233,6 +2315,8 @@ def change_user(uid: str, role: int) -> SuccessfulAPIOperation:
 
     if not result:
         return api.abort(500, message="Could not update user")
+
+    user_cache.invalidate(editable_user['uid'])
     
     return jsonify({'status': 200,
                     'uid': uid,
@@ -2300,8 +2384,7 @@ def debug_dispatch_notification(uid: str) -> SuccessfulAPIOperation:
 """ External APIs """
 
 from meteor.add.external import (instagram, twitter, get_wikidata, telegram, vkontakte,
-                                         parse_meta, siterankdata, find_sitemaps, find_feeds,
-                                         build_url, cran)
+                                         probe_website, build_url, cran)
 
 from meteor.api.responses import PublicationLike
 
@@ -2476,14 +2559,11 @@ def fetch_telegram(handle: str) -> SocialMediaProfile:
 
 @api.route('/external/website', methods=['POST'])
 def resolve_website(url: str) -> SocialMediaProfile:
-    # first check if website exists
+    # first check if website exists, all other information is fetched concurrently
     result = {'alternate_names': []}
-    try:
-        parsing_result = parse_meta(url)
-        names = parsing_result['names']
-        urls = parsing_result['urls']
-    except:
-        api.abort(404, f"Could not resolve website! URL provided does not exist: {url}")
+    probe = probe_website(url)
+    names = probe['names']
+    urls = probe['urls']
 
     if urls == False:
         api.abort(404, f"Could not resolve website! URL provided does not exist: {url}")
@@ -2513,12 +2593,7 @@ def resolve_website(url: str) -> SocialMediaProfile:
     result['identifier'] = build_url(url)
 
     # siterank data
-    try:
-        daily_visitors = siterankdata(url)
-    except Exception as e:
-        current_app.logger.warning(
-            f'Could not fetch siterankdata for {url}! Exception: {e}')
-        daily_visitors = None
+    daily_visitors = probe['daily_visitors']
 
     if daily_visitors:
         result['audience_size'] = str(datetime.date.today())
@@ -2530,14 +2605,11 @@ def resolve_website(url: str) -> SocialMediaProfile:
     result['channel_feeds'] = []
     result['channel_feeds|kind'] = {}
     kinds = []
-    sitemaps = find_sitemaps(url)
-    for sitemap in sitemaps:
+    for sitemap in probe['sitemaps']:
         result['channel_feeds'].append(sitemap)
         kinds.append('sitemap')
 
-    feeds = find_feeds(url)
-
-    for feed in feeds:
+    for feed in probe['feeds']:
         result['channel_feeds'].append(feed)
         kinds.append('rss')
     
@@ -2553,7 +2625,8 @@ def resolve_doi(identifier: str, fresh: bool=False) -> PublicationLike:
         Automatically resolve meta data for a DOI.
 
         If the DOI is already listed in Meteor, it will return the UID for the provided DOI.
-        You can overwrite this behaviour by setting the `fresh` parameter to `true`
+        You can overwrite this behaviour by setting the `fresh` parameter to `true`,
+        which also skips cached responses of the external APIs.
 
         Meteor tries different APIs to find the best meta-information for a
         DOI. It also tries to resolve author unique IDs (ORCID). The route returns 
@@ -2567,7 +2640,8 @@ def resolve_doi(identifier: str, fresh: bool=False) -> PublicationLike:
         if uid:
             return jsonify({'uid': uid})
     try:
-        return jsonify(dgraph_resolve_doi(identifier))
+        with external_session.fresh(fresh):
+            return jsonify(dgraph_resolve_doi(identifier))
     except Exception as e:
         return api.abort(404, f'Could not resolve DOI <{identifier}>. Please verify that the DOI is correct. {e}')
 
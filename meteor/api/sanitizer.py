@@ -50,7 +50,7 @@ class Sanitizer:
         if not isinstance(dgraph_type, str):
             dgraph_type = dgraph_type.__name__
         self.dgraph_type = dgraph_type
-        self.fields = fields or Schema.get_predicates(dgraph_type)
+        self.fields = fields or dict(Schema.get_predicates(dgraph_type))
         if self.dgraph_type and fields is None:
             if Schema.get_reverse_predicates(dgraph_type):
                 self.fields.update(Schema.get_reverse_predicates(dgraph_type))
@@ -118,7 +118,7 @@ class Sanitizer:
 
         entry_review_status = check.get('entry_review_status')
 
-        edit_fields = fields or Schema.get_predicates(dgraph_type)
+        edit_fields = fields or dict(Schema.get_predicates(dgraph_type))
         if dgraph_type and fields is None:
             if Schema.get_reverse_predicates(dgraph_type):
                 edit_fields.update(Schema.get_reverse_predicates(dgraph_type))
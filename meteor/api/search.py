@@ -0,0 +1,232 @@
+"""
+    In-memory autocomplete index for `/quicksearch` and `/lookup`
+
+    Both routes search the names of entries with `regexp()`, which DGraph
+    evaluates by scanning trigram posting lists and then matching the regex
+    against every candidate. This index keeps the searchable fields of all
+    entries in each worker:
+
+    - term postings (`anyofterms` / `allofterms` on name, alternate_names, title)
+    - a sorted array of lowercase names and unique names (prefix search with `bisect`)
+    - trigram postings (substring search, verified against the text)
+    - exact values of identifiers (doi, arxiv)
+
+    DGraph is only used to hydrate the matched uids. The index is built on first
+    use and rebuilt in the background every `SEARCH_INDEX_MAX_AGE` seconds (default: 300),
+    which also picks up changes made by other workers. Mutating routes call
+    `search_index.invalidate()`, the entries are updated with the next search.
+    Set `SEARCH_INDEX = False` to query DGraph directly.
+"""
+
+import re
+import time
+import bisect
+import typing as t
+
+from flask import current_app
+
+from meteor import dgraph
+from meteor.flaskdgraph import Schema
+from meteor.api.index import InMemoryIndex
+
+TERM_FIELDS = ('name', 'alternate_names', 'title')
+PREFIX_FIELDS = ('name', '_unique_name')
+SUBSTRING_FIELDS = ('name', 'alternate_names', '_unique_name')
+EXACT_FIELDS = ('doi', 'arxiv')
+
+FETCH_FIELDS = "uid dgraph.type entry_review_status name alternate_names title _unique_name doi arxiv"
+
+_term_pattern = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> t.Set[str]:
+    """ Approximation of DGraph's term tokenizer """
+    return set(_term_pattern.findall(text.lower()))
+
+
+def trigrams(text: str) -> t.Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _values(entry: dict, field: str) -> t.List[str]:
+    value = entry.get(field)
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value]
+    return [str(value)]
+
+
+def _uid_key(uid: str) -> int:
+    return int(uid, 16)
+
+
+class SearchIndex(InMemoryIndex):
+
+    name = 'search index'
+    max_age_key = 'SEARCH_INDEX_MAX_AGE'
+    default_max_age = 300
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._clear()
+
+    def _clear(self) -> None:
+        # key = uid, value = fetched entry
+        self._entries = {}
+        # key = (field, token), value = set of uids
+        self._terms = {}
+        # sorted list of (lowercase text, uid)
+        self._prefixes = []
+        # key = trigram, value = set of uids
+        self._trigrams = {}
+        # key = (field, value), value = set of uids
+        self._exact = {}
+
+    @property
+    def enabled(self) -> bool:
+        return current_app.config.get('SEARCH_INDEX', True)
+
+    """
+        Maintaining the index
+    """
+
+    @staticmethod
+    def fetch(uids: t.List[str] = None) -> t.List[dict]:
+        if uids is None:
+            query_string = f"{{ q(func: has(_unique_name)) {{ {FETCH_FIELDS} }} }}"
+        else:
+            query_string = f"{{ q(func: uid({', '.join(uids)})) @filter(has(_unique_name)) {{ {FETCH_FIELDS} }} }}"
+        entries = dgraph.query(query_string)['q']
+        return [entry for entry in entries
+                if not any(Schema.is_private(dgraph_type) for dgraph_type in entry.get('dgraph.type', []))]
+
+    def _add(self, entry: dict, insort: bool = True) -> None:
+        """ With `insort=False` the prefixes have to be sorted afterwards """
+        uid = entry['uid']
+        self._entries[uid] = entry
+        for field in TERM_FIELDS:
+            for value in _values(entry, field):
+                for token in tokenize(value):
+                    self._terms.setdefault((field, token), set()).add(uid)
+        for field in PREFIX_FIELDS:
+            for value in _values(entry, field):
+                if insort:
+                    bisect.insort(self._prefixes, (value.lower(), uid))
+                else:
+                    self._prefixes.append((value.lower(), uid))
+        for field in SUBSTRING_FIELDS:
+            for value in _values(entry, field):
+                for trigram in trigrams(value.lower()):
+                    self._trigrams.setdefault(trigram, set()).add(uid)
+        for field in EXACT_FIELDS:
+            for value in _values(entry, field):
+                self._exact.setdefault((field, value), set()).add(uid)
+
+    def _remove(self, uid: str) -> None:
+        entry = self._entries.pop(uid, None)
+        if entry is None:
+            return
+        for field in TERM_FIELDS:
+            for value in _values(entry, field):
+                for token in tokenize(value):
+                    self._terms.get((field, token), set()).discard(uid)
+        for field in PREFIX_FIELDS:
+            for value in _values(entry, field):
+                i = bisect.bisect_left(self._prefixes, (value.lower(), uid))
+                if i < len(self._prefixes) and self._prefixes[i] == (value.lower(), uid):
+                    del self._prefixes[i]
+        for field in SUBSTRING_FIELDS:
+            for value in _values(entry, field):
+                for trigram in trigrams(value.lower()):
+                    self._trigrams.get(trigram, set()).discard(uid)
+        for field in EXACT_FIELDS:
+            for value in _values(entry, field):
+                self._exact.get((field, value), set()).discard(uid)
+
+    def _swap(self, entries: t.List[dict]) -> None:
+        self._clear()
+        for entry in entries:
+            self._add(entry, insort=False)
+        self._prefixes.sort()
+        self.built = time.time()
+
+    def _update(self, uids: t.Set[str], entries: t.List[dict]) -> None:
+        for uid in uids:
+            self._remove(uid)
+        for entry in entries:
+            self._add(entry)
+
+    """
+        Searching
+    """
+
+    def _prefix_matches(self, prefix: str) -> t.Set[str]:
+        i = bisect.bisect_left(self._prefixes, (prefix, ''))
+        matches = set()
+        while i < len(self._prefixes) and self._prefixes[i][0].startswith(prefix):
+            matches.add(self._prefixes[i][1])
+            i += 1
+        return matches
+
+    def _substring_matches(self, substring: str) -> t.Set[str]:
+        grams = trigrams(substring)
+        if grams:
+            candidates = set.intersection(*[self._trigrams.get(gram, set()) for gram in grams])
+        else:
+            candidates = self._entries.keys()
+        return {uid for uid in candidates
+                if any(substring in value.lower()
+                       for field in SUBSTRING_FIELDS
+                       for value in _values(self._entries[uid], field))}
+
+    def quicksearch(self, term: str, limit: int = 10) -> t.List[str]:
+        """
+            Accepted entries where any term matches name, alternate_names or title,
+            the DOI / arXiv ID is equal to `term`, or name / unique name starts with `term`.
+
+            Ranked by: exact matches, prefix matches, term matches. Returns up to `limit` uids.
+        """
+        self.ensure_ready()
+        with self._lock:
+            exact = set()
+            for field in EXACT_FIELDS:
+                exact |= self._exact.get((field, term), set())
+            prefix = term.lower()
+            prefixes = self._prefix_matches(prefix)
+            terms = set()
+            for field in TERM_FIELDS:
+                for token in tokenize(term):
+                    terms |= self._terms.get((field, token), set())
+
+            def rank(uid: str) -> tuple:
+                if uid in exact or prefix in [v.lower() for v in _values(self._entries[uid], 'name')]:
+                    tier = 0
+                elif uid in prefixes:
+                    tier = 1
+                else:
+                    tier = 2
+                return tier, _uid_key(uid)
+
+            matches = [uid for uid in exact | prefixes | terms
+                       if self._entries[uid].get('entry_review_status') == 'accepted']
+        return sorted(matches, key=rank)[:limit]
+
+    def lookup(self, query: str, dgraph_types: t.List[str]) -> t.List[str]:
+        """
+            Entries of any of `dgraph_types` where name, alternate_names or
+            unique name contains `query`, or title contains all terms of `query`
+        """
+        self.ensure_ready()
+        with self._lock:
+            matches = self._substring_matches(query.lower())
+            tokens = tokenize(query)
+            if tokens:
+                matches |= set.intersection(*[self._terms.get(('title', token), set()) for token in tokens])
+            dgraph_types = set(dgraph_types)
+            matches = [uid for uid in matches
+                       if not dgraph_types.isdisjoint(self._entries[uid].get('dgraph.type', []))]
+        return sorted(matches, key=_uid_key)
+
+
+search_index = SearchIndex()
@@ -0,0 +1,338 @@
+"""
+    Similarity index for `/view/similar/<uid>`
+
+    `get_similar` computes the Jaccard similarity in DQL and scans every
+    node that has one of the compared predicates on every request.
+    The index keeps the relationships of all accepted entries as sparse
+    matrices (one per predicate, stored column-wise) and computes the
+    similarity with NumPy:
+
+    - intersection: `bincount` over the posting lists of the requested features
+    - union: |features| + number of features of each entry - intersection
+
+    The index is built from DGraph on first use (or with `tools/similarity_index.py build`)
+    and persisted to `SIMILARITY_INDEX_PATH` (default: `similarity.npz` in the instance folder).
+    Edited or reviewed entries are marked with `invalidate()`; their rows are excluded and
+    their current relationships are fetched with the next request (overlay).
+    The index is rebuilt in the background after `SIMILARITY_INDEX_MAX_AGE` seconds (default: 1 day).
+
+    Without NumPy (or with `SIMILARITY_INDEX = False`) the route falls back to `get_similar`.
+"""
+
+import os
+import time
+import typing as t
+from logging import getLogger
+
+from flask import current_app
+
+logger = getLogger(__name__)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+    logger.warning('NumPy is not installed: similarity index is disabled, '
+                   '/view/similar falls back to the (slower) DQL query')
+
+from meteor import dgraph
+from meteor.api.index import InMemoryIndex
+from meteor.flaskdgraph.utils import validate_uid
+
+# predicates that are compared for each DGraph Type
+SIMILARITY_PREDICATES = {
+    'Dataset': ["sources_included", "languages", "countries", "channels",
+                "text_types", "meta_variables", "concept_variables"],
+    'Archive': ["sources_included", "languages", "countries", "channels",
+                "text_types", "meta_variables", "concept_variables"],
+    'ScientificPublication': ["methodologies", "concept_variables", "text_types",
+                              "sources_included", "datasets_used", "countries",
+                              "languages"],
+    'Tool': ["used_for", "languages", "channels", "programming_languages"],
+    'Collection': ["entries_included", "languages", "countries", "tools",
+                   "references", "materials", "concept_variables"],
+    'LearningMaterial': ["languages", "programming_languages", "channels", "tools",
+                         "concept_variables", "methodologies", "datasets_used"],
+}
+
+INDEXED_PREDICATES = sorted({p for predicates in SIMILARITY_PREDICATES.values() for p in predicates})
+
+# fields of similar entries, same as `get_similar`
+HYDRATE_FIELDS = """uid _unique_name name title dgraph.type entry_review_status
+                    countries { name uid _unique_name }
+                    country { name uid _unique_name }
+                    channel { name uid _unique_name }
+                    authors @facets(orderasc: sequence) { name uid _unique_name }
+                    _authors_fallback @facets"""
+
+
+class PredicateMatrix:
+
+    """
+        Sparse matrix (entries x features) of one predicate, stored column-wise:
+        the entries of feature `features[f]` are `rows[indptr[f]:indptr[f + 1]]`
+    """
+
+    __slots__ = "features", "indptr", "rows", "sizes"
+
+    def __init__(self, features: t.List[str], indptr, rows, sizes) -> None:
+        self.features = {feature: i for i, feature in enumerate(features)}
+        self.indptr = indptr
+        self.rows = rows
+        self.sizes = sizes
+
+    @classmethod
+    def from_entries(cls, entries: t.Dict[int, t.Iterable[str]], n_rows: int):
+        """ `entries`: key = row, value = features (uids) of the entry """
+        postings = {}
+        sizes = np.zeros(n_rows, dtype=np.int32)
+        for row, features in entries.items():
+            features = set(features)
+            sizes[row] = len(features)
+            for feature in features:
+                postings.setdefault(feature, []).append(row)
+        features = list(postings.keys())
+        indptr = np.zeros(len(features) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(postings[f]) for f in features])
+        rows = np.fromiter((row for f in features for row in postings[f]),
+                           dtype=np.int32, count=int(indptr[-1]))
+        return cls(features, indptr, rows, sizes)
+
+    def intersection(self, features: t.Iterable[str]):
+        """ Number of common features with each entry """
+        columns = [self.features[f] for f in features if f in self.features]
+        if not columns:
+            return np.zeros(len(self.sizes), dtype=np.int32)
+        rows = np.concatenate([self.rows[self.indptr[c]:self.indptr[c + 1]] for c in columns])
+        return np.bincount(rows, minlength=len(self.sizes))
+
+    def to_arrays(self, prefix: str) -> dict:
+        return {f'{prefix}features': np.array(list(self.features.keys()), dtype=str),
+                f'{prefix}indptr': self.indptr,
+                f'{prefix}rows': self.rows,
+                f'{prefix}sizes': self.sizes}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str):
+        return cls(arrays[f'{prefix}features'].tolist(),
+                   arrays[f'{prefix}indptr'],
+                   arrays[f'{prefix}rows'],
+                   arrays[f'{prefix}sizes'])
+
+
+def fetch_features(uids: t.List[str] = None) -> t.List[dict]:
+    """ Relationships of accepted entries (all or only `uids`) for all indexed predicates """
+    fields = " ".join(f"{p} {{ uid }}" for p in INDEXED_PREDICATES)
+    if uids is None:
+        has_predicate = " OR ".join(f"has({p})" for p in INDEXED_PREDICATES)
+        query_string = f"""{{ q(func: eq(entry_review_status, "accepted")) @filter({has_predicate}) {{
+                                uid {fields} }} }}"""
+    else:
+        query_string = f"""{{ q(func: uid({', '.join(uids)})) @filter(has(dgraph.type)) {{
+                                uid dgraph.type entry_review_status {fields} }} }}"""
+    return dgraph.query(query_string)['q']
+
+
+def _features(entry: dict, predicate: str) -> t.FrozenSet[str]:
+    values = entry.get(predicate) or []
+    if isinstance(values, dict):
+        values = [values]
+    return frozenset(v['uid'] for v in values)
+
+
+class SimilarityIndex(InMemoryIndex):
+
+    name = 'similarity index'
+    max_age_key = 'SIMILARITY_INDEX_MAX_AGE'
+    default_max_age = 86400
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.uids = None
+        self.rows = {}
+        self.matrices = {}
+        # rows that changed after the index was built
+        self._stale = None
+        # current features of changed entries, key = uid
+        self._overlay = {}
+
+    @property
+    def enabled(self) -> bool:
+        return np is not None and current_app.config.get('SIMILARITY_INDEX', True)
+
+    """
+        Build, save and load
+    """
+
+    @staticmethod
+    def path() -> str:
+        return current_app.config.get('SIMILARITY_INDEX_PATH',
+                                      os.path.join(current_app.instance_path, 'similarity.npz'))
+
+    def fetch(self, uids: t.List[str] = None) -> t.List[dict]:
+        return fetch_features(uids)
+
+    def _snapshot(self, entries: t.List[dict]) -> tuple:
+        uids = [entry['uid'] for entry in entries]
+        matrices = {}
+        for predicate in INDEXED_PREDICATES:
+            features = {row: _features(entry, predicate) for row, entry in enumerate(entries)}
+            matrices[predicate] = PredicateMatrix.from_entries(
+                {row: f for row, f in features.items() if f}, len(uids))
+        return np.array(uids, dtype=str), matrices, time.time()
+
+    def _build(self) -> None:
+        """ Build the index from DGraph and save it """
+        super()._build()
+        self.save()
+
+    def save(self) -> None:
+        arrays = {'uids': self.uids, 'built': np.array([self.built])}
+        for predicate, matrix in self.matrices.items():
+            arrays.update(matrix.to_arrays(f'{predicate}__'))
+        path = self.path()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp.npz'
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def _read(self) -> t.Union[tuple, None]:
+        try:
+            with np.load(self.path()) as arrays:
+                if not all(f'{p}__indptr' in arrays for p in INDEXED_PREDICATES):
+                    return None
+                matrices = {p: PredicateMatrix.from_arrays(arrays, f'{p}__') for p in INDEXED_PREDICATES}
+                return arrays['uids'], matrices, float(arrays['built'][0])
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def load(self) -> bool:
+        """ Load the index from disk, returns `False` if there is no index (for all predicates) """
+        return self._replace(self._read)
+
+    def _swap(self, snapshot: tuple) -> None:
+        uids, matrices, built = snapshot
+        self.uids = uids
+        self.rows = {uid: row for row, uid in enumerate(uids.tolist())}
+        self.matrices = matrices
+        self.built = built
+        self._stale = np.zeros(len(uids), dtype=bool)
+        # the saved index might be older than the changed entries
+        self._pending.update(self._overlay.keys())
+        self._overlay = {}
+
+    def _first_build(self) -> None:
+        if not self.load():
+            self._build()
+
+    def _background_build(self) -> None:
+        with self._build_lock:
+            # another worker might have rebuilt the index already
+            if not self.load() or time.time() - self.built > self.max_age():
+                self._build()
+
+    """
+        Incremental updates
+    """
+
+    def _update(self, uids: t.Set[str], entries: t.List[dict]) -> None:
+        entries = {entry['uid']: entry for entry in entries}
+        for uid in uids:
+            row = self.rows.get(uid)
+            if row is not None:
+                self._stale[row] = True
+            entry = entries.get(uid)
+            if entry and entry.get('entry_review_status') == 'accepted':
+                self._overlay[uid] = {p: _features(entry, p) for p in INDEXED_PREDICATES}
+            else:
+                self._overlay.pop(uid, None)
+
+    """
+        Similarity
+    """
+
+    def similar(self, uid: str, first: int = 10) -> t.Union[t.List[dict], None]:
+        """
+            Get the most similar accepted entries. Returns `None` if the
+            DGraph Type of the entry is not supported. Raises `ValueError` for unknown entries.
+        """
+        uid = validate_uid(uid)
+        if not uid:
+            raise ValueError('Invalid UID provided')
+        self.ensure_ready()
+
+        node = fetch_features([uid])
+        if len(node) == 0:
+            raise ValueError(f'Entry <{uid}> not found')
+        node = node[0]
+        dgraph_type = [dt for dt in node['dgraph.type'] if dt in SIMILARITY_PREDICATES]
+        if not dgraph_type:
+            return None
+        predicates = SIMILARITY_PREDICATES[dgraph_type[0]]
+
+        with self._lock:
+            uids, rows, matrices = self.uids, self.rows, self.matrices
+            stale = self._stale.copy()
+            overlay = dict(self._overlay)
+
+        # score entries in the index
+        total = np.zeros(len(uids), dtype=np.float64)
+        details = {}
+        for predicate in predicates:
+            features = _features(node, predicate)
+            if not features:
+                continue
+            matrix = matrices[predicate]
+            intersection = matrix.intersection(features)
+            intersection[stale] = 0
+            union = len(features) + matrix.sizes - intersection
+            similarity = np.divide(intersection, union, out=np.zeros(len(uids)), where=intersection > 0)
+            total += similarity
+            details[predicate] = (intersection, similarity)
+        if uid in rows:
+            total[rows[uid]] = 0
+
+        # fetch some more candidates, some might not be accepted anymore
+        k = min(first * 2, int(np.count_nonzero(total)))
+        candidates = []
+        if k > 0:
+            top = np.argpartition(-total, k - 1)[:k]
+            for row in top:
+                result = {'uid': str(uids[row]), 'aggregated_similarity': float(total[row])}
+                for predicate, (intersection, similarity) in details.items():
+                    if intersection[row] > 0:
+                        result[f'common_{predicate}'] = int(intersection[row])
+                        result[f'similarity_{predicate}'] = float(similarity[row])
+                candidates.append(result)
+
+        # score entries that changed since the index was built
+        for other_uid, other in overlay.items():
+            if other_uid == uid:
+                continue
+            result = {'uid': other_uid, 'aggregated_similarity': 0.0}
+            for predicate in predicates:
+                features = _features(node, predicate)
+                intersection = len(features & other[predicate])
+                if intersection > 0:
+                    similarity = intersection / (len(features) + len(other[predicate]) - intersection)
+                    result['aggregated_similarity'] += similarity
+                    result[f'common_{predicate}'] = intersection
+                    result[f'similarity_{predicate}'] = similarity
+            if result['aggregated_similarity'] > 0:
+                candidates.append(result)
+
+        candidates.sort(key=lambda c: c['aggregated_similarity'], reverse=True)
+        return self.hydrate(candidates[:first * 2])[:first]
+
+    @staticmethod
+    def hydrate(candidates: t.List[dict]) -> t.List[dict]:
+        """ Get the details of similar entries, keeps the order """
+        if not candidates:
+            return []
+        query_string = f"""{{ q(func: uid({', '.join(c['uid'] for c in candidates)}))
+                                @filter(eq(entry_review_status, "accepted")) {{ {HYDRATE_FIELDS} }} }}"""
+        entries = {entry['uid']: entry for entry in dgraph.query(query_string)['q']}
+        return [{**entries[c['uid']], **c} for c in candidates if c['uid'] in entries]
+
+
+similarity_index = SimilarityIndex()
@@ -14,6 +14,14 @@ logger = logging.getLogger(__name__)
     Inventory Detail View Functions
 """
 
+PREVIEW_QUERY = '''query get_entry($value: string) {
+                    entry(func: uid($value)) @filter(has(dgraph.type)) { 
+                        uid dgraph.type entry_review_status 
+                        _added_by { uid display_name }
+                    } 
+                }'''
+
+
 def get_preview(unique_name: str = None, uid: str = None) -> dict:
     """ 
         Get only most important predicates, used for checking permissions
@@ -27,15 +35,7 @@ def get_preview(unique_name: str = None, uid: str = None) -> dict:
 
     var = uid
 
-    query_string = '''query get_entry($value: string) {
-                        entry(func: uid($value)) @filter(has(dgraph.type)) { 
-                            uid dgraph.type entry_review_status 
-                            _added_by { uid display_name }
-                       } 
-                    }'''
-    
-
-    data = dgraph.query(query_string, variables={'$value': var})
+    data = dgraph.query(PREVIEW_QUERY, variables={'$value': var})
 
     if len(data['entry']) == 0:
         raise InventoryDatabaseError('Entry not found!')
@@ -43,88 +43,111 @@ def get_preview(unique_name: str = None, uid: str = None) -> dict:
     return data['entry'][0]
 
 
-def get_entry(unique_name: str = None, uid: str = None, dgraph_type: t.Union[str, Schema] = None) -> t.Union[dict, None]:
-    if unique_name:
-        uid = dgraph.get_uid("_unique_name", unique_name)
+# DGraph Types where the detail view shows the number of related entries
+COUNTED_TYPES = ['Channel', 'Country', 'Multinational', 'Subnational', 
+                 'TextType', 'Modality', 'Operation', 'Language', 'ProgrammingLanguage']
 
-    uid = validate_uid(uid)
-    if not uid:
-        return None
+ENTRY_FIELDS = """uid dgraph.type expand(_all_) { 
+                    uid _unique_name name title entry_review_status display_name 
+                    dgraph.type
+                    authors @facets(orderasc: sequence) { uid _unique_name name } 
+                    _authors_fallback @facets(orderasc: sequence) 
+                    channel { uid name _unique_name }
+                    country { uid name _unique_name iso_3166_1_2 opted_scope }
+                    countries { uid name _unique_name iso_3166_1_2 opted_scope }
+                    }"""
 
-    var = uid
 
-    if dgraph_type:
-        try:
-            dgraph_type = Schema.get_type(dgraph_type)
-        except TypeError:
-            dgraph_type = None
+def _counts_blocks() -> str:
+    """ 
+        One block per counted DGraph Type, only the block matching 
+        the type of the entry returns a result.
+    """
+    blocks = []
+    for dgraph_type in COUNTED_TYPES:
+        counts = [f'num_{dtype.lower()}: ~{predicate} @filter(eq(entry_review_status, "accepted") AND type({dtype})) {{ count(uid) }}'
+                  for predicate, dtype in Schema.get_reverse_relationships(dgraph_type) or []]
+        if counts:
+            blocks.append(f'counts_{dgraph_type.lower()}(func: uid(e)) @filter(type({dgraph_type})) {{ \n' + 
+                          '\n'.join(counts) + ' }')
+    return '\n'.join(blocks)
 
-    if not dgraph_type:
-        dgraph_type = dgraph.get_dgraphtype(uid)
 
-    query_string = '''query get_entry($value: string, $dtype: string) {
-        entry(func: uid($value)) @filter(type($dtype)) { 
-            uid dgraph.type expand(_all_) { 
-                            uid _unique_name name title entry_review_status display_name 
-                            dgraph.type
-                            authors @facets(orderasc: sequence) { uid _unique_name name } 
-                            _authors_fallback @facets(orderasc: sequence) 
-                            channel { uid name _unique_name }
-                            country { uid name _unique_name iso_3166_1_2 opted_scope }
-                            countries { uid name _unique_name iso_3166_1_2 opted_scope }
-                            }
-                        }
-                    }'''
+def load_entry(unique_name: str = None, uid: str = None) -> t.Union[dict, None]:
+    """
+        Get the full entry in a single request: review status, `_added_by`,
+        DGraph Type, all predicates, authors (in right order) and 
+        reverse counts (for the types in `COUNTED_TYPES`).
 
-    
-    data = dgraph.query(query_string, variables={'$value': var, '$dtype': dgraph_type})
+        The permission check (`can_view`) can be made on the result.
+    """
+    if unique_name:
+        root = 'eq(_unique_name, $value)'
+        var = unique_name
+    else:
+        uid = validate_uid(uid)
+        if not uid:
+            return None
+        root = 'uid($value)'
+        var = uid
+
+    query_string = f"""query get_entry($value: string) {{
+        e as var(func: {root}) @filter(has(dgraph.type))
+        entry(func: uid(e)) {{ {ENTRY_FIELDS} }}
+        authors(func: uid(e)) {{
+            uid dgraph.type
+            authors @facets(orderasc: sequence) {{ uid _unique_name name }}
+            }}
+        {_counts_blocks()}
+    }}"""
+
+    data = dgraph.query(query_string, variables={'$value': var})
 
     if len(data['entry']) == 0:
         return None
     
-    data = data['entry'][0]
+    entry = data['entry'][0]
 
-    recursive_restore_sequence(data)
-    # data = data['entry'][0]
+    # private types (users, files, notifications, ...) are never shown
+    if any(Schema.is_private(dgraph_type) for dgraph_type in entry.get('dgraph.type', [])):
+        return None
+
+    recursive_restore_sequence(entry)
     
-    # Get authors again, in right order
-    if 'authors' in data:
-        authors_query = """query getEntry($value: string) { 
-            q(func: uid($value)) { 
-                uid dgraph.type
-                authors @facets(orderasc: sequence) { uid _unique_name name  }
-                } 
-            }
-        """
-        authors = dgraph.query(authors_query, variables={'$value': var})
+    if 'authors' in entry:
         try:
-            data['authors'] = authors['q'][0]['authors']
+            entry['authors'] = data['authors'][0]['authors']
         except Exception as e:
             logger.debug(f'Could not append authors: {e}')
 
-    if dgraph_type in ['Channel', 'Country', 'Multinational', 'Subnational', 
-                       'TextType', 'Modality', 'Operation', 'Language', 'ProgrammingLanguage']:
-        query_string = 'query getCounts($uid: string) { q(func: uid($uid)) {\n'
-        for predicate, dtype in Schema.get_reverse_relationships(dgraph_type):
-            query_string += f'num_{dtype.lower()}: ~{predicate} @filter(eq(entry_review_status, "accepted") AND type({dtype})) {{ count(uid) }}\n'
-        query_string += '} }'
-        counts = dgraph.query(query_string, variables={'$uid': uid})
-        if len(counts['q']) > 0:
-            for k, v in counts['q'][0].items():
-                data[k] = v[0]['count']
+    for dgraph_type in COUNTED_TYPES:
+        counts = data.get(f'counts_{dgraph_type.lower()}')
+        if counts:
+            for k, v in counts[0].items():
+                entry[k] = v[0]['count']
+
+    return entry
+
+
+def get_entry(unique_name: str = None, uid: str = None, dgraph_type: t.Union[str, Schema] = None) -> t.Union[dict, None]:
+    if dgraph_type:
+        try:
+            dgraph_type = Schema.get_type(dgraph_type)
+        except TypeError:
+            dgraph_type = None
+
+    data = load_entry(unique_name=unique_name, uid=uid)
+    
+    if data and dgraph_type and dgraph_type not in data['dgraph.type']:
+        return None
    
     return data
 
 
-def get_reverse_relationships(uid: str) -> dict:
+def _reverse_relationships_query(dgraph_type: str) -> t.Tuple[str, dict]:
+    """ Query string for the reverse relationships and the empty result """
     query_var = 'query get_entry($value: string) { q(func: uid($value)) {'
     
-    uid = validate_uid(uid)
-    if not uid:
-        raise ValueError
-
-    dgraph_type = dgraph.get_dgraphtype(uid)
-    
     reverse_relationships = Schema.get_reverse_relationships(dgraph_type)
     query_relationships = []
     result = {}
@@ -143,9 +166,10 @@ def get_reverse_relationships(uid: str) -> dict:
 
     
     query_string = query_var + "\n".join(query_relationships) + ' } }'
+    return query_string, result
 
-    data = dgraph.query(query_string, variables={'$value': uid})
 
+def _restore_reverse_relationships(data: dict, result: dict) -> dict:
     if len(data['q']) == 0:
         return result
 
@@ -159,6 +183,43 @@ def get_reverse_relationships(uid: str) -> dict:
 
     return result
 
+
+def get_reverse_relationships(uid: str, dgraph_type: str = None) -> dict:
+    uid = validate_uid(uid)
+    if not uid:
+        raise ValueError
+
+    if not dgraph_type:
+        dgraph_type = dgraph.get_dgraphtype(uid)
+    
+    query_string, result = _reverse_relationships_query(dgraph_type)
+
+    data = dgraph.query(query_string, variables={'$value': uid})
+
+    return _restore_reverse_relationships(data, result)
+
+
+def get_preview_and_reverse_relationships(uid: str, dgraph_type: str) -> t.Tuple[t.Union[dict, None], dict]:
+    """
+        Preview (for checking permissions) and reverse relationships
+        of an entry in a single request. The preview is `None` if the entry
+        does not exist.
+    """
+    uid = validate_uid(uid)
+    if not uid:
+        raise ValueError
+
+    query_string, result = _reverse_relationships_query(dgraph_type)
+
+    with dgraph.batch() as batch:
+        preview = batch.add(PREVIEW_QUERY, variables={'$value': uid})
+        reverse = batch.add(query_string, variables={'$value': uid})
+
+    if len(preview.result['entry']) == 0:
+        return None, result
+
+    return preview.result['entry'][0], _restore_reverse_relationships(reverse.result, result)
+
 def get_rejected(uid):
     query_string = f'''{{ q(func: uid({uid})) @filter(type(Rejected)) 
                         {{ uid name _unique_name alternate_names 
@@ -269,7 +269,7 @@ def lookup_uid(uid):
 
         
 
-# cache this route
+# choices are cached, see `meteor.flaskdgraph.choices`
 @endpoint.route("/endpoint/new/fieldoptions")
 async def fieldoptions():
     data = await generate_fieldoptions()
@@ -0,0 +1,244 @@
+"""
+    Persistent cache for external metadata lookups
+
+    Responses of the external APIs (DOI providers, OpenAlex, ORCID, CRAN, WikiData)
+    are stored in a local SQLite file (`EXTERNAL_CACHE_PATH`, default: `external.sqlite`
+    in the instance folder), which is shared by all worker processes of the host.
+    `session.get()` uses the cache for every request:
+
+    - Responses are fresh for the TTL of their host (see `TTLS`), "not found"
+      responses for `NEGATIVE_TTL` seconds.
+    - Stale responses are revalidated with `If-None-Match` / `If-Modified-Since`
+      if the API sent an `ETag` / `Last-Modified` header. `304` responses only
+      extend the lifetime of the stored response.
+    - The file is bounded to `EXTERNAL_CACHE_MAX_SIZE` bytes (default: 256 MB),
+      least recently used responses are removed first.
+    - Inside `with session.fresh():` the cache is not read, but still updated
+      (e.g., `/api/external/doi` with `fresh=true`).
+    - With `EXTERNAL_CACHE_OFFLINE` only stored responses are used regardless of
+      their age, missing ones raise `requests.ConnectionError`. Point
+      `EXTERNAL_CACHE_PATH` to a recorded file to test the resolvers without network.
+
+    The cache is disabled with `EXTERNAL_CACHE = False` (default when `TESTING`)
+    and outside of the app (e.g., scripts) unless `configure()` is called.
+"""
+
+import os
+import json
+import time
+import zlib
+import sqlite3
+import hashlib
+import threading
+import typing as t
+from contextlib import contextmanager
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DAY = 24 * 60 * 60
+
+# seconds until a stored response has to be revalidated, per host
+TTLS = {
+    "api.crossref.org": 30 * DAY,
+    "api.datacite.org": 30 * DAY,
+    "api.japanlinkcenter.org": 30 * DAY,
+    "doi.org": 30 * DAY,
+    "zenodo.org": 7 * DAY,
+    "api.openalex.org": 7 * DAY,
+    "www.wikidata.org": 7 * DAY,
+    "pub.orcid.org": DAY,
+    "crandb.r-pkg.org": DAY,
+}
+DEFAULT_TTL = DAY
+# "not found" is cached shortly: hedged DOI resolution asks every provider
+NEGATIVE_TTL = 60 * 60
+CACHEABLE_STATUS = {200: None, 404: NEGATIVE_TTL, 410: NEGATIVE_TTL}
+
+MAX_SIZE = 256 * 1024 * 1024
+PRUNE_INTERVAL = 100
+
+# request headers that change the representation
+VARY_HEADERS = ("Accept",)
+# response headers that do not apply to the stored (decoded) body
+DROP_HEADERS = ("Content-Encoding", "Content-Length", "Transfer-Encoding", "Connection")
+
+
+def cache_key(url: str, headers: dict = None) -> str:
+    """`url` has to include the query string (`PreparedRequest.url`)"""
+    headers = CaseInsensitiveDict(headers or {})
+    vary = [f"{h}: {headers.get(h, '')}" for h in VARY_HEADERS]
+    return hashlib.sha256("\n".join(["GET", url] + vary).encode()).hexdigest()
+
+
+def lifetime(host: str, status: int) -> int:
+    """Seconds until a response of `host` has to be revalidated"""
+    return CACHEABLE_STATUS.get(status) or TTLS.get(host, DEFAULT_TTL)
+
+
+def cacheable(response: requests.Response) -> bool:
+    cache_control = response.headers.get("Cache-Control", "").lower()
+    return response.status_code in CACHEABLE_STATUS and "no-store" not in cache_control
+
+
+class CachedResponse(t.NamedTuple):
+    status: int
+    reason: str
+    url: str
+    headers: CaseInsensitiveDict
+    content: bytes
+    expires: float
+
+    @property
+    def stale(self) -> bool:
+        return time.time() >= self.expires
+
+    def validators(self) -> dict:
+        """Headers for a conditional request"""
+        headers = {}
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def response(self) -> requests.Response:
+        r = requests.Response()
+        r.status_code = self.status
+        r.reason = self.reason
+        r.url = self.url
+        r.headers = CaseInsensitiveDict(self.headers)
+        r.encoding = requests.utils.get_encoding_from_headers(r.headers)
+        r._content = self.content
+        r.from_cache = True
+        return r
+
+
+class ExternalCache:
+    def __init__(self, path: str = None) -> None:
+        self.path = None
+        self.max_size = MAX_SIZE
+        self.offline = False
+        self._writes = 0
+        self._lock = threading.Lock()
+        if path is not None:
+            self.configure(path)
+
+    def init_app(self, app) -> None:
+        app.config.setdefault("EXTERNAL_CACHE", not app.config.get("TESTING", False))
+        app.config.setdefault(
+            "EXTERNAL_CACHE_PATH", os.path.join(app.instance_path, "external.sqlite")
+        )
+        app.config.setdefault("EXTERNAL_CACHE_MAX_SIZE", MAX_SIZE)
+        app.config.setdefault("EXTERNAL_CACHE_OFFLINE", False)
+        # the cache is used from worker threads without app context,
+        # so the settings are copied here
+        offline = app.config["EXTERNAL_CACHE_OFFLINE"]
+        if app.config["EXTERNAL_CACHE"] or offline:
+            self.configure(
+                app.config["EXTERNAL_CACHE_PATH"],
+                max_size=app.config["EXTERNAL_CACHE_MAX_SIZE"],
+                offline=offline,
+            )
+        else:
+            self.path = None
+
+    def configure(self, path: str, max_size: int = MAX_SIZE, offline: bool = False) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_size = max_size
+        self.offline = offline
+        with self._store() as conn:
+            conn.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                key TEXT PRIMARY KEY,
+                                status INTEGER NOT NULL,
+                                reason TEXT,
+                                url TEXT NOT NULL,
+                                headers TEXT NOT NULL,
+                                content BLOB NOT NULL,
+                                size INTEGER NOT NULL,
+                                expires REAL NOT NULL,
+                                accessed REAL NOT NULL)""")
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    @contextmanager
+    def _store(self) -> t.Iterator[sqlite3.Connection]:
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> t.Union[CachedResponse, None]:
+        """Stored response (fresh or stale)"""
+        with self._store() as conn:
+            row = conn.execute(
+                """SELECT status, reason, url, headers, content, expires
+                   FROM responses WHERE key = ?""",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (time.time(), key))
+        status, reason, url, headers, content, expires = row
+        return CachedResponse(
+            status, reason, url, CaseInsensitiveDict(json.loads(headers)),
+            zlib.decompress(content), expires,
+        )
+
+    def set(self, key: str, response: requests.Response, ttl: int) -> None:
+        headers = {
+            k: v for k, v in response.headers.items() if k.title() not in DROP_HEADERS
+        }
+        content = zlib.compress(response.content)
+        now = time.time()
+        with self._store() as conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO responses
+                   (key, status, reason, url, headers, content, size, expires, accessed)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (key, response.status_code, response.reason, response.url,
+                 json.dumps(headers), content, len(content), now + ttl, now),
+            )
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % PRUNE_INTERVAL == 0
+            if prune:
+                self._prune(conn)
+
+    def touch(self, key: str, ttl: int) -> None:
+        """The stored response was revalidated (`304 Not Modified`)"""
+        now = time.time()
+        with self._store() as conn:
+            conn.execute(
+                "UPDATE responses SET expires = ?, accessed = ? WHERE key = ?",
+                (now + ttl, now, key),
+            )
+
+    def _prune(self, conn: sqlite3.Connection) -> None:
+        """Remove least recently used responses until the cache fits into `max_size`"""
+        conn.execute(
+            """DELETE FROM responses WHERE key IN (
+                   SELECT key FROM (
+                       SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS total
+                       FROM responses)
+                   WHERE total > ?)""",
+            (self.max_size,),
+        )
+
+    def size(self) -> int:
+        with self._store() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._store() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+cache = ExternalCache()
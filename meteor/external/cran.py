@@ -1,6 +1,8 @@
 import requests
 import re
 
+from meteor.external import session
+
 import typing
 
 GITHUB_REGEX = re.compile(r"https?://github\.com/(.*)")
@@ -50,7 +52,7 @@ def cran(pkg) -> dict:
 
     api = 'https://crandb.r-pkg.org/'
 
-    r = requests.get(api + pkg)
+    r = session.get(api + pkg)
 
     r.raise_for_status()
 
@@ -7,29 +7,43 @@ def dgraph_resolve_doi(doi: str) -> dict:
     authors_tmp = publication.pop('_authors_tmp')
     authors = resolve_authors(authors_tmp)
 
-    query = dql.DQLQuery(func=dql.type_('Author'), query_filter=[
-        dql.eq(openalex=dql.GraphQLVariable(openalex='openalex')),
-        dql.eq(orcid=dql.GraphQLVariable(orcid='orcid'))], 
-        filter_connector='OR',
-        fetch=['uid', 'orcid', 'openalex']
-        )
+    # match all authors against DGraph in one query
+    orcids = sorted({author['orcid'] for author in authors if author.get('orcid')})
+    openalex_ids = sorted({openalex_id for author in authors 
+                           for openalex_id in author.get('openalex', [])})
+    
+    blocks = []
+    if orcids:
+        blocks.append(dql.QueryBlock(
+            dql.eq('orcid', [dql.GraphQLVariable(**{f'orcid{i}': v}) for i, v in enumerate(orcids)]),
+            query_filter=dql.type_('Author'),
+            fetch=['uid', 'orcid'],
+            block_name='orcid'))
+    if openalex_ids:
+        blocks.append(dql.QueryBlock(
+            dql.eq('openalex', [dql.GraphQLVariable(**{f'openalex{i}': v}) for i, v in enumerate(openalex_ids)]),
+            query_filter=dql.type_('Author'),
+            fetch=['uid', 'openalex'],
+            block_name='openalex'))
+
+    by_orcid, by_openalex = {}, {}
+    if blocks:
+        res = dgraph.query(dql.DQLQuery('authors', blocks=blocks))
+        for author in res.get('orcid', []):
+            by_orcid.setdefault(author['orcid'], author['uid'])
+        for author in res.get('openalex', []):
+            openalex_ids = author['openalex']
+            if not isinstance(openalex_ids, list):
+                openalex_ids = [openalex_ids]
+            for openalex_id in openalex_ids:
+                by_openalex.setdefault(openalex_id, author['uid'])
 
     for author in authors:
-        query.set_graphql_variables(orcid=author.get('orcid', 'None'))
-        if 'openalex' in author:
-            assert type(author['openalex']) == list, doi
-            openalex = ", ".join(author['openalex'])
-            openalex = f'"[{openalex}]"'
-            query.set_graphql_variables(openalex=openalex)
-        else:
-            query.set_graphql_variables(openalex='None')
-        res = dgraph.query(query)
-        if len(res['q']) > 0:
-            author['uid'] = res['q'][0]['uid']
+        candidates = [by_orcid.get(author.get('orcid'))]
+        candidates += [by_openalex.get(openalex_id) for openalex_id in author.get('openalex', [])]
+        candidates = [uid for uid in candidates if uid]
+        if candidates:
+            author['uid'] = candidates[0]
     
     publication['authors'] = authors
     return publication
-    
-
-
-
@@ -1,8 +1,13 @@
 import requests
 import typing
+import copy
 from dateutil import parser as dateparser
 import datetime
+import time
+import threading
 import lxml.html
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from meteor.external import session
 from meteor.external.openalex import OpenAlex
 from meteor.external.orcid import ORCID
 import logging
@@ -12,6 +17,16 @@ logger = logging.getLogger(__name__)
 
 ARXIV_PREFIX = "10.48550/arxiv."
 
+# seconds to wait for a provider to connect / send data
+PROVIDER_TIMEOUT = 10
+# seconds until the next provider is asked, while the previous ones are still pending
+HEDGE_DELAY = 1.0
+# consecutive failures until a provider is skipped for `BREAKER_COOLDOWN` seconds
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 60
+# authors that are resolved at the same time
+AUTHOR_CONCURRENCY = 8
+
 
 class Publication(typing.TypedDict):
     doi: str
@@ -56,7 +71,7 @@ def clean_orcid(orcid: str) -> str:
 def crossref(doi: str) -> dict:
     api = "https://api.crossref.org/works/"
 
-    r = requests.get(api + doi)
+    r = session.get(api + doi, timeout=PROVIDER_TIMEOUT)
     r.raise_for_status()
 
     publication = r.json()
@@ -137,7 +152,7 @@ def doi_org(doi: str) -> dict:
 
     headers = {"Accept": "application/vnd.citationstyles.csl+json"}
 
-    r = requests.get(api + doi, headers=headers)
+    r = session.get(api + doi, headers=headers, timeout=PROVIDER_TIMEOUT)
 
     r.raise_for_status()
 
@@ -191,7 +206,9 @@ def doi_org(doi: str) -> dict:
 def datacite(doi: str) -> dict:
     api = "https://api.datacite.org/dois/"
 
-    r = requests.get(api + doi, params={"affiliation": "true"})
+    r = session.get(
+        api + doi, params={"affiliation": "true"}, timeout=PROVIDER_TIMEOUT
+    )
 
     r.raise_for_status()
 
@@ -259,7 +276,7 @@ def zenodo(doi: str) -> dict:
 
     record = doi.split(".")[-1]
 
-    r = requests.get(api + record)
+    r = session.get(api + record, timeout=PROVIDER_TIMEOUT)
 
     r.raise_for_status()
 
@@ -327,7 +344,7 @@ def jalc(doi: str) -> dict:
 
     headers = {"Accept": "application/json"}
 
-    r = requests.get(api + doi, headers=headers)
+    r = session.get(api + doi, headers=headers, timeout=PROVIDER_TIMEOUT)
 
     r.raise_for_status()
 
@@ -390,6 +407,130 @@ def jalc(doi: str) -> dict:
     return result
 
 
+class CircuitBreaker:
+    """
+    Skips a provider after `threshold` consecutive failures (timeouts,
+    connection errors, server errors) for `cooldown` seconds.
+    Other errors (e.g., DOI not found) do not count as failures.
+    """
+
+    def __init__(
+        self, threshold: int = BREAKER_THRESHOLD, cooldown: int = BREAKER_COOLDOWN
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_until = 0.0
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.opened_until
+
+    def success(self) -> None:
+        with self._lock:
+            self.failures = 0
+
+    def failure(self, error: Exception) -> None:
+        unavailable = isinstance(error, (requests.ConnectionError, requests.Timeout)) or (
+            isinstance(error, requests.HTTPError)
+            and error.response is not None
+            and error.response.status_code >= 500
+        )
+        if not unavailable:
+            self.success()
+            return
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_until = time.monotonic() + self.cooldown
+                self.failures = 0
+
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="resolve_doi")
+_breakers = {}
+
+
+def _breaker(name: str) -> CircuitBreaker:
+    return _breakers.setdefault(name, CircuitBreaker())
+
+
+def _call(name: str, service: typing.Callable, doi: str) -> dict:
+    breaker = _breaker(name)
+    try:
+        result = service(doi)
+    except Exception as e:
+        breaker.failure(e)
+        raise
+    breaker.success()
+    return result
+
+
+def resolve_hedged(
+    doi: str,
+    services: typing.Sequence[typing.Tuple[str, typing.Callable]],
+    hedge_delay: float = HEDGE_DELAY,
+) -> dict:
+    """
+    Ask a list of providers `[(name, function)]` in priority order, but do not wait
+    for a slow provider: every `hedge_delay` seconds (or as soon as a provider fails)
+    the next one is started in a thread pool.
+
+    Returns the result of the first provider (in priority order) that succeeds,
+    i.e., the same result as trying them one after another. Pending providers
+    are cancelled. Providers with an open circuit breaker are skipped.
+    """
+    futures = [None] * len(services)
+    launched = 0
+    last_launch = 0.0
+    best = 0
+
+    def launch(i: int) -> None:
+        name, service = services[i]
+        if _breaker(name).available():
+            futures[i] = _executor.submit(session.bind(_call), name, service, doi)
+        else:
+            logger.debug(f"Skipping {name}: too many failures")
+
+    try:
+        while True:
+            # skip providers that failed or were skipped
+            while best < launched and (
+                futures[best] is None
+                or (futures[best].done() and futures[best].exception() is not None)
+            ):
+                if futures[best] is not None:
+                    logger.debug(
+                        f"Could not resolve <{doi}> with {services[best][0]}: "
+                        f"{futures[best].exception()}"
+                    )
+                best += 1
+            if best == len(services):
+                break
+            if best < launched and futures[best].done():
+                return futures[best].result()
+
+            now = time.monotonic()
+            if launched < len(services) and (
+                launched <= best or now - last_launch >= hedge_delay
+            ):
+                launch(launched)
+                launched += 1
+                last_launch = now
+                continue
+
+            pending = [f for f in futures[best:launched] if f is not None and not f.done()]
+            timeout = None
+            if launched < len(services):
+                timeout = max(hedge_delay - (now - last_launch), 0)
+            wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+    finally:
+        for future in futures:
+            if future is not None:
+                future.cancel()
+
+    raise requests.HTTPError(f"Could not resolve DOI: <{doi}> at all.")
+
+
 def resolve_doi(doi: str) -> dict:
     """
     query a series of APIs and return clean data
@@ -400,6 +541,9 @@ def resolve_doi(doi: str) -> dict:
     4. JaLC
     5. DOI.org (has least useful metainfo)
 
+    The APIs are queried concurrently (see `resolve_hedged`),
+    the result is the one of the first API in this order that succeeds.
+
     - Zenodo DOIs are handled by zenodo directly
     """
     doi = clean_doi(doi)
@@ -413,15 +557,15 @@ def resolve_doi(doi: str) -> dict:
 
     openalex = OpenAlex()
 
-    services = (openalex.resolve_doi, crossref, datacite, jalc, doi_org)
+    services = (
+        ("openalex", openalex.resolve_doi),
+        ("crossref", crossref),
+        ("datacite", datacite),
+        ("jalc", jalc),
+        ("doi_org", doi_org),
+    )
 
-    for service in services:
-        try:
-            return service(doi)
-        except:
-            logger.debug(f"Could not resolve <{doi}> with {service.__name__}")
-
-    raise requests.HTTPError(f"Could not resolve DOI: <{doi}> at all.")
+    return resolve_hedged(doi, services)
 
 
 def get_author_affiliations(author: dict, orcid_token: str = None) -> typing.List[str]:
@@ -454,6 +598,72 @@ def get_author_affiliations(author: dict, orcid_token: str = None) -> typing.Lis
     return list(set(affiliations))
 
 
+def _enrich_author(
+    author: dict, openalex: OpenAlex, orcid: ORCID, orcid_token: str = None
+) -> dict:
+    """
+    Add ORCID, OpenAlex ID and affiliations to a single author (in place)
+    If a lookup fails (network error, malformed response), the author is kept unchanged
+    """
+    enriched = copy.deepcopy(author)
+    try:
+        _resolve_author(enriched, openalex, orcid, orcid_token=orcid_token)
+    except (requests.RequestException, ValueError) as e:
+        logger.debug(f"Could not enrich author {author.get('name')}: {e}")
+        return author
+    author.clear()
+    author.update(enriched)
+    return author
+
+
+def _resolve_author(
+    author: dict, openalex: OpenAlex, orcid: ORCID, orcid_token: str = None
+) -> dict:
+    if "orcid" in author:
+        orcid_id = clean_orcid(author["orcid"])
+        author["orcid"] = orcid_id
+        try:
+            openalex_id = openalex.get_author_by_orcid(orcid_id)["id"].replace(
+                "https://openalex.org/", ""
+            )
+            try:
+                author["openalex"].append(openalex_id)
+            except:
+                author["openalex"] = [openalex_id]
+        except requests.HTTPError:
+            pass
+    else:
+        try:
+            orcid_details = orcid.resolve_author(
+                name=author.get("name"),
+                family_name=author.get("family_name"),
+                given_name=author.get("given_name"),
+                affiliation=author.get("affiliations"),
+            )
+            if orcid_details:
+                author["orcid"] = orcid_details["orcid-id"]
+                try:
+                    openalex_id = openalex.get_author_by_orcid(
+                        orcid_details["orcid-id"]
+                    )["id"].replace("https://openalex.org/", "")
+                    try:
+                        author["openalex"].append(openalex_id)
+                    except:
+                        author["openalex"] = [openalex_id]
+                except requests.HTTPError:
+                    pass
+        except requests.HTTPError:
+            pass
+
+    if not "affiliations" in author:
+        author["affiliations"] = get_author_affiliations(
+            author, orcid_token=orcid_token
+        )
+    if author["affiliations"] is None or None in author["affiliations"]:
+        _ = author.pop("affiliations")
+    return author
+
+
 def resolve_authors(
     authors_tmp: typing.List[dict], orcid_token: str = None
 ) -> typing.List[dict]:
@@ -462,50 +672,23 @@ def resolve_authors(
     1. Check if there is an ORCID ID provided and try to get OpenAlex ID
     2. Try to query ORCID API to find author candidates
         Only adds ORCID ID to cases that are very sure
+
+    Up to `AUTHOR_CONCURRENCY` authors are resolved at the same time,
+    the order of authors is preserved.
     """
     openalex = OpenAlex()
     orcid = ORCID(token=orcid_token)
-    for author in authors_tmp:
-        if "orcid" in author:
-            orcid_id = clean_orcid(author["orcid"])
-            author["orcid"] = orcid_id
-            try:
-                openalex_id = openalex.get_author_by_orcid(orcid_id)["id"].replace(
-                    "https://openalex.org/", ""
-                )
-                try:
-                    author["openalex"].append(openalex_id)
-                except:
-                    author["openalex"] = [openalex_id]
-            except requests.HTTPError:
-                pass
-        else:
-            try:
-                orcid_details = orcid.resolve_author(
-                    name=author.get("name"),
-                    family_name=author.get("family_name"),
-                    given_name=author.get("given_name"),
-                    affiliation=author.get("affiliations"),
-                )
-                if orcid_details:
-                    author["orcid"] = orcid_details["orcid-id"]
-                    try:
-                        openalex_id = openalex.get_author_by_orcid(
-                            orcid_details["orcid-id"]
-                        )["id"].replace("https://openalex.org/", "")
-                        try:
-                            author["openalex"].append(openalex_id)
-                        except:
-                            author["openalex"] = [openalex_id]
-                    except requests.HTTPError:
-                        pass
-            except requests.HTTPError:
-                pass
-
-        if not "affiliations" in author:
-            author["affiliations"] = get_author_affiliations(
-                author, orcid_token=orcid_token
+    # worker threads have no app context, pass the token from the config explicitly
+    orcid_token = orcid.headers.get("Access token")
+    with ThreadPoolExecutor(
+        max_workers=AUTHOR_CONCURRENCY, thread_name_prefix="resolve_authors"
+    ) as pool:
+        list(
+            pool.map(
+                session.bind(
+                    lambda author: _enrich_author(author, openalex, orcid, orcid_token)
+                ),
+                authors_tmp,
             )
-        if author["affiliations"] is None or None in author["affiliations"]:
-            _ = author.pop("affiliations")
+        )
     return authors_tmp
@@ -1,17 +1,21 @@
 import typing
-import requests
 from thefuzz import fuzz
 
+from meteor.external import session
+
 
 class OpenAlex:
     api = "https://api.openalex.org/"
     params = {"mailto": "info@opted.eu"}
+    timeout = 10
 
     def __init__(self) -> None:
         pass
 
     def resolve_doi(self, doi: str) -> dict:
-        r = requests.get(self.api + "works/doi:" + doi, params=self.params)
+        r = session.get(
+            self.api + "works/doi:" + doi, params=self.params, timeout=self.timeout
+        )
         r.raise_for_status()
         j = r.json()
 
@@ -68,7 +72,7 @@ class OpenAlex:
 
     def get_author_name(self, author_id: str) -> dict:
         """Retrieve the name of an author based on OpenAlex ID"""
-        r = requests.get(self.api + "people/" + author_id, params=self.params)
+        r = session.get(self.api + "people/" + author_id, params=self.params)
         r.raise_for_status()
         j = r.json()
         result = {"openalex": author_id}
@@ -92,14 +96,14 @@ class OpenAlex:
 
         params = {"search": query**self.params}
 
-        r = requests.get(self.api + "authors/", params=params)
+        r = session.get(self.api + "authors/", params=params)
 
         r.raise_for_status()
 
     def get_author_by_orcid(self, orcid: str) -> dict:
         """Get OpenAlex Author information by providing an ORCID ID"""
 
-        r = requests.get(self.api + "authors/orcid:" + orcid, params=self.params)
+        r = session.get(self.api + "authors/orcid:" + orcid, params=self.params)
         r.raise_for_status()
 
         return r.json()
@@ -109,7 +113,7 @@ class OpenAlex:
 
         Raises: HTTP Error, KeyError
         """
-        r = requests.get(self.api + "people/" + author_id, params=self.params)
+        r = session.get(self.api + "people/" + author_id, params=self.params)
         r.raise_for_status()
         j = r.json()
         return j["last_known_institution"]["display_name"]
@@ -1,8 +1,9 @@
 from flask import current_app
 import typing
-import requests
 from thefuzz import fuzz
 
+from meteor.external import session
+
 class ORCID:
 
     api = "https://pub.orcid.org/"
@@ -26,7 +27,7 @@ class ORCID:
         self.headers = headers
 
     def get_author(self, orcid: str) -> dict:
-        r = requests.get(self.api + 'v3.0/' + orcid + '/record', 
+        r = session.get(self.api + 'v3.0/' + orcid + '/record', 
                          headers=self.headers)
         
         r.raise_for_status()
@@ -76,7 +77,7 @@ class ORCID:
 
         params = {'q': " AND ".join(query)}       
 
-        r = requests.get(self.api + 'v3.0/expanded-search/', 
+        r = session.get(self.api + 'v3.0/expanded-search/', 
                          params=params, 
                          headers=self.headers)
         
@@ -151,7 +152,7 @@ class ORCID:
             return highest_score
 
     def get_author_affiliations(self, orcid: str) -> typing.List[str]:
-        r = requests.get(self.api + 'v3.0/' + orcid + '/employments', 
+        r = session.get(self.api + 'v3.0/' + orcid + '/employments', 
                          headers=self.headers)
         
         r.raise_for_status()
@@ -166,7 +167,7 @@ class ORCID:
         except:
             pass
 
-        r = requests.get(self.api + 'v3.0/' + orcid + '/educations', 
+        r = session.get(self.api + 'v3.0/' + orcid + '/educations', 
                          headers=self.headers)
         
         r.raise_for_status()
@@ -0,0 +1,161 @@
+"""
+    Shared HTTP session for external APIs
+
+    All requests to external APIs go through one `requests.Session`, so
+    connections are pooled and kept alive between requests (and threads).
+    Requests to the same host are rate limited (see `RATE_LIMITS`),
+    which keeps concurrent lookups within the limits of the public APIs.
+    Responses are stored in the persistent cache (see `meteor.external.cache`).
+
+    ```
+    from meteor.external.session import get
+
+    r = get("https://api.openalex.org/works/doi:10.1234/...", params={...})
+    r.raise_for_status()
+    ```
+
+    Use `with fresh():` to get current data from the APIs (the cache is not read),
+    functions that are run in a thread pool have to be wrapped with `bind()`.
+"""
+
+import time
+import threading
+import typing
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from meteor.external.cache import cache, cache_key, cacheable, lifetime
+
+# default timeout (seconds) for connecting / reading
+TIMEOUT = 10
+
+# maximum requests per second for each host
+RATE_LIMITS = {
+    "api.openalex.org": 10,
+    "pub.orcid.org": 12,
+    "api.crossref.org": 10,
+    "api.datacite.org": 10,
+}
+DEFAULT_RATE_LIMIT = 10
+
+# connections kept open per host
+POOL_SIZE = 16
+
+
+class RateLimiter:
+    """
+    Spaces out requests to a host, so that at most
+    `rate` requests per second are started.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.interval = 1 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter(host: str) -> RateLimiter:
+    try:
+        return _limiters[host]
+    except KeyError:
+        with _limiters_lock:
+            return _limiters.setdefault(
+                host, RateLimiter(RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT))
+            )
+
+
+def _make_session() -> requests.Session:
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+session = _make_session()
+
+
+_fresh = contextvars.ContextVar("fresh", default=False)
+
+
+@contextmanager
+def fresh(enabled: bool = True) -> typing.Iterator[None]:
+    """Do not use cached responses for requests in this block"""
+    token = _fresh.set(enabled)
+    try:
+        yield
+    finally:
+        _fresh.reset(token)
+
+
+def bind(f: typing.Callable) -> typing.Callable:
+    """Run `f` (e.g., in another thread) with the `fresh()` setting of the caller"""
+    context = contextvars.copy_context()
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(f, *args, **kwargs)
+
+    return wrapper
+
+
+def _get(url: str, **kwargs) -> requests.Response:
+    limiter(urlsplit(url).netloc).acquire()
+    return session.get(url, **kwargs)
+
+
+def get(
+    url: str,
+    params: dict = None,
+    headers: dict = None,
+    timeout: typing.Union[float, tuple] = TIMEOUT,
+    cached: bool = True,
+    **kwargs,
+) -> requests.Response:
+    """
+    Rate limited and cached `GET` request with the shared session.
+    Use `cached=False` for requests that are not metadata lookups (e.g., websites).
+    """
+    if not cached or not cache.enabled:
+        return _get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+
+    prepared = requests.Request("GET", url, params=params).prepare()
+    key = cache_key(prepared.url, headers)
+    stored = None if _fresh.get() and not cache.offline else cache.get(key)
+
+    if cache.offline:
+        if stored is None:
+            raise requests.ConnectionError(f"Offline: <{prepared.url}> is not cached")
+        return stored.response()
+    if stored is not None and not stored.stale:
+        return stored.response()
+
+    headers = dict(headers or {})
+    if stored is not None:
+        headers.update(stored.validators())
+    r = _get(url, params=params, headers=headers, timeout=timeout, **kwargs)
+
+    host = urlsplit(prepared.url).netloc
+    if r.status_code == 304 and stored is not None:
+        cache.touch(key, lifetime(host, stored.status))
+        return stored.response()
+    if cacheable(r):
+        cache.set(key, r, lifetime(host, r.status_code))
+    return r
@@ -0,0 +1,267 @@
+import re
+import typing as t
+
+from . import dql
+
+"""
+    Batch several DQL queries into a single request
+
+    ```
+    with dgraph.batch() as batch:
+        preview = batch.add(preview_query, variables={'$value': uid})
+        entry = batch.add(dql.DQLQuery(...))
+
+    preview.result['entry'] # same result as `dgraph.query(preview_query, ...)`
+    ```
+
+    Each query gets a unique prefix (e.g., `b0_`) which is prepended to its
+    block names, GraphQL variables (`$value` -> `$b0_value`) and DQL
+    value variables (`u as uid` -> `b0_u as uid`). After execution,
+    the response is split up again and every query gets its own result
+    with the original block names. String literals (e.g., `eq(name, "$value")`)
+    are never renamed.
+"""
+
+REGEX_QUERY_HEADER = re.compile(r'^\s*query\s*\w*\s*\((?P<declarations>[^)]*)\)', re.DOTALL)
+REGEX_GRAPHQL_VARIABLE = re.compile(r'\$(\w+)')
+REGEX_VALUE_VARIABLE_DEF = re.compile(r'(?<![\$\w])(\w+)(\s+as\s+)')
+REGEX_IDENTIFIER = re.compile(r'(?<![\$\w.@~])([A-Za-z_]\w*)')
+REGEX_BLOCK = re.compile(r'(?P<var>(?:\w+\s+as\s+)?)(?P<name>\w+)\s*\($')
+REGEX_STRING_LITERAL = re.compile(r'"(?:[^"\\]|\\.)*"')
+REGEX_MASKED_STRING = re.compile(r'"(\d+)"')
+
+# functions where DQL value variables can be referenced
+VALUE_VARIABLE_FUNCTIONS = ('uid', 'val', 'math')
+
+
+def _mask_strings(query_string: str) -> t.Tuple[str, t.List[str]]:
+    """
+        Replace string literals with numbered placeholders (`"0"`, `"1"`, ...),
+        so the renaming below cannot touch their content
+    """
+    literals = []
+
+    def mask(match: re.Match) -> str:
+        literals.append(match.group(0))
+        return f'"{len(literals) - 1}"'
+
+    return REGEX_STRING_LITERAL.sub(mask, query_string), literals
+
+
+def _unmask_strings(query_string: str, literals: t.List[str]) -> str:
+    return REGEX_MASKED_STRING.sub(lambda m: literals[int(m.group(1))], query_string)
+
+
+def _split_header(query_string: str) -> t.Tuple[str, str]:
+    """ Split a query string into variable declarations and body """
+    match = REGEX_QUERY_HEADER.match(query_string)
+    if match:
+        return match.group('declarations'), query_string[match.end():]
+    return '', query_string
+
+
+def _top_level_groups(body: str) -> t.List[str]:
+    """
+        Get the inner contents of all top level braces.
+        (`DQLQuery.render()` wraps each block in its own braces)
+    """
+    groups = []
+    depth = 0
+    start = None
+    in_string = False
+    for i, char in enumerate(body):
+        if char == '"' and body[i - 1] != '\\':
+            in_string = not in_string
+        if in_string:
+            continue
+        if char == '{':
+            if depth == 0:
+                start = i + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                groups.append(body[start:i])
+    if depth != 0:
+        raise ValueError('Cannot batch query: unbalanced braces')
+    return groups
+
+
+def _rename_in_functions(body: str, names: set, prefix: str) -> str:
+    """
+        Rename DQL value variables inside `uid()`, `val()` and `math()`.
+        Handles nested parentheses, e.g., `math( (a + b) / c )`
+    """
+    result = []
+    i = 0
+    pattern = re.compile(r'\b(' + '|'.join(VALUE_VARIABLE_FUNCTIONS) + r')\(')
+    while True:
+        match = pattern.search(body, i)
+        if not match:
+            result.append(body[i:])
+            break
+        result.append(body[i:match.end()])
+        depth = 1
+        j = match.end()
+        while j < len(body) and depth > 0:
+            if body[j] == '(':
+                depth += 1
+            elif body[j] == ')':
+                depth -= 1
+            j += 1
+        inner = body[match.end():j]
+        inner = REGEX_IDENTIFIER.sub(lambda m: prefix + m.group(1) if m.group(1) in names else m.group(1),
+                                     inner)
+        result.append(inner)
+        i = j
+    return ''.join(result)
+
+
+def _rename_blocks(body: str, prefix: str) -> t.Tuple[str, t.List[str]]:
+    """ Prefix names of top level blocks that show up in the response """
+    blocks = []
+    result = []
+    depth = 0
+    parens = 0
+    in_string = False
+    last = 0
+    for i, char in enumerate(body):
+        if char == '"' and body[i - 1] != '\\':
+            in_string = not in_string
+        if in_string:
+            continue
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif char == ')':
+            parens -= 1
+        elif char == '(':
+            parens += 1
+            if depth > 0 or parens > 1:
+                continue
+            # look back to get block name
+            head = body[last:i + 1]
+            match = REGEX_BLOCK.search(head)
+            # skip directives, e.g., `@filter(...)`
+            if match and head[:match.start('name')].endswith('@'):
+                continue
+            if match and match.group('name') != 'var':
+                name = match.group('name')
+                blocks.append(name)
+                head = head[:match.start('name')] + prefix + name + head[match.end('name'):]
+            result.append(head)
+            last = i + 1
+    result.append(body[last:])
+    return ''.join(result), blocks
+
+
+class BatchedQuery:
+
+    """ Placeholder for the result of a query that is part of a batch """
+
+    __slots__ = "query_string", "declarations", "variables", "prefix", "blocks", "_result"
+
+    def __init__(self, query_string: str, variables: dict, prefix: str) -> None:
+        self.prefix = prefix
+        query_string, literals = _mask_strings(query_string)
+        declarations, body = _split_header(query_string)
+
+        # rename GraphQL variables
+        declarations = REGEX_GRAPHQL_VARIABLE.sub(lambda m: f'${prefix}{m.group(1)}', declarations)
+        body = REGEX_GRAPHQL_VARIABLE.sub(lambda m: f'${prefix}{m.group(1)}', body)
+        self.variables = {'$' + prefix + k.lstrip('$'): v for k, v in (variables or {}).items()}
+
+        # rename DQL value variables
+        value_variables = set(m.group(1) for m in REGEX_VALUE_VARIABLE_DEF.finditer(body))
+        if value_variables:
+            body = REGEX_VALUE_VARIABLE_DEF.sub(
+                lambda m: prefix + m.group(1) + m.group(2) if m.group(1) in value_variables else m.group(0),
+                body)
+            body = _rename_in_functions(body, value_variables, prefix)
+
+        groups = _top_level_groups(body)
+        renamed = []
+        self.blocks = []
+        for group in groups:
+            group, blocks = _rename_blocks(group, prefix)
+            renamed.append(group)
+            self.blocks += blocks
+
+        self.query_string = _unmask_strings("\n".join(renamed), literals)
+        self.declarations = declarations.strip()
+        self._result = None
+
+    def __repr__(self) -> str:
+        return f'<BatchedQuery {self.prefix} blocks={self.blocks}>'
+
+    @property
+    def result(self) -> dict:
+        if self._result is None:
+            raise RuntimeError('Batch was not executed yet!')
+        return self._result
+
+    def set_result(self, data: dict) -> None:
+        self._result = {k[len(self.prefix):]: v for k, v in data.items() if k.startswith(self.prefix)}
+        for block in self.blocks:
+            self._result.setdefault(block, [])
+
+
+class QueryBatch:
+
+    """
+        Collects several queries and sends them to DGraph 
+        as a single request. Use via `dgraph.batch()`
+    """
+
+    def __init__(self, client) -> None:
+        self.client = client
+        self.queries: t.List[BatchedQuery] = []
+        self.executed = False
+
+    def __enter__(self) -> "QueryBatch":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None and not self.executed:
+            self.execute()
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    def add(self, query_string: t.Union[dql.DQLQuery, str], variables: dict = None) -> BatchedQuery:
+        """
+            Add a query to the batch. Returns a placeholder object,
+            its `result` is available after the batch was executed.
+        """
+        if self.executed:
+            raise RuntimeError('Cannot add queries to a batch that was already executed!')
+        if isinstance(query_string, dql.DQLQuery):
+            variables = query_string.get_graphql_variables()
+            query_string = query_string.render()
+        query = BatchedQuery(query_string, variables, prefix=f'b{len(self.queries)}_')
+        self.queries.append(query)
+        return query
+
+    def render(self) -> t.Tuple[str, dict]:
+        """ Compose the single query string and variables for all queries """
+        declarations = [q.declarations for q in self.queries if q.declarations]
+        variables = {}
+        for q in self.queries:
+            variables.update(q.variables)
+        query_string = ''
+        if declarations:
+            query_string += 'query batch(' + ', '.join(declarations) + ') '
+        query_string += '{\n' + '\n'.join(q.query_string for q in self.queries) + '\n}'
+        return query_string, variables
+
+    def execute(self) -> t.List[dict]:
+        """ Send all queries as one request and distribute the results """
+        self.executed = True
+        if len(self.queries) == 0:
+            return []
+        query_string, variables = self.render()
+        data = self.client.query(query_string, variables=variables or None)
+        for q in self.queries:
+            q.set_result(data)
+        return [q.result for q in self.queries]
@@ -0,0 +1,78 @@
+"""
+    Shared cache for choice lists of relationship predicates
+
+    Loading the choices of a relationship predicate (e.g., all countries)
+    requires a full scan of the related DGraph Types. The choices rarely
+    change, so the raw query results are kept for `CHOICES_CACHE_TTL` seconds
+    (default: 300) and shared by all predicates and requests.
+
+    Each entry remembers the DGraph Types it was loaded from. Adding, editing
+    or deleting an entry of such a type should call `choices_cache.invalidate()`.
+    Invalidation is local to the process, other workers see the change after the TTL.
+
+    Cached results are shared, do not modify them in place.
+"""
+
+import time
+import threading
+import typing as t
+
+from flask import current_app
+
+
+class ChoicesCache:
+
+    def __init__(self, ttl: int = 300) -> None:
+        self.ttl = ttl
+        # key = query string, value = (expires, dgraph types, result)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def query(self, query_string: str, dgraph_types: t.Iterable[str]) -> dict:
+        """
+            Run the query or get its cached result.
+
+            `dgraph_types`: all DGraph Types the query result depends on
+        """
+        from meteor import dgraph
+
+        now = time.monotonic()
+        try:
+            expires, _, result = self._entries[query_string]
+            if expires > now:
+                return result
+        except KeyError:
+            pass
+
+        result = dgraph.query(query_string=query_string)
+        ttl = current_app.config.get('CHOICES_CACHE_TTL', self.ttl)
+        with self._lock:
+            self._entries[query_string] = (now + ttl, frozenset(dgraph_types), result)
+        return result
+
+    def invalidate(self, *dgraph_types: str) -> None:
+        """ Drop all cached choices that depend on any of the given DGraph Types """
+        dgraph_types = set(dgraph_types)
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items()
+                             if v[1].isdisjoint(dgraph_types)}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = {}
+
+
+choices_cache = ChoicesCache()
+
+
+def related_types(entries: t.Iterable[dict]) -> t.List[str]:
+    """ Collect the DGraph Types of related entries (e.g., `Sanitizer.related_entries`) """
+    dgraph_types = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        dgraph_type = entry.get('dgraph.type') or []
+        if isinstance(dgraph_type, str):
+            dgraph_type = [dgraph_type]
+        dgraph_types += dgraph_type
+    return dgraph_types
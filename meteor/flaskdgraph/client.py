@@ -1,10 +1,16 @@
 from typing import Union
 import json
+import time
+from contextlib import contextmanager
 from dateutil.parser import isoparse
-from flask import current_app, g
+from flask import current_app, g, has_app_context, has_request_context
 import pydgraph
+import grpc
 import logging
 from . import dql
+from .connection import ConnectionPool
+from .batch import QueryBatch
+from .decoder import SchemaDecoder
 
 class DGraph(object):
 
@@ -12,11 +18,11 @@ class DGraph(object):
         Class for dgraph database connection
     """
 
-    _client = None
-
     def __init__(self, app=None):
 
         self.logger = logging.getLogger(__name__)
+        self.pool = None
+        self.decoder = SchemaDecoder()
 
         self.app = app
         if app is not None:
@@ -27,43 +33,153 @@ class DGraph(object):
         app.config.setdefault('DGRAPH_ENDPOINT', 'localhost:9080')
         app.config.setdefault('DGRAPH_CREDENTIALS', None)
         app.config.setdefault('DGRAPH_OPTIONS', None)
+        app.config.setdefault('DGRAPH_POOL_SIZE', 1)
+        app.config.setdefault('DGRAPH_HEALTHCHECK_INTERVAL', 30)
+        app.config.setdefault('DGRAPH_HEALTHCHECK_TIMEOUT', 2)
+        # share one read-only transaction for all reads of a request
+        app.config.setdefault('DGRAPH_REQUEST_TXN', False)
+        app.config.setdefault('DGRAPH_BEST_EFFORT', False)
+        # report number of queries and time spent in DGraph per request
+        app.config.setdefault('DGRAPH_QUERY_STATS', False)
+        # 'schema': only parse datetime values of predicates declared in the Schema
+        # 'hook': legacy behaviour, try to parse every string value as datetime
+        app.config.setdefault('DGRAPH_JSON_DECODER', 'schema')
+        app.config.setdefault('DGRAPH_DATETIME_PREDICATES', [])
+        self.decoder.extra_predicates.update(app.config['DGRAPH_DATETIME_PREDICATES'])
         app.teardown_appcontext(self.teardown)
+        app.after_request(self.report_query_stats)
 
     """ 
         Connection Related Methods
     """
 
     @property
-    def connection(self):
-        # ctx = _app_ctx_stack.top
-        # if ctx is not None:
-        #     if not hasattr(ctx, 'dgraph'):
-        #         ctx.dgraph = self.connect()
-        #     return ctx.dgraph
-        if self._client is None:
-            self._client = self.connect()
-        return self._client
-
-    def connect(self):
-        self.logger.debug(
-            f"Establishing connection to DGraph: {current_app.config['DGRAPH_ENDPOINT']}")
-
-        self.client_stub = pydgraph.DgraphClientStub(current_app.config['DGRAPH_ENDPOINT'],
-                                                     credentials=current_app.config['DGRAPH_CREDENTIALS'],
-                                                     options=current_app.config['DGRAPH_OPTIONS'])
-
-        return pydgraph.DgraphClient(self.client_stub)
+    def connection(self) -> pydgraph.DgraphClient:
+        """
+            Get a client from the connection pool (round-robin).
+            The pool is created lazily on first access and 
+            rebuilt automatically in forked worker processes.
+        """
+        if self.pool is None:
+            self.pool = self.connect()
+        return self.pool.get_client()
+
+    def connect(self) -> ConnectionPool:
+        return ConnectionPool(current_app.config['DGRAPH_ENDPOINT'],
+                              size=current_app.config['DGRAPH_POOL_SIZE'],
+                              credentials=current_app.config['DGRAPH_CREDENTIALS'],
+                              options=current_app.config['DGRAPH_OPTIONS'],
+                              healthcheck_interval=current_app.config['DGRAPH_HEALTHCHECK_INTERVAL'],
+                              healthcheck_timeout=current_app.config['DGRAPH_HEALTHCHECK_TIMEOUT'])
 
     def close(self, *args):
         # Close each DGraph client stub
-        self.client_stub.close()
+        # Only call this when shutting down the process,
+        # the stubs are shared by all requests of a worker
+        if self.pool is not None:
+            self.pool.close()
 
     def teardown(self, exception):
-        ctx = g
-        if hasattr(ctx, 'dgraph'):
-            self.logger.info(
-                f"Closing Connection: {current_app.config['DGRAPH_ENDPOINT']}")
-            self.client_stub.close()
+        # stubs are shared across requests and threads; 
+        # never close them at the end of an app context.
+        # Only discard the request scoped transaction.
+        self.end_read_txn()
+
+    """
+        Request Scoped Read Transactions
+    """
+
+    def begin_read_txn(self, best_effort: bool = None) -> pydgraph.Txn:
+        """
+            Start a read-only transaction and store it on `flask.g`.
+            All subsequent calls to `query()` in the same app context
+            read from the same snapshot.
+        """
+        if best_effort is None:
+            best_effort = current_app.config.get('DGRAPH_BEST_EFFORT', False)
+        client = self.connection
+        g._dgraph_client = client
+        g._dgraph_txn = client.txn(read_only=True, best_effort=best_effort)
+        return g._dgraph_txn
+
+    def end_read_txn(self) -> None:
+        """ Discard the request scoped read-only transaction (if any) """
+        if not has_app_context():
+            return
+        txn = g.pop('_dgraph_txn', None)
+        g.pop('_dgraph_client', None)
+        if txn is not None:
+            txn.discard()
+
+    @contextmanager
+    def read_snapshot(self, best_effort: bool = None):
+        """
+            Context manager: all reads inside the block share one 
+            read-only transaction.
+
+            ```
+            with dgraph.read_snapshot():
+                result = dgraph.query(query_string)
+                total = dgraph.query(count_query_string)
+            ```
+        """
+        outer_txn = g.pop('_dgraph_txn', None)
+        outer_client = g.pop('_dgraph_client', None)
+        self.begin_read_txn(best_effort=best_effort)
+        try:
+            yield g._dgraph_txn
+        finally:
+            self.end_read_txn()
+            if outer_txn is not None:
+                g._dgraph_txn = outer_txn
+                g._dgraph_client = outer_client
+
+    def _read_txn(self) -> tuple:
+        """ 
+            Returns a tuple of (client, txn) for performing a query.
+            Uses the request scoped transaction if available or enabled.
+        """
+        if has_app_context():
+            if '_dgraph_txn' in g:
+                return g._dgraph_client, g._dgraph_txn
+            if has_request_context() and current_app.config.get('DGRAPH_REQUEST_TXN'):
+                txn = self.begin_read_txn()
+                return g._dgraph_client, txn
+        client = self.connection
+        return client, client.txn(read_only=True)
+
+    def _write_txn(self) -> pydgraph.Txn:
+        """
+            Get a new transaction for mutations. 
+            Ends the request scoped snapshot, so subsequent reads
+            see the result of the mutation.
+        """
+        self.end_read_txn()
+        return self.connection.txn()
+
+    @staticmethod
+    def _track_query(duration: float) -> None:
+        if not has_app_context():
+            return
+        stats = g.setdefault('_dgraph_stats', {'queries': 0, 'duration': 0.0})
+        stats['queries'] += 1
+        stats['duration'] += duration
+
+    @staticmethod
+    def get_query_stats() -> dict:
+        """ 
+            Number of queries and total time (in seconds) spent 
+            waiting for DGraph in the current request
+        """
+        return dict(g.get('_dgraph_stats', {'queries': 0, 'duration': 0.0}))
+
+    def report_query_stats(self, response):
+        stats = self.get_query_stats()
+        self.logger.debug(f"DGraph queries in this request: {stats['queries']} ({stats['duration'] * 1000:.1f} ms)")
+        if current_app.config.get('DGRAPH_QUERY_STATS'):
+            response.headers['X-DGraph-Queries'] = str(stats['queries'])
+            response.headers.add('Server-Timing', f"dgraph;desc=\"{stats['queries']} queries\";dur={stats['duration'] * 1000:.1f}")
+        return response
 
     ''' Static Methods '''
 
@@ -79,6 +195,7 @@ class DGraph(object):
             return s
 
     # json decoder object_hook function
+    # legacy decoder, use `DGraph.decode()` instead
     @staticmethod
     def datetime_hook(obj):
         for k, v in obj.items():
@@ -144,15 +261,44 @@ class DGraph(object):
             pass
 
         self.logger.debug(f"Sending dgraph query: {query_string}")
-        if variables is None:
-            res = self.connection.txn(read_only=True).query(query_string)
-        else:
-            self.logger.debug(f"Got the following variables {variables}")
-            res = self.connection.txn(read_only=True).query(
-                query_string, variables=variables)
+        client, txn = self._read_txn()
+        start = time.perf_counter()
+        try:
+            if variables is None:
+                res = txn.query(query_string)
+            else:
+                self.logger.debug(f"Got the following variables {variables}")
+                res = txn.query(query_string, variables=variables)
+        except grpc.RpcError as e:
+            if e.code() == grpc.StatusCode.UNAVAILABLE:
+                self.pool.mark_unhealthy(client)
+                # the snapshot is unusable now
+                self.end_read_txn()
+            raise
+        finally:
+            self._track_query(time.perf_counter() - start)
         self.logger.debug(f"Received response for dgraph query.")
-        data = json.loads(res.json, object_hook=self.datetime_hook)
-        return data
+        return self.decode(res.json)
+
+    def decode(self, raw: Union[bytes, str]) -> dict:
+        """ Decode a JSON response from DGraph and parse datetime values """
+        if has_app_context() and current_app.config.get('DGRAPH_JSON_DECODER') == 'hook':
+            return json.loads(raw, object_hook=self.datetime_hook)
+        return self.decoder.decode(raw)
+
+    def batch(self) -> QueryBatch:
+        """
+            Collect several queries and send them as a single request.
+
+            ```
+            with dgraph.batch() as batch:
+                entry = batch.add(query_string, variables={'$value': uid})
+                counts = batch.add(dql_query)
+            
+            entry.result['q']
+            ```
+        """
+        return QueryBatch(self)
 
     def get_uid(self, field: str, value: str, query_filter: list = None) -> Union[str, None]:
         value = str(value).strip()
@@ -219,7 +365,7 @@ class DGraph(object):
         # if type(data) is not dict or type(data) is not list:
         #     raise TypeError()
 
-        txn = self.connection.txn()
+        txn = self._write_txn()
 
         try:
             response = txn.mutate(set_obj=data)
@@ -249,7 +395,7 @@ class DGraph(object):
         self.logger.debug("Performing mutation:")
         self.logger.debug(input_data)
 
-        txn = self.connection.txn()
+        txn = self._write_txn()
 
         try:
             response = txn.mutate(set_obj=input_data)
@@ -280,7 +426,7 @@ class DGraph(object):
         self.logger.debug(f'delete nquads:\n{del_nquads}')
         self.logger.debug(f'set obj:\n{set_obj}')
         self.logger.debug(f'delete obj:\n{del_obj}')
-        txn = self.connection.txn()
+        txn = self._write_txn()
         mutation = txn.create_mutation(
             set_nquads=set_nquads, del_nquads=del_nquads, 
             set_obj=set_obj, del_obj=del_obj,
@@ -305,7 +451,7 @@ class DGraph(object):
 
     def delete(self, mutation: Union[dict, list]) -> bool:
 
-        txn = self.connection.txn()
+        txn = self._write_txn()
 
         try:
             response = txn.mutate(del_obj=mutation)
@@ -0,0 +1,220 @@
+import os
+import time
+import threading
+import itertools
+import logging
+from typing import List, Union
+
+import grpc
+import pydgraph
+
+
+# gRPC channel options that keep idle connections to the alphas alive,
+# so long-running workers do not hit dead sockets after a quiet period.
+# Can be overwritten with `DGRAPH_OPTIONS`
+DEFAULT_CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', 30000),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+]
+
+
+class _PooledStub:
+
+    """
+        Wraps a single `DgraphClientStub` together with its
+        `DgraphClient` and book keeping for health checks.
+    """
+
+    __slots__ = "endpoint", "stub", "client", "last_checked", "healthy", "checking"
+
+    def __init__(self, endpoint: str, credentials=None, options=None) -> None:
+        self.endpoint = endpoint
+        self.stub = pydgraph.DgraphClientStub(endpoint,
+                                              credentials=credentials,
+                                              options=options)
+        self.client = pydgraph.DgraphClient(self.stub)
+        self.last_checked = time.monotonic()
+        self.healthy = True
+        # a thread is running the health check (or reconnecting)
+        self.checking = False
+
+    def __repr__(self) -> str:
+        return f'<PooledStub {self.endpoint} healthy={self.healthy}>'
+
+    def close(self) -> None:
+        try:
+            self.stub.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+
+    """
+        Pool of `DgraphClientStub`s that is aware of forking.
+
+        gRPC channels must not be shared between a parent process and
+        its forked children (e.g., gunicorn workers with `preload_app`).
+        The pool remembers the PID that created the stubs and transparently
+        builds a fresh set of stubs when it is accessed from another process.
+
+        `endpoints` can be a single address or a list of alpha addresses.
+        The pool keeps `size` stubs per endpoint and hands out clients
+        in a round-robin fashion.
+    """
+
+    def __init__(self,
+                 endpoints: Union[str, List[str]],
+                 size: int = 1,
+                 credentials=None,
+                 options: list = None,
+                 healthcheck_interval: float = 30,
+                 healthcheck_timeout: float = 2) -> None:
+
+        self.logger = logging.getLogger(__name__)
+
+        if isinstance(endpoints, str):
+            endpoints = [e.strip() for e in endpoints.split(',') if e.strip()]
+        assert len(endpoints) > 0, "At least one DGraph endpoint is required!"
+
+        self.endpoints = list(endpoints)
+        self.size = max(int(size), 1)
+        self.credentials = credentials
+        self.options = options if options is not None else DEFAULT_CHANNEL_OPTIONS
+        self.healthcheck_interval = healthcheck_interval
+        self.healthcheck_timeout = healthcheck_timeout
+
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stubs = []
+        self._cycle = None
+
+        # the lock might be held by another thread while forking
+        os.register_at_fork(after_in_child=self.reset_after_fork)
+
+    def __repr__(self) -> str:
+        return f'<DGraph ConnectionPool {self.endpoints} size={self.size} pid={self._pid}>'
+
+    """
+        Lifecycle
+    """
+
+    def _build(self) -> None:
+        self.logger.debug(f"Establishing connection to DGraph: {self.endpoints} (pool size: {self.size})")
+        self._stubs = [_PooledStub(endpoint,
+                                   credentials=self.credentials,
+                                   options=self.options)
+                       for _ in range(self.size) for endpoint in self.endpoints]
+        self._cycle = itertools.cycle(range(len(self._stubs)))
+        self._pid = os.getpid()
+
+    def _ensure(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # We are in a forked child: the channels belong to the parent.
+                # Do not close them here, only drop the references.
+                self.logger.debug(f"Detected fork (parent {self._pid}), rebuilding DGraph connection pool")
+                self._stubs = []
+            self._build()
+
+    def reset_after_fork(self) -> None:
+        """ Drop all stubs inherited from the parent process """
+        self._lock = threading.Lock()
+        self._pid = None
+        self._stubs = []
+        self._cycle = None
+
+    def close(self) -> None:
+        """ Close all stubs of the pool. Only call on process shutdown """
+        with self._lock:
+            if self._pid == os.getpid():
+                for pooled in self._stubs:
+                    pooled.close()
+            self._stubs = []
+            self._cycle = None
+            self._pid = None
+
+    """
+        Health Checks
+    """
+
+    def _check(self, pooled: _PooledStub) -> bool:
+        try:
+            pooled.stub.check_version(pydgraph.Check(),
+                                      timeout=self.healthcheck_timeout)
+            pooled.healthy = True
+        except grpc.RpcError as e:
+            self.logger.warning(f"Health check for DGraph endpoint {pooled.endpoint} failed: {e}")
+            pooled.healthy = False
+        pooled.last_checked = time.monotonic()
+        return pooled.healthy
+
+    def _reconnect(self, index: int, old: _PooledStub) -> _PooledStub:
+        self.logger.info(f"Reconnecting to DGraph endpoint {old.endpoint}")
+        pooled = _PooledStub(old.endpoint,
+                             credentials=self.credentials,
+                             options=self.options)
+        pooled.checking = True
+        with self._lock:
+            # the pool might have been closed or rebuilt in the meantime
+            if index < len(self._stubs) and self._stubs[index] is old:
+                self._stubs[index] = pooled
+        old.close()
+        return pooled
+
+    def mark_unhealthy(self, client: pydgraph.DgraphClient) -> None:
+        """
+            Flag the stub behind `client` as broken,
+            it gets reconnected the next time it is handed out.
+        """
+        for pooled in self._stubs:
+            if pooled.client is client:
+                pooled.healthy = False
+
+    """
+        Public Interface
+    """
+
+    def get_client(self) -> pydgraph.DgraphClient:
+        """
+            Get the next client in round-robin order.
+            Stubs that are flagged as unhealthy (or were not checked for a
+            while) are health-checked and reconnected if necessary.
+
+            The health check blocks (up to `healthcheck_timeout`), so it runs
+            outside of the lock. Other threads skip a stub while it is checked.
+        """
+        self._ensure()
+        pooled = None
+        for _ in range(len(self._stubs)):
+            with self._lock:
+                index = next(self._cycle)
+                pooled = self._stubs[index]
+                due = time.monotonic() - pooled.last_checked > self.healthcheck_interval
+                if pooled.healthy and (not due or pooled.checking):
+                    return pooled.client
+                if pooled.checking:
+                    # another thread reconnects this stub
+                    continue
+                pooled.checking = True
+            try:
+                if not pooled.healthy:
+                    pooled = self._reconnect(index, pooled)
+                if self._check(pooled):
+                    return pooled.client
+            finally:
+                pooled.checking = False
+        # every endpoint failed the health check: return anyway
+        # and let the caller handle the error
+        return pooled.client
+
+    @property
+    def stubs(self) -> List[pydgraph.DgraphClientStub]:
+        self._ensure()
+        return [pooled.stub for pooled in self._stubs]
@@ -0,0 +1,110 @@
+import json
+import typing as t
+import datetime
+
+from dateutil.parser import isoparse
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    orjson = None
+    _loads = json.loads
+
+
+"""
+    Schema driven JSON decoder for DGraph responses
+
+    The legacy `DGraph.datetime_hook` tries to parse every single string
+    value as ISO datetime. This decoder only converts values of predicates
+    (and facets) that are declared as `DateTime`, `Year`, `ListDatetime`, or
+    `ListYear` in the `Schema` registry. Uses `orjson` if it is installed.
+"""
+
+
+def parse_datetime(s):
+    # Helper function for parsing dgraph's iso strings
+    # same behaviour as `DGraph.parse_datetime`
+    if type(s) == str:
+        if len(s) <= 4:
+            return s
+    try:
+        return isoparse(s)
+    except:
+        return s
+
+
+class SchemaDecoder:
+
+    """
+        Decodes DGraph JSON responses and converts datetime values
+        based on the predicates declared in the `Schema`.
+
+        `extra_predicates` can be used to declare additional keys
+        that should be parsed as datetime (e.g., aliases in queries).
+    """
+
+    def __init__(self, extra_predicates: t.Iterable[str] = None) -> None:
+        self.extra_predicates = set(extra_predicates or [])
+        self._datetime_keys = None
+        self._registry_size = None
+
+    @staticmethod
+    def _collect_datetime_keys() -> t.Set[str]:
+        from .schema import Schema
+        from .dgraph_types import DateTime
+
+        keys = set()
+        for predicate_name, predicate in Schema.__predicates__.items():
+            if isinstance(predicate, DateTime):
+                keys.add(predicate_name)
+            if predicate.facets:
+                for facet in predicate.facets.values():
+                    if facet.type in (datetime.datetime, datetime.date):
+                        keys.add(f'{predicate_name}|{facet.key}')
+        return keys
+
+    @property
+    def datetime_keys(self) -> t.Set[str]:
+        """
+            All keys that hold datetime values. Gets recomputed when
+            new DGraph types are registered in the `Schema`
+        """
+        from .schema import Schema
+        if self._datetime_keys is None or self._registry_size != len(Schema.__predicates__):
+            self._registry_size = len(Schema.__predicates__)
+            self._datetime_keys = self._collect_datetime_keys() | self.extra_predicates
+        return self._datetime_keys
+
+    @staticmethod
+    def _convert_value(value):
+        if isinstance(value, str):
+            return parse_datetime(value)
+        if isinstance(value, list):
+            return [parse_datetime(v) for v in value]
+        if isinstance(value, dict):
+            # facets of list predicates: {"0": "2022-01-01T00:00:00Z", ...}
+            return {k: parse_datetime(v) for k, v in value.items()}
+        return value
+
+    def convert(self, data: t.Any, keys: t.Set[str] = None) -> t.Any:
+        """ Walk the decoded data (in place) and convert all datetime values """
+        if keys is None:
+            keys = self.datetime_keys
+        stack = [data]
+        while stack:
+            obj = stack.pop()
+            if isinstance(obj, dict):
+                for k, v in obj.items():
+                    if k in keys:
+                        obj[k] = self._convert_value(v)
+                    elif isinstance(v, (dict, list)):
+                        stack.append(v)
+            elif isinstance(obj, list):
+                for v in obj:
+                    if isinstance(v, (dict, list)):
+                        stack.append(v)
+        return data
+
+    def decode(self, raw: t.Union[bytes, str]) -> dict:
+        return self.convert(_loads(raw))
@@ -19,6 +19,7 @@ from dateutil import parser as dateparser
 from meteor import dgraph
 
 from .schema import Schema
+from .choices import choices_cache
 from .customformfields import NullableDateField, TomSelectField, TomSelectMultipleField
 from .utils import validate_uid, strip_query
 from .dql import *
@@ -919,7 +920,7 @@ class ReverseRelationship(_PrimitivePredicate):
 
         query_string += "}"
 
-        choices = dgraph.query(query_string=query_string)
+        choices = choices_cache.query(query_string, self.relationship_constraint)
 
         if len(self.relationship_constraint) == 1:
             self.choices = {
@@ -1052,7 +1053,7 @@ class ReverseListRelationship(ReverseRelationship):
 
         query_string += "}"
 
-        choices = dgraph.query(query_string=query_string)
+        choices = choices_cache.query(query_string, self.relationship_constraint)
 
         if len(self.relationship_constraint) == 1:
             self.choices = {
@@ -1186,7 +1187,7 @@ class MutualRelationship(_PrimitivePredicate):
 
         query_string += "}"
 
-        choices = dgraph.query(query_string=query_string)
+        choices = choices_cache.query(query_string, self.relationship_constraint)
 
         if len(self.relationship_constraint) == 1:
             self.choices = {
@@ -2082,7 +2083,7 @@ class SingleRelationship(Predicate):
 
         query_string += "}"
 
-        choices = dgraph.query(query_string=query_string)
+        choices = choices_cache.query(query_string, self.relationship_constraint)
 
         if len(self.relationship_constraint) == 1:
             self.choices = {
@@ -2099,6 +2100,7 @@ class SingleRelationship(Predicate):
         else:
             self.choices = {}
             self.choices_tuples = {}
+            self.choices_dicts = []
             for dgraph_type in self.relationship_constraint:
                 self.choices_tuples[dgraph_type] = [
                     (c["uid"], c.get("name") or c.get("_unique_name"))
@@ -4,13 +4,228 @@ from wtforms import SubmitField, SelectField, StringField, RadioField
 from flask_wtf import FlaskForm
 from .customformfields import TomSelectMultipleField
 
-from copy import deepcopy
+from copy import copy, deepcopy
+import base64
+import json
+import re
+import typing as t
 
+from .utils import validate_uid
 
-def build_query_string(query: dict, public=True, count=False) -> str:
+
+"""
+    Cursor (keyset) pagination
+
+    Entries are returned in two phases:
+
+    1. Entries with a `name`, ordered by name. The cursor encodes the `name` of the
+       last entry of a page and the UIDs of all entries with that name that were
+       already returned. The next page continues after this name, so DGraph does
+       not have to skip over all previous pages. Comparing names (`gt(name, ...)`)
+       requires a sortable index on `name` (`exact`).
+    2. Entries without a `name` (e.g., publications that only have a title),
+       ordered by UID. The cursor encodes the UID of the last entry (`after`).
+
+    For clients the cursor is an opaque string, `*` requests the first page.
+"""
+
+def _encode_cursor(cursor: dict) -> str:
+    cursor = json.dumps(cursor, separators=(',', ':'))
+    return base64.urlsafe_b64encode(cursor.encode('utf-8')).decode('ascii')
+
+
+def next_cursor(result: t.List[dict], cursor: str, max_results: int) -> t.Union[str, None]:
+    """ 
+        Generate the cursor pointing after the last entry of `result`,
+        `cursor` is the cursor that was used to get `result`. Returns `None` after the last page.
+    """
+    previous = decode_cursor(cursor)
+    named = previous is None or 'name' in previous
+    if len(result) < max_results:
+        # continue with the entries without name
+        return _encode_cursor({'after': '0x0'}) if named else None
+    if not named:
+        return _encode_cursor({'after': result[-1]['uid']})
+    name = result[-1]['name']
+    uids = [entry['uid'] for entry in result if entry.get('name') == name]
+    # entries with the same name can span several pages
+    if previous and previous['name'] == name:
+        uids = previous['uids'] + uids
+    return _encode_cursor({'name': name, 'uids': uids})
+
+
+def decode_cursor(cursor: str) -> t.Union[dict, None]:
+    """ 
+        Parse a cursor generated by `next_cursor`. 
+        Returns `None` for the first page (`*`), raises `ValueError` if the cursor is invalid.
+    """
+    if cursor is None or cursor.strip() in ('', '*'):
+        return None
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        if 'after' in cursor:
+            after = validate_uid(cursor['after'])
+            if not after:
+                raise ValueError
+            return {'after': after}
+        name = cursor['name']
+        uids = [validate_uid(uid) for uid in cursor['uids']]
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if not isinstance(name, str) or not all(uids):
+        raise ValueError('Invalid cursor')
+    return {'name': name, 'uids': uids}
+
+
+"""
+    Query planning
+
+    Starting a query with `has(dgraph.type)` touches every node in the graph.
+    The `QueryPlanner` collects the filters that can also be used as root function,
+    because the Schema declares a matching index (or `@reverse` edge) for them.
+    The most selective candidate becomes the root, everything else stays a filter.
+"""
+
+# index tokenizers that allow a function at query root
+ROOT_FUNCTION_INDEXES = {
+    'eq': {'exact', 'hash', 'int', 'float', 'bool', 'year', 'month', 'day', 'hour'},
+    'ge': {'exact', 'int', 'float', 'year', 'month', 'day', 'hour'},
+    'gt': {'exact', 'int', 'float', 'year', 'month', 'day', 'hour'},
+    'le': {'exact', 'int', 'float', 'year', 'month', 'day', 'hour'},
+    'lt': {'exact', 'int', 'float', 'year', 'month', 'day', 'hour'},
+    'between': {'exact', 'int', 'float', 'year', 'month', 'day', 'hour'},
+    'anyofterms': {'term'},
+    'allofterms': {'term'},
+    'anyoftext': {'fulltext'},
+    'alloftext': {'fulltext'},
+    'regexp': {'trigram'},
+    'match': {'trigram'},
+}
+
+# rank of root candidates: lower is more selective
+RANK_EQ = 1
+RANK_REVERSE = 2
+RANK_SEARCH = 3
+RANK_TYPE = 4
+RANK_CHOICE = 5
+
+DEFAULT_ROOT = 'has(dgraph.type)'
+
+
+def index_tokenizers(predicate) -> set:
+    """ Get the index tokenizers of a predicate, e.g., `{'term', 'trigram'}` """
+    tokenizers = set()
+    for directive in predicate.dgraph_directives or []:
+        match = re.match(r'@index\((.*)\)', directive)
+        if match:
+            tokenizers.update(t.strip() for t in match.group(1).split(','))
+    return tokenizers
+
+
+class QueryPlanner:
+
+    """
+        Collects root function candidates and chooses the most selective one.
+        
+        Each candidate consists of a `func` (root function), an optional `var` block,
+        and the filter it `covers` (i.e., the filter that is redundant with this root).
+    """
+
+    def __init__(self) -> None:
+        self.candidates = []
+
+    def add_type(self, dgraph_types: list, type_filter: str) -> None:
+        dgraph_types = [dt for dt in dgraph_types if dt and not Schema.is_private(dt)]
+        if len(dgraph_types) == 1:
+            self.candidates.append({'rank': RANK_TYPE,
+                                    'predicate': 'dgraph.type',
+                                    'func': f'type("{dgraph_types[0]}")',
+                                    'var': None,
+                                    'covers': type_filter})
+
+    def add_predicate(self, predicate, val, operator=None, connector=None, predicate_filter: str = None) -> None:
+        from meteor.flaskdgraph.dgraph_types import SingleChoice, Boolean, ReverseRelationship
+
+        if val is None or isinstance(predicate, ReverseRelationship):
+            return
+
+        vals = val if isinstance(val, list) else [val]
+        if len(vals) == 0:
+            return
+
+        if "uid" in predicate.dgraph_predicate_type:
+            self._add_reverse(predicate, vals, connector)
+            return
+
+        # aliases are combined with OR, a single root cannot cover them
+        if predicate.predicate_alias:
+            return
+
+        covers = predicate_filter
+        if connector == "AND" and len(vals) > 1:
+            # the root only narrows down to the first value, the filter remains
+            predicate_filter = predicate.query_filter(vals[0], operator=operator)
+            covers = None
+
+        match = re.match(r'^(\w+)\(', predicate_filter or '')
+        if not match or match.group(1) not in ROOT_FUNCTION_INDEXES:
+            return
+        func = match.group(1)
+        if len(index_tokenizers(predicate) & ROOT_FUNCTION_INDEXES[func]) == 0:
+            return
+
+        if isinstance(predicate, (SingleChoice, Boolean)):
+            # few distinct values, usually many matching nodes
+            rank = RANK_CHOICE
+        elif func == 'eq':
+            rank = RANK_EQ
+        else:
+            rank = RANK_SEARCH
+
+        self.candidates.append({'rank': rank,
+                                'predicate': predicate.predicate,
+                                'func': predicate_filter,
+                                'var': None,
+                                'covers': covers})
+
+    def _add_reverse(self, predicate, vals: list, connector=None) -> None:
+        """ Start from the related node(s) and follow the reverse edges """
+        from .utils import validate_uid
+
+        uids = [validate_uid(v) for v in vals if validate_uid(v)]
+        if len(uids) == 0:
+            return
+        if connector == "AND":
+            uids = uids[:1]
+
+        predicates = [predicate.predicate] + (predicate.predicate_alias or [])
+        for p in predicates:
+            p = Schema.predicates().get(p)
+            if p is None or '@reverse' not in (p.dgraph_directives or []):
+                return
+
+        var_names = [f'root_{p}' for p in predicates]
+        edges = " ".join([f'{var} as ~{p}' for var, p in zip(var_names, predicates)])
+        self.candidates.append({'rank': RANK_REVERSE,
+                                'predicate': predicate.predicate,
+                                'func': f'uid({", ".join(var_names)})',
+                                'var': f'var(func: uid({", ".join(uids)})) {{ {edges} }}',
+                                'covers': None})
+
+    def choose(self) -> dict:
+        """ Get the most selective candidate, falls back to `has(dgraph.type)` """
+        if len(self.candidates) == 0:
+            return {'rank': None, 'predicate': None, 'func': DEFAULT_ROOT, 'var': None, 'covers': None}
+        return min(self.candidates, key=lambda c: c['rank'])
+
+
+def build_query_string(query: dict, public=True, count=False, explain=False,
+                       with_variables=False) -> t.Union[str, dict, tuple]:
     """
         Construct a query string from a dictionary of filters.
-        Returns a dql query string with either: `total` or `q`
+        Returns a dql query string with either: `total` or `q`.
+        With `with_variables=True` returns a tuple of the query string and
+        the values of its variables (`$searchTerms`, `$cursorName`).
 
 
         Default Behaviour:
@@ -27,11 +242,16 @@ def build_query_string(query: dict, public=True, count=False) -> str:
         default comparator is eq or uid_in
         checking for equality
 
+        The root function is chosen by the `QueryPlanner`. 
+        With `explain=True` returns a dict with the chosen plan and the query string.
+
     """
 
     from meteor.flaskdgraph.dgraph_types import Facet, MutualRelationship, SingleRelationship
 
     query = deepcopy(query)
+    query.pop('_explain', None)
+    planner = QueryPlanner()
 
     # get parameter: maximum results per page
     try:
@@ -51,6 +271,16 @@ def build_query_string(query: dict, public=True, count=False) -> str:
     except (KeyError, ValueError):
         page = 0
 
+    # get parameter: cursor (replaces the page)
+    try:
+        cursor = query.pop('_cursor')
+        cursor = cursor[0] if isinstance(cursor, list) else cursor
+        cursor = decode_cursor(cursor)
+        use_cursor = True
+    except KeyError:
+        cursor = None
+        use_cursor = False
+
     # special treatment for free text search
     # maybe incorporate searchable predicates in Schema someday...
     filters = []
@@ -58,6 +288,9 @@ def build_query_string(query: dict, public=True, count=False) -> str:
         search_terms = query.pop('_terms')
         if isinstance(search_terms, list):
             search_terms = " ".join(search_terms)
+        search_terms = search_terms.strip()
+        if search_terms == '':
+            raise ValueError
         if search_terms.startswith('"') and search_terms.endswith('"'):
             filters.append("""(allofterms(name, $searchTerms) OR
                                 allofterms(alternate_names, $searchTerms) OR
@@ -90,6 +323,7 @@ def build_query_string(query: dict, public=True, count=False) -> str:
             [f'type("{dt}")' for dt in dgraph_type if not Schema.is_private(dt)])
         if type_filter:
             filters.append(f'({type_filter})')
+            planner.add_type(dgraph_type, f'({type_filter})')
     except KeyError:
         dgraph_type = None
 
@@ -127,6 +361,20 @@ def build_query_string(query: dict, public=True, count=False) -> str:
     if len(cleaned_query) == 0 and len(filters) == 0:
         raise ValueError('Cleaned query is empty, did you try to query private predicates?')
 
+    if use_cursor and not count:
+        if cursor and 'after' in cursor:
+            # second phase: entries without name
+            filters.append("NOT has(name)")
+        else:
+            filters.append("has(name)")
+        if cursor and 'name' in cursor:
+            # continue after the name of the last entry, 
+            # but skip entries with the same name that were already returned
+            filters.append(f"""(gt(name, $cursorName) OR 
+                             (eq(name, $cursorName) AND NOT uid({', '.join(cursor['uids'])})))""")
+            variables = variables or {}
+            variables['$cursorName'] = cursor['name']
+
     # these are the default predicates that we ALWAYS want to return
     # should be moved outside the function and declared as a setting
     query_parts = ['uid', '_unique_name', 'name', 'dgraph.type',
@@ -166,6 +414,8 @@ def build_query_string(query: dict, public=True, count=False) -> str:
             predicate_filter = f'({predicate_filter})'
 
         filters.append(predicate_filter)
+        planner.add_predicate(predicate, val, operator=operator, 
+                              connector=connector, predicate_filter=predicate_filter)
 
         facet_filter = []
         facet_list = []
@@ -195,7 +445,20 @@ def build_query_string(query: dict, public=True, count=False) -> str:
             query_parts.append(
                 f'{predicate.query} {facet_filter} {facet_list}'.strip())
 
-    filters = " AND ".join(filters)
+    # choose the root function, the filter it covers becomes redundant
+    plan = planner.choose()
+    if plan['covers'] in filters:
+        filters.remove(plan['covers'])
+    if plan['func'] != DEFAULT_ROOT and not plan['func'].startswith('type('):
+        # keep the semantics of `has(dgraph.type)`
+        filters.append('has(dgraph.type)')
+    root_var = plan['var'] or ''
+
+    plan_filters = filters
+    if len(filters) > 0:
+        filters = f'@filter({" AND ".join(filters)})'
+    else:
+        filters = ''
 
     # make sure these default predicates are always queried
     # should be moved outside of this function and made as a setting
@@ -224,23 +487,40 @@ def build_query_string(query: dict, public=True, count=False) -> str:
         query_string = f"""
             {variables_declaration}
             {{
-            total(func: has(dgraph.type)) 
-                @filter({filters}) {cascade} {{
+            {root_var}
+            total(func: {plan['func']}) 
+                {filters} {cascade} {{
                     {" ".join(query_parts_total)}
                 }}
             }}
         """
     else:
+        if cursor and 'after' in cursor:
+            pagination = f'first: {max_results}, after: {cursor["after"]}'
+        elif use_cursor:
+            pagination = f'orderasc: name, first: {max_results}'
+        else:
+            pagination = f'orderasc: name, first: {max_results}, offset: {page * max_results}'
         query_string = f"""
             {variables_declaration}
             {{
-            q(func: has(dgraph.type), orderasc: name, first: {max_results}, offset: {page * max_results}) 
-                @filter({filters}) {cascade} {{
+            {root_var}
+            q(func: {plan['func']}, {pagination}) 
+                {filters} {cascade} {{
                     {" ".join(query_parts)}
                 }}
             }}
         """
 
+    if explain:
+        return {'root': plan['func'],
+                'var': plan['var'],
+                'filters': plan_filters,
+                'candidates': planner.candidates,
+                'query': query_string}
+
+    if with_variables:
+        return query_string, variables
     return query_string
 
 def generate_query_forms(dgraph_types: list = None, populate_obj: dict = None) -> FlaskForm:
@@ -269,7 +549,8 @@ def generate_query_forms(dgraph_types: list = None, populate_obj: dict = None) -
         fields = Schema.get_queryable_predicates(dt)
         for k, v in fields.items():
             if not hasattr(F, k):
-                setattr(F, k, v.query_field)
+                # query fields may load their choices, do not alter the shared predicate
+                setattr(F, k, copy(v).query_field)
                 if isinstance(v.operators, list):
                     operator_selection = SelectField(
                         'operator', name=f'{v}*operator', choices=v.operators)
@@ -1,5 +1,6 @@
 import typing as t
 from copy import deepcopy
+from types import MappingProxyType
 import json
 from datetime import datetime
 from flask_wtf import FlaskForm
@@ -57,11 +58,27 @@ class Schema:
 
     __private_types__ = []
 
+    # case-insensitive lookup indexes
+    # key = lower case name (string), value = canonical name (string)
+    # e.g., {'fileformat': 'FileFormat'}
+    __types_lower__ = {}
+    # includes predicate aliases, predicate names take precedence over aliases
+    __predicates_lower__ = {}
+    # explicit reverse predicates and their aliases
+    # value = reverse relationship (object), e.g., {'~publishes': <DGraph Reverse Relationship "~publishes">}
+    __reverse_predicates_lower__ = {}
+
     # Flag to protect certain dgraph types to be exposed to API endpoints
     __private__ = False
 
+    # Set by `Schema.freeze()` after all DGraph Types are loaded
+    __frozen__ = False
+
     def __init_subclass__(cls) -> None:
 
+        if Schema.__frozen__:
+            raise TypeError(f'Cannot register DGraph Type <{cls.__name__}>: Schema is already frozen!')
+
         from .dgraph_types import _PrimitivePredicate, Facet, Predicate, SingleRelationship, ReverseRelationship, MutualRelationship
         # all predicates associated with type
         predicates = {}
@@ -74,6 +91,7 @@ class Schema:
 
         # register in __types_meta__
         Schema.__types_meta__[cls.__name__] = {'private': cls.__private__}
+        Schema.__types_lower__[cls.__name__.lower()] = cls.__name__
         try:
             Schema.__types_meta__[cls.__name__]['description'] = cleandoc(cls.__doc__).replace('\n', '').strip()
         except AttributeError:
@@ -159,9 +177,15 @@ class Schema:
                             Schema.__reverse_relationships__[constraint] = [cls_attribute]
             if key not in cls.__predicates__:
                 cls.__predicates__.update({key: attribute})
+            # predicate names take precedence over aliases
+            Schema.__predicates_lower__[key.lower()] = key
+            for alias in attribute.predicate_alias or []:
+                Schema.__predicates_lower__.setdefault(alias.lower(), key)
             
         for key in reverse_predicates:
             attribute = getattr(cls, key)
+            Schema.__reverse_predicates_lower__.setdefault(key.lower(), attribute)
+            Schema.__reverse_predicates_lower__.setdefault(attribute._predicate.lower(), attribute)
             if attribute.predicate not in cls.__reverse_predicates_types__:
                 cls.__reverse_predicates_types__.update(
                     {attribute.predicate: [cls.__name__]})
@@ -183,6 +207,44 @@ class Schema:
             # the generic constructor just assigns **kwargs as attributes
             cls.__init__ = _declarative_constructor
 
+    @staticmethod
+    def freeze() -> None:
+        """
+            Make the registry immutable. Call once after all DGraph Types are declared.
+
+            All registries are replaced by read-only mappings (lists become tuples), 
+            so the accessors can hand them out without copying. 
+            Declaring new DGraph Types afterwards raises a `TypeError`.
+        """
+        if Schema.__frozen__:
+            return
+
+        def _freeze(val):
+            if isinstance(val, dict):
+                return MappingProxyType({k: _freeze(v) for k, v in val.items()})
+            if isinstance(val, list):
+                return tuple(val)
+            return val
+
+        Schema.__types__ = _freeze(Schema.__types__)
+        Schema.__types_meta__ = _freeze(Schema.__types_meta__)
+        Schema.__predicates_types__ = _freeze(Schema.__predicates_types__)
+        Schema.__reverse_predicates_types__ = _freeze(Schema.__reverse_predicates_types__)
+        Schema.__inheritance__ = _freeze(Schema.__inheritance__)
+        Schema.__perm_registry_new__ = _freeze(Schema.__perm_registry_new__)
+        Schema.__perm_registry_edit__ = _freeze(Schema.__perm_registry_edit__)
+        Schema.__predicates__ = _freeze(Schema.__predicates__)
+        Schema.__relationship_predicates__ = _freeze(Schema.__relationship_predicates__)
+        Schema.__reverse_relationships__ = _freeze(Schema.__reverse_relationships__)
+        Schema.__explicit_reverse_relationship_predicates__ = _freeze(Schema.__explicit_reverse_relationship_predicates__)
+        Schema.__queryable_predicates__ = _freeze(Schema.__queryable_predicates__)
+        Schema.__queryable_predicates_by_type__ = _freeze(Schema.__queryable_predicates_by_type__)
+        Schema.__private_types__ = _freeze(Schema.__private_types__)
+        Schema.__types_lower__ = _freeze(Schema.__types_lower__)
+        Schema.__predicates_lower__ = _freeze(Schema.__predicates_lower__)
+        Schema.__reverse_predicates_lower__ = _freeze(Schema.__reverse_predicates_lower__)
+        Schema.__frozen__ = True
+
     """ ORM Methods """
     @staticmethod
     def _normalize_dict_vals(val):
@@ -243,10 +305,7 @@ class Schema:
         if not dgraph_type:
             return None
         assert isinstance(dgraph_type, str), TypeError
-        for t in list(cls.__types__.keys()):
-            if t.lower() == dgraph_type.lower():
-                return t
-        return None
+        return cls.__types_lower__.get(dgraph_type.lower())
     
     @classmethod
     def get_type_description(cls, dgraph_type: str) -> t.Union[str, None]:
@@ -259,15 +318,44 @@ class Schema:
         return cls.__types_meta__[dgraph_type]['description']
 
     @classmethod
-    def get_predicates(cls, _cls) -> dict:
+    def get_predicate_name(cls, predicate: str) -> t.Union[str, None]:
+        """
+            Get the correct name of a predicate, also resolves predicate aliases
+            
+            `Schema.get_predicate_name('Country')` -> 'country'
+        """
+        if not predicate:
+            return None
+        assert isinstance(predicate, str), TypeError
+        return cls.__predicates_lower__.get(predicate.lower())
+
+    @classmethod
+    def get_predicate(cls, predicate: str):
+        """
+            Get a predicate by its name (case-insensitive), alias, 
+            or as explicit reverse predicate.
+            
+            `Schema.get_predicate('Country')` -> <DGraph Predicate "country">
+            `Schema.get_predicate('~publishes')` -> <DGraph Reverse Relationship "~publishes">
+        """
+        predicate_name = cls.get_predicate_name(predicate)
+        if predicate_name:
+            return cls.__predicates__[predicate_name]
+        if not predicate:
+            return None
+        return cls.__reverse_predicates_lower__.get(predicate.lower())
+
+    @classmethod
+    def get_predicates(cls, _cls) -> t.Mapping:
         """
             Get all predicates of a DGraph Type
-            Returns a deepcopy dict of `{'predicate_name': <DGraph Predicate>}`
+            Returns a read-only mapping of `{'predicate_name': <DGraph Predicate>}`,
+            use `dict(...)` to get a modifiable copy.
             `Schema.get_predicates('NewsSource')` -> {'name': <DGraph Predicate "name"> ...}
         """
         if not isinstance(_cls, str):
             _cls = _cls.__name__
-        return deepcopy(cls.__types__[_cls])
+        return MappingProxyType(cls.__types__[_cls])
 
     @classmethod
     def get_relationships(cls, _cls) -> dict:
@@ -301,44 +389,44 @@ class Schema:
             return None
       
     @classmethod
-    def get_reverse_predicates(cls, _cls) -> dict:
+    def get_reverse_predicates(cls, _cls) -> t.Mapping:
         """
             Get all explicit reverse relationships from other DGraph Types to this DGraph Type.
-            Returns a dict of `{'alias_reverse_predicate': <DGraph Predicate>}`
+            Returns a read-only mapping of `{'alias_reverse_predicate': <DGraph Predicate>}`
             `Schema.get_reverse_predicates('NewsSource')` -> {'publishes_org': <DGraph Reverse Relationship "~publishes"> ...}
         """
         if not isinstance(_cls, str):
             _cls = _cls.__name__
         if _cls in cls.__explicit_reverse_relationship_predicates__:
-            return deepcopy(cls.__explicit_reverse_relationship_predicates__[_cls])
+            return MappingProxyType(cls.__explicit_reverse_relationship_predicates__[_cls])
         else:
             return None
 
     @classmethod
-    def predicates(cls) -> dict:
+    def predicates(cls) -> t.Mapping:
         """
             Get all predicates.
             If used on `Schema` get a complete dict of all registered predicates.
             If used on a class of a DGraph Type get a dict of all predicates for this type.
-            Returns a dict of `{'predicate_name': <DGraph Predicate>}`
+            Returns a read-only mapping of `{'predicate_name': <DGraph Predicate>}`
             `Schema.predicates()` -> Complete dict
             `FileFormat.predicates()` -> Only predicates for this DGraph Type
         """
         try:
-            predicates = deepcopy(cls.__types__[cls.__name__])
+            predicates = cls.__types__[cls.__name__]
         except KeyError:
-            predicates = deepcopy(cls.__predicates__)
+            predicates = cls.__predicates__
 
-        return predicates
+        return MappingProxyType(predicates)
 
     @classmethod
-    def relationship_predicates(cls) -> dict:
-        return deepcopy(cls.__relationship_predicates__)
+    def relationship_predicates(cls) -> t.Mapping:
+        return MappingProxyType(cls.__relationship_predicates__)
 
     @classmethod
-    def reverse_predicates(cls) -> dict:
+    def reverse_predicates(cls) -> t.Mapping:
         if cls.__name__ in cls.__explicit_reverse_relationship_predicates__:
-            return deepcopy(cls.__explicit_reverse_relationship_predicates__[cls.__name__])
+            return MappingProxyType(cls.__explicit_reverse_relationship_predicates__[cls.__name__])
         else:
             return None
 
@@ -371,7 +459,7 @@ class Schema:
         # We get every dgraph type in the schema
         for dgraph_type in cls.get_types():    
             # get every predicate for this type
-            predicates = cls.get_predicates(dgraph_type)
+            predicates = dict(cls.get_predicates(dgraph_type))
             # get potential parent types
             inheritance = cls.resolve_inheritance(dgraph_type)
             inheritance.remove(dgraph_type)
@@ -482,12 +570,12 @@ class Schema:
         return cls.__perm_registry_edit__[_cls]
 
     @classmethod
-    def get_queryable_predicates(cls, _cls=None) -> dict:
+    def get_queryable_predicates(cls, _cls=None) -> t.Mapping:
         if _cls is None:
             try:
-                return deepcopy(cls.__queryable_predicates_by_type__[cls.__name__])
+                return MappingProxyType(cls.__queryable_predicates_by_type__[cls.__name__])
             except KeyError:
-                return deepcopy(cls.__queryable_predicates__)
+                return MappingProxyType(cls.__queryable_predicates__)
 
         if not isinstance(_cls, str):
             _cls = _cls.__name__
@@ -495,9 +583,9 @@ class Schema:
             _cls = cls.get_type(_cls)
 
         try:
-            return deepcopy(cls.__queryable_predicates_by_type__[_cls])
+            return MappingProxyType(cls.__queryable_predicates_by_type__[_cls])
         except KeyError:
-            return {}
+            return MappingProxyType({})
         
     @classmethod
     def is_private(cls, dgraph_type: str) -> bool:
@@ -532,14 +620,18 @@ class Schema:
     def generate_new_entry_form(cls, dgraph_type=None, populate_obj: dict = None) -> FlaskForm:
 
         if dgraph_type:
-            fields = cls.get_predicates(dgraph_type)
+            fields = dict(cls.get_predicates(dgraph_type))
             if cls.get_reverse_predicates(dgraph_type):
                 fields.update(cls.get_reverse_predicates(dgraph_type))
         else:
-            fields = cls.predicates()
+            fields = dict(cls.predicates())
             if cls.reverse_predicates():
                 fields.update(cls.reverse_predicates())
 
+        # form fields load their choices into the predicate, 
+        # so we work on copies of the registered predicates
+        fields = deepcopy(fields)
+
         if not isinstance(dgraph_type, str):
             submit_label = dgraph_type.__name__
         else:
@@ -575,9 +667,9 @@ class Schema:
             populate_obj = {}
 
         if dgraph_type:
-            fields = cls.get_predicates(dgraph_type)
+            fields = deepcopy(dict(cls.get_predicates(dgraph_type)))
         else:
-            fields = cls.predicates()
+            fields = deepcopy(dict(cls.predicates()))
 
         if not isinstance(dgraph_type, str):
             dtype_label = dgraph_type.__name__
@@ -0,0 +1,194 @@
+"""
+    Post-commit jobs
+
+    Side effects of a successful mutation (subscriptions, notifications)
+    do not have to delay the response. Functions registered with
+    `@jobs.task` get a `delay()` method that stores the call in a local
+    SQLite spool (`JOBS_SPOOL`) and returns immediately. A background
+    thread in each worker process executes the jobs inside an app context.
+
+    - Jobs survive restarts: the spool is a file and is shared by all
+      worker processes of the host; a job is claimed by one worker
+      for `JOBS_LEASE` seconds (default: 300).
+    - Failed jobs are retried `JOBS_MAX_ATTEMPTS` times (default: 5) with
+      exponential backoff starting at `JOBS_RETRY_DELAY` seconds (default: 10).
+      After the last attempt the job stays in the spool, marked as failed.
+    - With `JOBS_SYNCHRONOUS` (default: `TESTING`) jobs are executed
+      immediately, like a normal function call.
+
+    Arguments of jobs have to be JSON serializable.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+import typing as t
+from functools import wraps
+from contextlib import contextmanager
+from logging import getLogger
+
+logger = getLogger(__name__)
+
+
+class PostCommitQueue:
+
+    def __init__(self, app=None) -> None:
+        self._tasks = {}
+        self._app = None
+        self._thread = None
+        self._pid = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app) -> None:
+        app.config.setdefault('JOBS_SPOOL', os.path.join(app.instance_path, 'jobs.sqlite'))
+        app.config.setdefault('JOBS_SYNCHRONOUS', app.config.get('TESTING', False))
+        app.config.setdefault('JOBS_MAX_ATTEMPTS', 5)
+        app.config.setdefault('JOBS_RETRY_DELAY', 10)
+        app.config.setdefault('JOBS_LEASE', 300)
+        # check the spool for due jobs (retries, jobs of other workers)
+        app.config.setdefault('JOBS_POLL_INTERVAL', 5)
+        self._app = app
+        # pick up jobs that were left in the spool by a previous process
+        app.before_request(self._ensure_worker)
+
+    """
+        Registering and enqueuing jobs
+    """
+
+    def task(self, f: t.Callable) -> t.Callable:
+        """
+            Register a function as job. The function itself is returned unchanged,
+            use `f.delay(*args, **kwargs)` to run it after the request.
+        """
+        self._tasks[f.__name__] = f
+
+        @wraps(f)
+        def delay(*args, **kwargs) -> None:
+            self.enqueue(f.__name__, *args, **kwargs)
+
+        f.delay = delay
+        return f
+
+    def enqueue(self, name: str, *args, **kwargs) -> None:
+        if name not in self._tasks:
+            raise KeyError(f'Unknown job <{name}>')
+        if self._app.config['JOBS_SYNCHRONOUS']:
+            self._tasks[name](*args, **kwargs)
+            return
+        payload = json.dumps({'args': args, 'kwargs': kwargs})
+        with self._spool() as conn:
+            conn.execute('INSERT INTO jobs (name, payload, run_after) VALUES (?, ?, ?)',
+                         (name, payload, time.time()))
+        self._ensure_worker()
+        self._wakeup.set()
+
+    """
+        Spool
+    """
+
+    def _connect(self) -> sqlite3.Connection:
+        path = self._app.config['JOBS_SPOOL']
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                            id INTEGER PRIMARY KEY AUTOINCREMENT,
+                            name TEXT NOT NULL,
+                            payload TEXT NOT NULL,
+                            attempts INTEGER NOT NULL DEFAULT 0,
+                            run_after REAL NOT NULL,
+                            claimed_until REAL,
+                            failed INTEGER NOT NULL DEFAULT 0,
+                            last_error TEXT)''')
+        return conn
+
+    @contextmanager
+    def _spool(self) -> t.Iterator[sqlite3.Connection]:
+        """ Connection that commits on success and is always closed """
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _claim(self) -> t.Union[tuple, None]:
+        """ Get the next due job and lease it to this worker """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.isolation_level = None
+            conn.execute('BEGIN IMMEDIATE')
+            job = conn.execute('''SELECT id, name, payload, attempts FROM jobs
+                                  WHERE failed = 0 AND run_after <= ?
+                                  AND (claimed_until IS NULL OR claimed_until < ?)
+                                  ORDER BY id LIMIT 1''', (now, now)).fetchone()
+            if job is not None:
+                conn.execute('UPDATE jobs SET claimed_until = ? WHERE id = ?',
+                             (now + self._app.config['JOBS_LEASE'], job[0]))
+            conn.execute('COMMIT')
+            return job
+        finally:
+            conn.close()
+
+    def _execute(self, job: tuple) -> None:
+        job_id, name, payload, attempts = job
+        payload = json.loads(payload)
+        try:
+            with self._app.app_context():
+                self._tasks[name](*payload['args'], **payload['kwargs'])
+        except Exception as e:
+            attempts += 1
+            failed = attempts >= self._app.config['JOBS_MAX_ATTEMPTS']
+            if failed:
+                logger.error(f'Job <{name}> ({job_id}) failed after {attempts} attempts: {e}', exc_info=True)
+            else:
+                logger.warning(f'Job <{name}> ({job_id}) failed, retrying: {e}')
+            run_after = time.time() + self._app.config['JOBS_RETRY_DELAY'] * 2 ** (attempts - 1)
+            with self._spool() as conn:
+                conn.execute('''UPDATE jobs SET attempts = ?, run_after = ?, claimed_until = NULL,
+                                failed = ?, last_error = ? WHERE id = ?''',
+                             (attempts, run_after, int(failed), repr(e), job_id))
+        else:
+            with self._spool() as conn:
+                conn.execute('DELETE FROM jobs WHERE id = ?', (job_id,))
+
+    """
+        Worker
+    """
+
+    def _ensure_worker(self) -> None:
+        if self._app.config['JOBS_SYNCHRONOUS']:
+            return
+        # threads do not survive forking, start one per process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._wakeup = threading.Event()
+            self._thread = threading.Thread(target=self._work, name='meteor-jobs', daemon=True)
+            self._thread.start()
+
+    def _work(self) -> None:
+        while True:
+            self._wakeup.wait(timeout=self._app.config['JOBS_POLL_INTERVAL'])
+            self._wakeup.clear()
+            try:
+                while (job := self._claim()) is not None:
+                    self._execute(job)
+            except Exception as e:
+                logger.error(f'Job worker error: {e}', exc_info=True)
+
+    def pending(self) -> int:
+        """ Number of jobs in the spool that are not failed """
+        with self._spool() as conn:
+            return conn.execute('SELECT COUNT(*) FROM jobs WHERE failed = 0').fetchone()[0]
+
+
+jobs = PostCommitQueue()
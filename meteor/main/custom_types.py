@@ -6,6 +6,7 @@ from flask_login import current_user
 from meteor import dgraph
 from meteor.errors import InventoryValidationError
 from meteor.flaskdgraph.dgraph_types import *
+from meteor.flaskdgraph.choices import choices_cache
 
 from meteor.add.external import geocode, reverse_geocode, get_wikidata, openalex_getauthorname
 from meteor.flaskdgraph.utils import validate_uid
@@ -76,7 +77,7 @@ class SourceCountrySelection(ListRelationship):
 
         query_string = '{ ' + query_country + query_multinational + ' }'
 
-        choices = dgraph.query(query_string=query_string)
+        choices = choices_cache.query(query_string, self.relationship_constraint)
 
         if len(self.relationship_constraint) == 1:
             self.choices = {c['uid']: c['name'] for c in choices[self.relationship_constraint[0].lower()]}
@@ -110,7 +111,7 @@ class SubunitAutocode(ListRelationship):
                         }
                         '''
 
-        choices = dgraph.query(query_string=query_string)
+        choices = choices_cache.query(query_string, ['Country', 'Subnational'])
 
         self.choices = {}
         self.choices_tuples = {}
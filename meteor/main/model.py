@@ -155,8 +155,9 @@ class Entry(Schema):
         permission=USER_ROLES.Reviewer,
     )
 
+    # exact: sortable index for the cursor pagination (`gt(name, ...)`)
     name = String(
-        required=True, directives=["@index(term, trigram)", "@lang"], overwrite=False
+        required=True, directives=["@index(exact, term, trigram)", "@lang"], overwrite=False
     )
 
     alternate_names = ListString(directives=["@index(term, trigram)"])
@@ -1922,6 +1923,8 @@ class Notification(Schema):
         relationship_constraint=["Entry"],
     )
     _email_dispatched = Boolean(default=False, edit=False)
+    # event and recipient, written by jobs that can be retried
+    _notification_key = String(edit=False, directives=["@index(hash)"])
 
 
 class Comment(Schema):
@@ -2004,3 +2007,8 @@ class _JWT(Schema):
     _jti = String(directives=["@index(hash)"], overwrite=False)
     _token_type = String(directives=["@index(hash)"], overwrite=False)
     _revoked_timestamp = DateTime(directives=["@index(hour)"])
+    _token_expires = DateTime(directives=["@index(hour)"])
+
+
+# all DGraph Types are declared, make the registry read-only
+Schema.freeze()
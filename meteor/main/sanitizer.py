@@ -5,8 +5,7 @@ from meteor.flaskdgraph.utils import validate_uid
 from meteor.errors import InventoryValidationError, InventoryPermissionError
 from meteor.auxiliary import icu_codes
 from meteor.add.external import (instagram, twitter, get_wikidata, telegram, vkontakte,
-                                         parse_meta, siterankdata, find_sitemaps, find_feeds,
-                                         build_url)
+                                         probe_website, build_url)
 from meteor.users.constants import USER_ROLES
 from meteor.main.model import User
 from meteor import dgraph
@@ -48,7 +47,7 @@ class Sanitizer:
         if not isinstance(dgraph_type, str):
             dgraph_type = dgraph_type.__name__
         self.dgraph_type = dgraph_type
-        self.fields = fields or Schema.get_predicates(dgraph_type)
+        self.fields = fields or dict(Schema.get_predicates(dgraph_type))
         if self.dgraph_type and fields is None:
             if Schema.get_reverse_predicates(dgraph_type):
                 self.fields.update(Schema.get_reverse_predicates(dgraph_type))
@@ -117,7 +116,7 @@ class Sanitizer:
 
         entry_review_status = check.get('entry_review_status')
 
-        edit_fields = fields or Schema.get_predicates(dgraph_type)
+        edit_fields = fields or dict(Schema.get_predicates(dgraph_type))
         if dgraph_type and fields is None:
             if Schema.get_reverse_predicates(dgraph_type):
                 edit_fields.update(Schema.get_reverse_predicates(dgraph_type))
@@ -527,9 +526,10 @@ class Sanitizer:
             channel = dgraph.get_unique_name(self.data['channel'])
 
         if channel == 'website':
-            self.resolve_website()
-            self.fetch_siterankdata()
-            self.fetch_feeds()
+            probe = probe_website(str(self.entry['name']))
+            self.resolve_website(probe)
+            self.fetch_siterankdata(probe)
+            self.fetch_feeds(probe)
         elif channel == 'instagram':
             self.fetch_instagram()
         elif channel == 'twitter':
@@ -602,16 +602,11 @@ class Sanitizer:
         return unique_name
 
 
-    def resolve_website(self):
+    def resolve_website(self, probe: dict):
         # first check if website exists
         entry_name = str(self.entry['name'])
-        try:
-            result = parse_meta(entry_name)
-            names = result['names']
-            urls = result['urls']
-        except:
-            raise InventoryValidationError(
-                f"Could not resolve website! URL provided does not exist: {self.data.get('name')}")
+        names = probe['names']
+        urls = probe['urls']
 
         if urls == False:
             raise InventoryValidationError(
@@ -647,13 +642,8 @@ class Sanitizer:
         self.entry['identifier'] = build_url(
             self.data['name'])
 
-    def fetch_siterankdata(self):
-        try:
-            daily_visitors = siterankdata(self.entry['name'])
-        except Exception as e:
-            current_app.logger.warning(
-                f'Could not fetch siterankdata for {self.entry["name"]}! Exception: {e}')
-            daily_visitors = None
+    def fetch_siterankdata(self, probe: dict):
+        daily_visitors = probe['daily_visitors']
 
         if daily_visitors:
             self.entry['audience_size'] = Scalar(datetime.date.today(), facets={
@@ -661,15 +651,15 @@ class Sanitizer:
                 'unit': "daily visitors",
                 'data_from': f"https://siterankdata.com/{str(self.entry['name']).replace('www.', '')}"})
 
-    def fetch_feeds(self):
+    def fetch_feeds(self, probe: dict):
         self.entry['channel_feeds'] = []
-        sitemaps = find_sitemaps(self.entry['name'])
+        sitemaps = probe['sitemaps']
         if len(sitemaps) > 0:
             for sitemap in sitemaps:
                 self.entry['channel_feeds'].append(
                     Scalar(sitemap, facets={'kind': 'sitemap'}))
 
-        feeds = find_feeds(self.entry['name'])
+        feeds = probe['feeds']
 
         if len(feeds) > 0:
             for feed in feeds:
@@ -2,7 +2,7 @@ import flask_jwt_extended as jwtx
 from flask import current_app
 from meteor.users.dgraph import UserLogin, AnonymousUser
 from meteor.main.model import User
-from meteor import dgraph
+from meteor.users.blocklist import blocklist
 
 jwt = jwtx.JWTManager()
 
@@ -25,13 +25,12 @@ def user_identity_lookup(user):
 def user_lookup_callback(_jwt_header, jwt_data) -> User:
     identity = jwt_data["sub"]
     try:
-        user = User(uid=identity)
+        # only uid, role, etc. Full user data is loaded on demand
+        user = User.principal(identity)
         return user
     except ValueError:
         return AnonymousUser
 
 @jwt.token_in_blocklist_loader
 def check_if_token_is_revoked(jwt_header, jwt_payload: dict) -> bool:
-    jti = jwt_payload["jti"]
-    token_in_dgraph = dgraph.get_uid(field="_jti", value=jti)
-    return token_in_dgraph is not None
\ No newline at end of file
+    return blocklist.is_revoked(jwt_payload["jti"])
@@ -0,0 +1,104 @@
+"""
+    In-process block list of revoked JWTs
+
+    Every authenticated request has to check whether its token was revoked.
+    Instead of querying DGraph each time, every worker keeps the `jti`s of all
+    revoked and not yet expired tokens (`_JWT` type) in memory.
+
+    - The list is loaded from DGraph on first use.
+    - Tokens revoked by this worker (`revoke_token`) are added immediately.
+    - Tokens revoked by other workers are fetched incrementally every
+      `JWT_BLOCKLIST_RESYNC` seconds (default: 10).
+    - Expired tokens are pruned by their expiration date, because they are
+      rejected by flask-jwt-extended anyway.
+"""
+
+import time
+import datetime
+import threading
+import typing as t
+
+from flask import current_app
+from flask_jwt_extended import config as jwtx_config
+
+from meteor import dgraph
+
+# overlap of incremental syncs, covers clock differences between workers
+SYNC_MARGIN = datetime.timedelta(minutes=1)
+
+
+class TokenBlocklist:
+
+    def __init__(self) -> None:
+        # key = jti, value = expiration (unix timestamp) or None (never expires)
+        self._revoked = {}
+        self._last_sync = None
+        self._next_sync = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _expiration(token: dict) -> t.Union[float, None]:
+        """ Get the expiration of a `_JWT` node, older nodes do not have `_token_expires` """
+        expires = token.get('_token_expires')
+        if isinstance(expires, datetime.datetime):
+            return expires.timestamp()
+        revoked = token.get('_revoked_timestamp')
+        lifetime = jwtx_config.config.refresh_expires
+        if isinstance(revoked, datetime.datetime) and lifetime:
+            return (revoked + lifetime).timestamp()
+        return None
+
+    def _fetch(self, since: datetime.datetime = None) -> t.List[dict]:
+        if since is None:
+            query_string = '''{ q(func: type(_JWT)) { _jti _token_expires _revoked_timestamp } }'''
+            return dgraph.query(query_string)['q']
+        query_string = '''query revoked_since($since: string) {
+                            q(func: ge(_revoked_timestamp, $since)) @filter(type(_JWT)) {
+                                _jti _token_expires _revoked_timestamp
+                            }
+                        }'''
+        return dgraph.query(query_string, variables={'$since': since.isoformat()})['q']
+
+    def sync(self, full: bool = False) -> None:
+        """ Load (or reload) revoked tokens from DGraph """
+        now = datetime.datetime.now()
+        since = None if full or self._last_sync is None else self._last_sync - SYNC_MARGIN
+        tokens = self._fetch(since)
+        with self._lock:
+            revoked = {} if since is None else dict(self._revoked)
+            for token in tokens:
+                if token.get('_jti'):
+                    revoked[token['_jti']] = self._expiration(token)
+            timestamp = time.time()
+            self._revoked = {jti: exp for jti, exp in revoked.items()
+                             if exp is None or exp > timestamp}
+            self._last_sync = now
+            self._next_sync = time.monotonic() + current_app.config.get('JWT_BLOCKLIST_RESYNC', 10)
+
+    def add(self, jti: str, expires: float = None) -> None:
+        with self._lock:
+            self._revoked = {**self._revoked, jti: expires}
+
+    def is_revoked(self, jti: str) -> bool:
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return jti in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+blocklist = TokenBlocklist()
+
+
+def revoke_token(token: dict) -> None:
+    """ Store the token in the `_JWT` block list and add it to the local block list """
+    mutation = {'uid': '_:jwt',
+                'dgraph.type': '_JWT',
+                '_jti': token["jti"],
+                '_token_type': token['type'],
+                '_revoked_timestamp': datetime.datetime.now().isoformat()}
+    if token.get('exp'):
+        mutation['_token_expires'] = datetime.datetime.fromtimestamp(token['exp'], datetime.timezone.utc).isoformat()
+    dgraph.mutation(mutation)
+    blocklist.add(token['jti'], expires=token.get('exp'))
@@ -0,0 +1,64 @@
+"""
+    Cache of authenticated users for the API
+
+    Every protected API route loads the user of the JWT. Most routes only
+    need to know who the user is and which role they have, so each worker
+    keeps a small LRU of these user principals (see `UserLogin.PRINCIPAL`)
+    for `USER_CACHE_TTL` seconds (default: 60).
+
+    Routes that change a principal (profile update, role change, account deletion)
+    have to call `user_cache.invalidate()`. Invalidation is local to the process,
+    other workers see the change after the TTL.
+"""
+
+import time
+import threading
+import typing as t
+from collections import OrderedDict
+
+from flask import current_app
+
+# upper bound of cached users per worker
+MAX_ENTRIES = 1024
+
+
+class UserCache:
+
+    def __init__(self, ttl: int = 60, max_entries: int = MAX_ENTRIES) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # key = uid, value = (expires, principal)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, uid: str) -> t.Union[dict, None]:
+        with self._lock:
+            try:
+                expires, principal = self._entries[uid]
+            except KeyError:
+                return None
+            if expires <= time.monotonic():
+                del self._entries[uid]
+                return None
+            self._entries.move_to_end(uid)
+            return principal
+
+    def set(self, uid: str, principal: dict) -> None:
+        expires = time.monotonic() + current_app.config.get('USER_CACHE_TTL', self.ttl)
+        with self._lock:
+            self._entries[uid] = (expires, principal)
+            self._entries.move_to_end(uid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *uids: str) -> None:
+        with self._lock:
+            for uid in uids:
+                self._entries.pop(uid, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
@@ -1,4 +1,5 @@
 from typing import Union, Any, List
+from functools import lru_cache
 from meteor import login_manager
 from flask import current_app
 
@@ -6,15 +7,24 @@ from flask_login import UserMixin
 from meteor import dgraph
 import jwt
 from meteor.users.constants import USER_ROLES
+from meteor.users.cache import user_cache
 import datetime
 import secrets
 from meteor.flaskdgraph.dgraph_types import _PrimitivePredicate
+from meteor.flaskdgraph.utils import validate_uid
 
 
 def generate_random_username() -> str:
     return secrets.token_urlsafe(6)
 
 
+@lru_cache(maxsize=None)
+def predicate_attributes(cls) -> tuple:
+    """ Names of all class attributes that are DGraph Predicates """
+    return tuple(attr for attr in dir(cls)
+                 if isinstance(getattr(cls, attr, None), _PrimitivePredicate))
+
+
 class AnonymousUser:
     _role = 0
     uid = None
@@ -29,7 +39,11 @@ class AnonymousUser:
 class UserLogin(UserMixin):
 
     id = None
-    json = {}
+    _json = {}
+
+    # Predicates loaded for API requests, see `UserLogin.principal()`
+    PRINCIPAL = ('uid', 'role', 'display_name', '_account_status')
+    _partial = False
 
     # Need more consistent ORM syntax
     # Currently load users like:
@@ -99,42 +113,87 @@ class UserLogin(UserMixin):
     def get_user(self, **kwargs):
         user_data = self.get_user_data(**kwargs)
         if user_data:
-            self.json = user_data
-            for k, v in user_data.items():
-                if k == 'uid':
-                    self.id = v
-                if '|' in k:
-                    k = k.replace('|', '_')
-                setattr(self, k, v)
-            # Overwrite DGraph Predicates
-            # Maybe find a more elegant solution later
-            for attr in dir(self):
-                if isinstance(getattr(self, attr), _PrimitivePredicate):
-                    setattr(self, attr, None)
-            
-            # Declare User Role as additional private field
-            # `User.role` represents the DGraph Predicate
-            # `User._role` represents the role for internal handling
-            try:
-                self._role = self.role
-            except:
-                raise AttributeError(
-                    'User does not have a role! Please contact your administrator')
+            self._set_user_data(user_data)
         else:
             raise ValueError('User not found!')
 
+    def _set_user_data(self, user_data: dict) -> None:
+        self._json = user_data
+        for k, v in user_data.items():
+            if k == 'uid':
+                self.id = v
+            if '|' in k:
+                k = k.replace('|', '_')
+            setattr(self, k, v)
+        # Overwrite DGraph Predicates
+        # Maybe find a more elegant solution later
+        for attr in predicate_attributes(type(self)):
+            if attr not in self.__dict__:
+                setattr(self, attr, None)
+
+        # Declare User Role as additional private field
+        # `User.role` represents the DGraph Predicate
+        # `User._role` represents the role for internal handling
+        try:
+            self._role = self.role
+        except:
+            raise AttributeError(
+                'User does not have a role! Please contact your administrator')
+
     def get_user_data(self, email=None, uid=None) -> Union[dict, None]:
 
         if email:
-            data = dgraph.query(self.email == email)
+            data = dgraph.query(type(self).email == email)
         else:
-            data = dgraph.query(self.uid == uid)
+            data = dgraph.query(type(self).uid == uid)
 
         if len(data['q']) == 0:
             raise ValueError('User not found!')
         data = data['q'][0]
         return data
 
+    """
+        Principals: lightweight users for API requests
+    """
+
+    @classmethod
+    def principal(cls, uid: str):
+        """
+            Get a user with only the `PRINCIPAL` predicates (uid, role, ...)
+            loaded. Principals are cached per worker (see `meteor.users.cache`).
+            Other predicates are `None` until `load()` is called; `json`
+            loads them automatically.
+        """
+        uid = validate_uid(uid)
+        if not uid:
+            raise ValueError('User not found!')
+        principal = user_cache.get(uid)
+        if principal is None:
+            query_string = f"""query principal($uid: string)
+                            {{q(func: uid($uid)) @filter(type({cls.__name__})) {{ {' '.join(cls.PRINCIPAL)} }} }}"""
+            data = dgraph.query(query_string, variables={'$uid': uid})
+            if len(data['q']) == 0:
+                raise ValueError('User not found!')
+            principal = data['q'][0]
+            user_cache.set(uid, principal)
+        user = cls.__new__(cls)
+        user._partial = True
+        user._set_user_data(dict(principal))
+        return user
+
+    def load(self):
+        """ Load all data of a principal """
+        if self._partial:
+            self._partial = False
+            self.get_user(uid=self.id)
+        return self
+
+    @property
+    def json(self) -> dict:
+        if self._partial:
+            self.load()
+        return self._json
+
     """
         Login users
         verify tokens and return instance of User
@@ -189,10 +189,11 @@ def query():
         else:
             variables = None
 
-        result = dgraph.query(query_string, variables=variables)
-        
         count_query_string = build_query_string(r, count=True)
-        count_result = dgraph.query(count_query_string, variables=variables)
+        # page and total number of results from the same snapshot
+        with dgraph.read_snapshot():
+            result = dgraph.query(query_string, variables=variables)
+            count_result = dgraph.query(count_query_string, variables=variables)
         total = count_result['total'][0]['count']
         max_results = int(request.args.get('_max_results', 25))
         # make sure no random values are passed in as parameters
@@ -7,7 +7,13 @@ path.append(dirname(path[0]))
 from test_setup import BasicTestSetup
 from meteor import dgraph
 from meteor.main.model import User
+from meteor.api.search import SearchIndex
+from meteor.api.ownership import OwnershipGraph
+from meteor.api.similarity import PredicateMatrix
+from flask import Flask
 import unittest
+from unittest import mock
+import time
 
 
 class TestAPILoggedOut(BasicTestSetup):
@@ -36,6 +42,126 @@ class TestAPILoggedOut(BasicTestSetup):
         #     self.assertEqual(response.status_code, 400)
         pass
 
+    def test_schema_cache(self):
+
+        with self.client as c:
+            response = c.get('/api/openapi.json', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('paths', response.json)
+            etag = response.headers['ETag']
+            self.assertIn('max-age', response.headers['Cache-Control'])
+
+            response = c.get('/api/openapi.json', headers={**self.headers, 'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+
+            response = c.get('/api/openapi.json', headers={**self.headers, 'Accept-Encoding': 'gzip'})
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            # each encoding has its own ETag, all of them are accepted for revalidation
+            gzip_etag = response.headers['ETag']
+            self.assertEqual(gzip_etag, etag[:-1] + '-gzip"')
+            response = c.get('/api/openapi.json', headers={**self.headers, 'If-None-Match': gzip_etag})
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers['ETag'], etag)
+
+            response = c.get('/api/schema/type/newssource', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json['dgraph.type'], 'NewsSource')
+
+            # errors are not cached
+            response = c.get('/api/schema/type/doesnotexist', headers=self.headers)
+            self.assertEqual(response.status_code, 404)
+            self.assertNotIn('ETag', response.headers)
+
+    def test_predicate_choices(self):
+
+        with self.client as c:
+            response = c.get('/api/schema/predicate/country', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertGreater(len(response.json), 0)
+
+            # predicates are matched exactly
+            response = c.get('/api/schema/predicate/Country', headers=self.headers)
+            self.assertEqual(response.status_code, 404)
+            response = c.get('/api/schema/predicate/~publishes', headers=self.headers)
+            self.assertEqual(response.status_code, 404)
+
+    def test_predicate_counts(self):
+
+        with self.client as c:
+            response = c.get('/api/schema/predicate/counts/country', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertGreater(len(response.json), 0)
+            self.assertIn('entries', response.json[0])
+            etag = response.headers['ETag']
+
+            response = c.get('/api/schema/predicate/counts/country',
+                             headers={**self.headers, 'If-None-Match': etag})
+            self.assertEqual(response.status_code, 304)
+
+            total = {r['uid']: r['entries'] for r in c.get('/api/schema/predicate/counts/country',
+                                                           headers=self.headers).json}
+            response = c.get('/api/schema/predicate/counts/country',
+                             query_string={'dgraph_type': 'NewsSource'},
+                             headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            for r in response.json:
+                self.assertLessEqual(r['entries'], total[r['uid']])
+
+            response = c.get('/api/schema/predicate/counts/country',
+                             query_string={'dgraph_type': 'doesnotexist'},
+                             headers=self.headers)
+            self.assertEqual(response.status_code, 404)
+
+    def test_response_cache(self):
+        from meteor.api.cache import api_cache
+
+        self.app.config['API_RESPONSE_CACHE'] = 'memory'
+        try:
+            with self.client as c:
+                response = c.get('/api/view/uid/' + self.derstandard_mbh_uid, headers=self.headers)
+                self.assertEqual(response.status_code, 200)
+                etag = response.headers['ETag']
+
+                response = c.get('/api/view/uid/' + self.derstandard_mbh_uid,
+                                 headers={**self.headers, 'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+
+                # dropped when the entry is mutated
+                with self.app.app_context():
+                    api_cache.invalidate(self.derstandard_mbh_uid)
+                    self.assertEqual(len(api_cache.backend._entries), 0)
+
+                # errors are not cached
+                response = c.get('/api/view/uid/0xffffffffffffff', headers=self.headers)
+                self.assertEqual(response.status_code, 404)
+                self.assertNotIn('ETag', response.headers)
+        finally:
+            self.app.config['API_RESPONSE_CACHE'] = None
+            api_cache.clear()
+
+    def test_revoked_token(self):
+        from meteor.users.blocklist import blocklist
+
+        with self.client as c:
+            response = c.post('/api/user/login/token',
+                              data={'email': 'contributor@opted.eu',
+                                    'password': 'contributor123'})
+            self.assertEqual(response.status_code, 200)
+            headers = {**self.headers,
+                       'Authorization': 'Bearer ' + response.json['access_token']}
+
+            response = c.get('/api/user/logout', headers=headers)
+            self.assertEqual(response.status_code, 200)
+
+            # rejected by the local block list
+            response = c.get('/api/user/profile', headers=headers)
+            self.assertEqual(response.status_code, 401)
+
+            # still revoked after reloading the block list from DGraph
+            blocklist.sync(full=True)
+            response = c.get('/api/user/profile', headers=headers)
+            self.assertEqual(response.status_code, 401)
+
     def test_view_uid(self):
 
         # /view/entry/<unique_name>
@@ -59,6 +185,11 @@ class TestAPILoggedOut(BasicTestSetup):
                 self.assertEqual(response.status_code, 200)
                 self.assertEqual(response.json['uid'], channel)
 
+            # private types are not exposed
+            response = c.get('/api/view/uid/' + self.admin_uid,
+                             headers=self.headers)
+            self.assertEqual(response.status_code, 404)
+
             # edge cases
             response = c.get('/api/view/uid/0x0',
                              headers=self.headers)
@@ -195,11 +326,17 @@ class TestAPILoggedOut(BasicTestSetup):
             response = c.get('/api/view/entry/' + 'instagram',
                              headers=self.headers)
             self.assertEqual(response.status_code, 200)
+            # reverse counts are part of the same request
+            self.assertIn('num_newssource', response.json)
 
             response = c.get('/api/view/entry/' + 'austria',
                              headers=self.headers)
             self.assertEqual(response.status_code, 200)
 
+            response = c.get('/api/view/entry/' + 'does_not_exist_xyz',
+                             headers=self.headers)
+            self.assertEqual(response.status_code, 404)
+
     def test_view_recent(self):
         with self.client as c:
 
@@ -318,6 +455,42 @@ class TestAPILoggedOut(BasicTestSetup):
 
             self.assertEqual(response.json, 3)
 
+    def test_query_cursor(self):
+
+        with self.client as c:
+            query = {'languages': [self.lang_german, self.lang_english],
+                     'languages*connector': ['OR'],
+                     'channel': self.channel_print,
+                     '_max_results': 2,
+                     '_cursor': '*'
+                     }
+
+            response = c.get('/api/query', query_string=query,
+                             headers=self.headers)
+
+            self.assertEqual(len(response.json['result']), 2)
+            self.assertIsNotNone(response.json['next_cursor'])
+            uids = [entry['uid'] for entry in response.json['result']]
+
+            query['_cursor'] = response.json['next_cursor']
+            response = c.get('/api/query', query_string=query,
+                             headers=self.headers)
+
+            self.assertEqual(len(response.json['result']), 1)
+            self.assertNotIn(response.json['result'][0]['uid'], uids)
+
+            # entries without name are returned after all entries with a name
+            query['_cursor'] = response.json['next_cursor']
+            response = c.get('/api/query', query_string=query,
+                             headers=self.headers)
+            self.assertEqual(len(response.json['result']), 0)
+            self.assertIsNone(response.json['next_cursor'])
+
+            query['_cursor'] = 'invalid'
+            response = c.get('/api/query', query_string=query,
+                             headers=self.headers)
+            self.assertEqual(response.status_code, 400)
+
     def test_query_private_predicates(self):
 
         with self.client as c:
@@ -1361,5 +1534,142 @@ class TestAPILoggedInAdmin(TestAPILoggedInContributor):
     display_name = 'Admin'
 
 
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.index = SearchIndex()
+        self.index._add({'uid': '0x1', 'name': 'Der Standard', '_unique_name': 'derstandard_at',
+                         'dgraph.type': ['Entry', 'NewsSource'], 'entry_review_status': 'accepted'})
+        self.index._add({'uid': '0x2', 'name': 'Standard Eurobarometer', 'alternate_names': ['EB'],
+                         'dgraph.type': ['Entry', 'Dataset'], 'entry_review_status': 'accepted'})
+        self.index._add({'uid': '0x3', 'title': 'Measuring Media Standards', 'doi': '10.1234/abc',
+                         'dgraph.type': ['Entry', 'ScientificPublication'], 'entry_review_status': 'accepted'})
+        self.index._add({'uid': '0x4', 'name': 'Standard Draft',
+                         'dgraph.type': ['Entry'], 'entry_review_status': 'pending'})
+        self.index.built = time.time()
+        self.index._ready = True
+
+    def test_postings(self):
+        self.assertSetEqual(self.index._prefix_matches('der'), {'0x1'})
+        self.assertSetEqual(self.index._prefix_matches('standard'), {'0x2', '0x4'})
+        self.assertSetEqual(self.index._substring_matches('eb'), {'0x2'})
+        self.assertSetEqual(self.index._terms[('title', 'media')], {'0x3'})
+        self.assertSetEqual(self.index._exact[('doi', '10.1234/abc')], {'0x3'})
+
+        self.index._remove('0x1')
+        self.assertSetEqual(self.index._prefix_matches('der'), set())
+        self.assertSetEqual(self.index._substring_matches('standard'), {'0x2', '0x4'})
+
+    def test_quicksearch(self):
+        with self.app.app_context():
+            # prefix matches before term matches, only accepted entries
+            self.assertListEqual(self.index.quicksearch('standard'), ['0x2', '0x1'])
+            self.assertListEqual(self.index.quicksearch('10.1234/abc'), ['0x3'])
+            self.assertListEqual(self.index.quicksearch('standard', limit=1), ['0x2'])
+
+    def test_lookup(self):
+        with self.app.app_context():
+            self.assertListEqual(self.index.lookup('standard', ['NewsSource', 'Dataset']), ['0x1', '0x2'])
+            self.assertListEqual(self.index.lookup('derstandard', ['NewsSource']), ['0x1'])
+            self.assertListEqual(self.index.lookup('media', ['ScientificPublication']), ['0x3'])
+            self.assertListEqual(self.index.lookup('standard', ['Tool']), [])
+
+    def test_invalidated_during_build(self):
+        index = SearchIndex()
+
+        def fetch(uids=None):
+            if uids is None:
+                # the entry is edited while the snapshot is fetched
+                index.invalidate('0x1')
+                return [{'uid': '0x1', 'name': 'Der Standard', 'entry_review_status': 'accepted'}]
+            return [{'uid': '0x1', 'name': 'Der Spiegel', 'entry_review_status': 'accepted'}]
+
+        index.fetch = fetch
+        with self.app.app_context():
+            index.build()
+            self.assertListEqual(index.quicksearch('spiegel'), ['0x1'])
+            self.assertListEqual(index.quicksearch('standard'), [])
+
+
+class TestOwnershipGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.graph = OwnershipGraph()
+        self.graph._add({'uid': '0x1', 'owns': [{'uid': '0x2'}], 'publishes': [{'uid': '0x3'}]})
+        self.graph._add({'uid': '0x2', 'publishes': [{'uid': '0x4'}]})
+        self.graph._add({'uid': '0x3'})
+        self.graph._add({'uid': '0x4'})
+        self.graph._add({'uid': '0x5', 'owns': [{'uid': '0x9'}]})
+        self.graph._recompute_components(self.graph._nodes.keys())
+        self.graph.built = time.time()
+        self.graph._ready = True
+
+    def test_components(self):
+        self.assertEqual(self.graph.component_size('0x4'), 4)
+        self.assertEqual(self.graph.component_size('0x5'), 1)
+        self.assertListEqual(self.graph.traverse('0x4', max_depth=1, max_nodes=10), ['0x4', '0x2'])
+        self.assertListEqual(self.graph.traverse('0x4', max_depth=5, max_nodes=3), ['0x4', '0x2', '0x1'])
+
+        # 0x1 no longer owns 0x2: component is split
+        self.graph._remove('0x1')
+        self.graph._add({'uid': '0x1', 'publishes': [{'uid': '0x3'}]})
+        self.graph._recompute_components(['0x1', '0x2', '0x3'])
+        self.assertEqual(self.graph.component_size('0x4'), 2)
+        self.assertEqual(self.graph.component_size('0x1'), 2)
+
+    def test_ownership(self):
+        with self.app.app_context():
+            nodes = self.graph.ownership('0x4')
+            self.assertCountEqual([node['uid'] for node in nodes], ['0x1', '0x2', '0x3', '0x4'])
+            owner = [node for node in nodes if node['uid'] == '0x1'][0]
+            self.assertListEqual([target['uid'] for target in owner['owns']], ['0x2'])
+            # edges to entries outside of the graph are not rendered
+            self.assertNotIn('owns', self.graph.ownership('0x5')[0])
+            self.assertIsNone(self.graph.ownership('0x9'))
+
+            # large component: nearest nodes first
+            self.app.config['OWNERSHIP_MAX_NODES'] = 3
+            self.assertListEqual([node['uid'] for node in self.graph.ownership('0x4')],
+                                 ['0x4', '0x2', '0x1'])
+
+    def test_edit_reverse_predicate(self):
+        # 0x3 is edited via `published_by`: now published by 0x5 instead of 0x1
+        requested = []
+
+        def fetch_nodes(uids):
+            requested.extend(uids)
+            node = {'entry_review_status': 'accepted', 'dgraph.type': ['Entry', 'Organization']}
+            return [dict(node, uid='0x1', owns=[{'uid': '0x2'}]),
+                    dict(node, uid='0x3', **{'~publishes': [
+                        dict(node, uid='0x5', owns=[{'uid': '0x9'}], publishes=[{'uid': '0x3'}])]})]
+
+        with mock.patch('meteor.api.ownership.fetch_nodes', fetch_nodes):
+            self.graph.invalidate('0x3')
+            self.graph._refresh()
+
+        # previous source of the incoming edge is fetched again
+        self.assertListEqual(requested, ['0x1', '0x3'])
+        self.assertListEqual(self.graph._edges['0x1']['publishes'], [])
+        self.assertEqual(self.graph.component_size('0x1'), 3)
+        self.assertEqual(self.graph.component_size('0x3'), 2)
+        self.assertSetEqual(self.graph.neighbours('0x3'), {'0x5'})
+
+
+class TestPredicateMatrix(unittest.TestCase):
+
+    def test_intersection(self):
+        entries = {0: ['0x1', '0x2'], 2: ['0x2', '0x3', '0x4'], 3: ['0x5']}
+        matrix = PredicateMatrix.from_entries(entries, 4)
+
+        self.assertListEqual(matrix.sizes.tolist(), [2, 0, 3, 1])
+        self.assertListEqual(matrix.intersection(['0x2', '0x3']).tolist(), [1, 0, 2, 0])
+        self.assertListEqual(matrix.intersection(['0x9']).tolist(), [0, 0, 0, 0])
+
+        restored = PredicateMatrix.from_arrays(matrix.to_arrays('p__'), 'p__')
+        self.assertListEqual(restored.intersection(['0x1', '0x5']).tolist(), [1, 0, 0, 1])
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
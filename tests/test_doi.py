@@ -4,6 +4,7 @@
 from sys import path
 from os.path import dirname
 from requests import HTTPError
+import requests
 import unittest
 
 path.append(dirname(path[0]))
@@ -11,6 +12,7 @@ from test_setup import BasicTestSetup
 from meteor.external.openalex import OpenAlex
 from meteor.external.orcid import ORCID
 from meteor.external.doi import *
+from meteor.external.doi import _enrich_author
 from meteor.external.cran import *
 import json
 with open('meteor/config.json') as f:
@@ -115,6 +117,31 @@ class TestDOI(BasicTestSetup):
         self.assertEqual(
             r['title'], "Quantitative Analysis of Textual Data : Differentiation and Coordination of Two Approaches")
 
+    def test_resolve_hedged(self):
+        import time
+
+        def service(delay, result=None):
+            def resolve(doi):
+                time.sleep(delay)
+                if result is None:
+                    raise HTTPError(f'<{doi}> not found')
+                return result
+            return resolve
+
+        # first provider in priority order wins, even if a later one is faster
+        r = resolve_hedged('10.1234/test', [('slow', service(0.3, 'slow')),
+                                            ('fast', service(0, 'fast'))],
+                           hedge_delay=0.05)
+        self.assertEqual(r, 'slow')
+
+        # failed providers are skipped
+        r = resolve_hedged('10.1234/test', [('failing', service(0)),
+                                            ('second', service(0, 'second'))])
+        self.assertEqual(r, 'second')
+
+        self.assertRaises(HTTPError, resolve_hedged, '10.1234/test', 
+                          [('failing', service(0)), ('failing2', service(0))])
+
     def test_arxiv(self):
         r = resolve_doi(self.arxiv_link)
         # ANEW Sentiment dict
@@ -179,5 +206,26 @@ class TestDOI(BasicTestSetup):
         self.assertEqual(len(r), 1)
 
 
+class TestEnrichAuthor(unittest.TestCase):
+
+    class Unavailable:
+        """ OpenAlex and ORCID client that cannot reach the API """
+
+        def get_author_by_orcid(self, orcid):
+            raise requests.ConnectionError('Connection refused')
+
+        def resolve_author(self, **kwargs):
+            raise ValueError('Expecting value: line 1 column 1 (char 0)')
+
+    def test_failed_lookups(self):
+        api = self.Unavailable()
+        with_orcid = {'name': 'Jane Doe', 'orcid': 'https://orcid.org/0000-0002-1825-0097'}
+        without_orcid = {'name': 'Jane Doe', 'family_name': 'Doe'}
+
+        # authors are kept unchanged
+        self.assertDictEqual(_enrich_author(dict(with_orcid), api, api), with_orcid)
+        self.assertDictEqual(_enrich_author(dict(without_orcid), api, api), without_orcid)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
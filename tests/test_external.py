@@ -10,6 +10,14 @@ from meteor import create_app, dgraph
 from meteor.misc.forms import get_country_choices
 import unittest
 from meteor.add import external
+from meteor.add.htmlhead import parse_head
+from meteor.external import session
+from meteor.external.session import RateLimiter
+from meteor.external.cache import cache, cache_key
+import os
+import time
+import tempfile
+import requests
 
 
 class TestSanitizers(unittest.TestCase):
@@ -122,6 +130,19 @@ class TestSanitizers(unittest.TestCase):
                 external.find_feeds(site)
                 external.find_sitemaps(site)
 
+    def test_probe_website(self):
+        website = "https://www.heise.de/"
+        with self.app.app_context():
+            probe = external.probe_website(website)
+            self.assertGreaterEqual(len(probe['names']), 1)
+            self.assertGreaterEqual(len(probe['sitemaps']), 1)
+            self.assertGreaterEqual(len(probe['feeds']), 1)
+
+            # deadline is over before the homepage responds
+            probe = external.probe_website(website, deadline=0)
+            self.assertFalse(probe['complete'])
+            self.assertEqual(probe['names'], False)
+
     def test_twitter(self):
         handle = "heiseonline"
         with self.app.app_context():
@@ -163,5 +184,100 @@ class TestSanitizers(unittest.TestCase):
             self.assertEqual(wikidata['wikidata_id'], "Q49768")
 
 
+class TestRateLimiter(unittest.TestCase):
+
+    def test_acquire(self):
+        limiter = RateLimiter(rate=20)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.acquire()
+        # first request immediately, then one every 50 ms
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+
+class TestExternalCache(unittest.TestCase):
+
+    url = 'https://api.crossref.org/works/10.1234/abc'
+
+    def setUp(self):
+        cache.configure(os.path.join(tempfile.mkdtemp(), 'external.sqlite'), offline=True)
+
+    def tearDown(self):
+        cache.path = None
+
+    @staticmethod
+    def response(url, content):
+        r = requests.Response()
+        r.status_code = 200
+        r.url = url
+        r.headers['Content-Type'] = 'application/json'
+        r._content = content
+        return r
+
+    def test_offline(self):
+        cache.set(cache_key(self.url), self.response(self.url, b'{"status": "ok"}'), 60)
+
+        # offline replay: stored responses regardless of `fresh`, nothing else
+        self.assertEqual(session.get(self.url).json(), {'status': 'ok'})
+        with session.fresh():
+            self.assertTrue(session.get(self.url).from_cache)
+        self.assertNotEqual(cache_key(self.url, {'Accept': 'text/html'}), cache_key(self.url))
+        self.assertRaises(requests.ConnectionError, session.get, self.url + 'd')
+
+    def test_prune(self):
+        cache.set(cache_key(self.url), self.response(self.url, b'{"status": "ok"}'), 60)
+        cache.set(cache_key(self.url + 'd'), self.response(self.url + 'd', os.urandom(1000)), 60)
+
+        # least recently used responses are removed first
+        cache.max_size = cache.size() - 1
+        with cache._store() as conn:
+            cache._prune(conn)
+        self.assertIsNone(cache.get(cache_key(self.url)))
+        self.assertIsNotNone(cache.get(cache_key(self.url + 'd')))
+
+
+class TestHeadParser(unittest.TestCase):
+
+    head = '''<html><head><meta charset="iso-8859-1">
+              <meta property="og:title" content="Der Standard &amp; Co">
+              <meta property="og:url" content="https://www.derstandard.at">
+              <script type="application/ld+json">{"@type": "WebPage", "name": "DER STANDARD"}</script>'''
+    body = '<body><a href="/rss/inland">Inland</a>' + '<p>Nachrichten</p>' * 10000
+
+    @staticmethod
+    def chunks(page: bytes):
+        for i in range(0, len(page), 1000):
+            yield page[i:i + 1000]
+
+    def test_stops_after_head(self):
+        page = (self.head + '<link rel="alternate" type="application/rss+xml" href="/rss"></head>' + self.body).encode('iso-8859-1')
+        parser = parse_head(self.chunks(page), anchors=True)
+        self.assertTrue(parser.done)
+        self.assertLess(parser.bytes_read, 2000)
+        self.assertDictEqual(parser.opengraph, {'og:title': 'Der Standard & Co',
+                                                'og:url': 'https://www.derstandard.at'})
+        self.assertEqual(len(parser.schemas), 1)
+        self.assertListEqual(parser.feed_links(), ['/rss'])
+
+    def test_anchors(self):
+        # no feed links in the head: look for links in the body, up to `max_bytes`
+        page = (self.head + '</head>' + self.body).encode('iso-8859-1')
+        parser = parse_head(self.chunks(page), anchors=True, max_bytes=5000)
+        self.assertListEqual(parser.feed_links(), ['/rss/inland'])
+        self.assertEqual(parser.bytes_read, 5000)
+
+    def test_noscript(self):
+        # elements inside <noscript> (tracking pixel) do not end the head,
+        # wherever the chunk boundaries are
+        page = ('<html><head><noscript><img height="1" width="1" src="https://www.facebook.com/tr?id=1"/></noscript>'
+                '<script>' + 'var x = 1;' * 2400 + '</script>'
+                '<meta property="og:title" content="Der Standard">'
+                '<link rel="alternate" type="application/rss+xml" href="/rss"></head>' + self.body).encode()
+        parser = parse_head(self.chunks(page), anchors=True)
+        self.assertDictEqual(parser.opengraph, {'og:title': 'Der Standard'})
+        self.assertListEqual(parser.feed_links(), ['/rss'])
+        self.assertTrue(parser.done)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,56 @@
+# Ugly hack to allow absolute import from the root folder
+# whatever its name is. Please forgive the heresy.
+
+from sys import path
+from os.path import dirname
+import time
+import tempfile
+import contextlib
+import unittest
+
+path.append(dirname(path[0]))
+from meteor.jobs import PostCommitQueue
+
+
+class MockApp:
+
+    def __init__(self) -> None:
+        self.instance_path = tempfile.mkdtemp()
+        self.config = {'JOBS_RETRY_DELAY': 0.05, 'JOBS_POLL_INTERVAL': 0.05}
+
+    def before_request(self, f):
+        pass
+
+    def app_context(self):
+        return contextlib.nullcontext()
+
+
+class TestPostCommitQueue(unittest.TestCase):
+
+    def test_retry(self):
+        queue = PostCommitQueue(MockApp())
+        calls = []
+
+        @queue.task
+        def flaky(uid, role=1):
+            calls.append((uid, role))
+            if len(calls) < 2:
+                raise ValueError
+
+        flaky.delay('0x1', role=2)
+        for _ in range(100):
+            if queue.pending() == 0:
+                break
+            time.sleep(0.05)
+
+        # failed once, succeeded on retry
+        self.assertListEqual(calls, [('0x1', 2), ('0x1', 2)])
+        self.assertEqual(queue.pending(), 0)
+
+        # plain function calls are not affected
+        flaky('0x2')
+        self.assertEqual(calls[-1], ('0x2', 1))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -117,7 +117,72 @@ class TestNotifications(BasicTestSetup):
         dgraph.delete({'uid': new_entry})
         self.Reviewer.unfollow_entity(self.lang_german)
 
-    
+    def test_notify_new_entry(self):
+        # reviewer follows the type and a related entity, but gets one notification
+        self.Reviewer.follow_type('Tool')
+        self.Reviewer.follow_entity(self.lang_german)
+        self.Admin.follow_type('Tool')
+        result = dgraph.upsert(None, set_obj={'uid': '_:test_entry',
+                                        '_unique_name': 'test_entry',
+                                        'dgraph.type': ['Entry', 'Tool'],
+                                        'name': 'Test Entry',
+                                        'entry_review_status': 'pending',
+                                        'languages': [{'uid': self.lang_german}]})
+
+        new_entry = result.uids['test_entry']
+        fanout_stats.reset()
+        dispatched = notify_new_entry(new_entry, 'Tool', role=USER_ROLES.Reviewer)
+        self.assertEqual(dispatched, 2)
+        self.assertEqual(fanout_stats.as_dict()['duplicates'], 1)
+
+        notifications = get_unread_notifications(self.Reviewer)
+        self.assertEqual(len(notifications), 1)
+        self.assertEqual(notifications[0]['_title'], "New pending Tool: <Test Entry>!")
+        dgraph.delete({'uid': notifications[0]['uid']})
+
+        notifications = get_unread_notifications(self.Admin)
+        self.assertEqual(len(notifications), 1)
+        self.assertEqual(notifications[0]['_linked']['uid'], new_entry)
+        self.assertEqual(notifications[0]['_title'], "New Tool")
+        dgraph.delete({'uid': notifications[0]['uid']})
+
+        # contributors are below the required role
+        self.assertEqual(len(get_unread_notifications(self.Contributor)), 0)
+
+        # type is resolved from the entry
+        self.assertEqual(notify_new_entry(new_entry, role=USER_ROLES.Reviewer, entities=False), 2)
+        notifications = get_unread_notifications(self.Admin)
+        self.assertEqual(notifications[0]['_title'], "New Tool")
+        dgraph.delete({'uid': notifications[0]['uid']})
+        dgraph.delete({'uid': get_unread_notifications(self.Reviewer)[0]['uid']})
+
+        dgraph.delete({'uid': new_entry})
+        self.Reviewer.unfollow_type('Tool')
+        self.Reviewer.unfollow_entity(self.lang_german)
+        self.Admin.unfollow_type('Tool')
+
+    def test_dispatch_retry(self):
+        # a retried job does not notify users twice
+        event = f'test:{self.derstandard_facebook}'
+        notifications = {self.reviewer_uid: ("Test Notification", "some content"),
+                         self.admin_uid: ("Test Notification", "some content")}
+        
+        # first attempt only reached the reviewer
+        mutations = dispatch_notifications({self.reviewer_uid: notifications[self.reviewer_uid]},
+                                           self.derstandard_facebook, event=event)
+        self.assertEqual(mutations, 1)
+
+        mutations = dispatch_notifications(notifications, self.derstandard_facebook, event=event)
+        self.assertEqual(mutations, 1)
+        self.assertEqual(len(get_unread_notifications(self.Reviewer)), 1)
+        self.assertEqual(len(get_unread_notifications(self.Admin)), 1)
+
+        # nothing left to dispatch
+        mutations = dispatch_notifications(notifications, self.derstandard_facebook, event=event)
+        self.assertEqual(mutations, 0)
+        self.assertEqual(len(get_unread_notifications(self.Reviewer)), 1)
+
+
     def test_review_notification(self):
         result = dgraph.upsert(None, set_obj={'uid': '_:test_entry',
                                         '_unique_name': 'test_entry',
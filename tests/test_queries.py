@@ -8,6 +8,7 @@ from os.path import dirname
 path.append(dirname(path[0]))
 from test_setup import BasicTestSetup
 from meteor.view.routes import build_query_string
+from meteor.flaskdgraph.query import next_cursor, decode_cursor
 from meteor import dgraph
 from meteor.main.model import Country
 
@@ -325,6 +326,31 @@ class TestQueries(BasicTestSetup):
                              query_string=query)
             self.assertEqual(len(response.json['result']), 11)
 
+    def test_query_plan(self):
+        # single type: type index as root
+        plan = build_query_string({'dgraph.type': 'NewsSource', 
+                                   'payment_model': 'free'}, explain=True)
+        self.assertEqual(plan['root'], 'type("NewsSource")')
+        self.assertNotIn('(type("NewsSource"))', plan['filters'])
+
+        # relationship with @reverse: start from the related node
+        plan = build_query_string({'dgraph.type': 'NewsSource', 
+                                   'countries': self.austria_uid}, explain=True)
+        self.assertTrue(plan['root'].startswith('uid(root_countries'))
+        self.assertIn(f'uid({self.austria_uid})', plan['var'])
+        self.assertIn('has(dgraph.type)', plan['filters'])
+
+        # no usable index: fall back
+        plan = build_query_string({'dgraph.type': ['NewsSource', 'Organization'], 
+                                   'verified_account': True}, explain=True)
+        self.assertEqual(plan['root'], 'has(dgraph.type)')
+
+        # plan and result are the same as before
+        query = {"dgraph.type": ["NewsSource", "Organization"],
+                 "countries": self.austria_uid}
+        res = dgraph.query(build_query_string(query, count=True))
+        self.assertEqual(res['total'][0]['count'], 11)
+
     def test_count(self):
 
         countries = Country.name.count()
@@ -336,5 +362,27 @@ class TestQueries(BasicTestSetup):
         self.assertEqual(res['q'][0]['count'], 32)
 
 
+class TestCursor(unittest.TestCase):
+
+    def test_next_cursor(self):
+        page = [{'uid': '0x1', 'name': 'A'}, {'uid': '0x2', 'name': 'B'}, {'uid': '0x3', 'name': 'B'}]
+        cursor = next_cursor(page, '*', 3)
+        self.assertDictEqual(decode_cursor(cursor), {'name': 'B', 'uids': ['0x2', '0x3']})
+
+        # entries with the same name span several pages
+        cursor = next_cursor([{'uid': '0x4', 'name': 'B'}], cursor, 1)
+        self.assertDictEqual(decode_cursor(cursor), {'name': 'B', 'uids': ['0x2', '0x3', '0x4']})
+
+        # no more entries with a name: continue with entries without name
+        cursor = next_cursor([{'uid': '0x5', 'name': 'C'}], cursor, 3)
+        self.assertDictEqual(decode_cursor(cursor), {'after': '0x0'})
+        cursor = next_cursor([{'uid': '0x6'}, {'uid': '0x7'}], cursor, 2)
+        self.assertDictEqual(decode_cursor(cursor), {'after': '0x7'})
+        self.assertIsNone(next_cursor([{'uid': '0x8'}], cursor, 2))
+
+        self.assertIsNone(decode_cursor('*'))
+        self.assertRaises(ValueError, decode_cursor, 'invalid')
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -10,6 +10,7 @@ path.append(dirname(path[0]))
 from test_setup import BasicTestSetup
 from meteor import dgraph
 from meteor.main.model import Schema, Entry, NewsSource
+from meteor.flaskdgraph.dgraph_types import String
 
 
 class TestSchema(BasicTestSetup):
@@ -30,5 +31,33 @@ class TestSchema(BasicTestSetup):
         self.assertEqual(NewsSource.name.query_filter('some name'), 'eq(name, "some name")')
         self.assertEqual(NewsSource.verified_account.query_filter(True), 'eq(verified_account, "true")')
 
+    def test_lookup(self):
+        self.assertEqual(Schema.get_type('newssource'), 'NewsSource')
+        self.assertEqual(Schema.get_type('NEWSSOURCE'), 'NewsSource')
+        self.assertIsNone(Schema.get_type('doesnotexist'))
+
+        self.assertEqual(Schema.get_predicate_name('Name'), 'name')
+        self.assertEqual(Schema.get_predicate_name('Country'), 'country')
+        self.assertIsNone(Schema.get_predicate_name('doesnotexist'))
+
+        self.assertEqual(Schema.get_predicate('country').predicate, 'country')
+        self.assertEqual(str(Schema.get_predicate('~publishes')), '~publishes')
+
+    def test_frozen_registry(self):
+        predicates = Schema.get_predicates('NewsSource')
+        self.assertIn('name', predicates)
+        with self.assertRaises(TypeError):
+            predicates['name'] = None
+        with self.assertRaises(TypeError):
+            Schema.predicates()['name'] = None
+        # copies can be changed without altering the registry
+        predicates = dict(predicates)
+        predicates.pop('name')
+        self.assertIn('name', Schema.get_predicates('NewsSource'))
+
+        with self.assertRaises(TypeError):
+            class NewType(Schema):
+                name = String()
+
 if __name__ == "__main__":
     unittest.main(verbosity=1)
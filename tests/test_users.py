@@ -77,6 +77,26 @@ class TestUsers(BasicTestSetup):
         # delete user again
         dgraph.delete({'uid': new_uid})
 
+    def test_principal(self):
+        from meteor.users.cache import user_cache
+
+        with self.app.app_context():
+            user = User.principal(self.contributor_uid)
+            self.assertIsInstance(user, User)
+            self.assertEqual(user.id, self.contributor_uid)
+            self.assertEqual(user.display_name, 'Contributor')
+            self.assertIsNone(user.email)
+            self.assertIsNotNone(user_cache.get(self.contributor_uid))
+
+            # full user data is loaded on demand
+            self.assertEqual(user.json['email'], 'contributor@opted.eu')
+            self.assertEqual(user.email, 'contributor@opted.eu')
+
+            user_cache.invalidate(self.contributor_uid)
+            self.assertIsNone(user_cache.get(self.contributor_uid))
+
+            self.assertRaises(ValueError, User.principal, 'notauid')
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -7,6 +7,8 @@ from requests import HTTPError
 path.append(dirname(path[0]))
 
 from meteor.flaskdgraph.utils import restore_sequence, recursive_restore_sequence
+from meteor.flaskdgraph.batch import QueryBatch
+from meteor.flaskdgraph import dql
 
 class TestUtils(unittest.TestCase):
     
@@ -59,6 +61,80 @@ class TestUtils(unittest.TestCase):
         self.assertListEqual(l[2]['_authors_fallback'], ['Author A'])
 
 
+class MockClient:
+
+    def __init__(self, response: dict) -> None:
+        self.response = response
+        self.requests = []
+
+    def query(self, query_string, variables=None):
+        self.requests.append((query_string, variables))
+        return self.response
+
+
+class TestQueryBatch(unittest.TestCase):
+
+    def test_batch_namespacing(self):
+        client = MockClient({'b0_entry': [{'uid': '0x1'}],
+                             'b1_q': [{'uid': '0x2'}],
+                             'b2_data': [{'uid': '0x3'}],
+                             'b2_a': []})
+        
+        with QueryBatch(client) as batch:
+            preview = batch.add("""query get_entry($value: string) {
+                                    entry(func: uid($value)) @filter(has(dgraph.type)) { 
+                                        uid dgraph.type
+                                    } 
+                                }""", variables={'$value': '0x1'})
+            
+            unique_name = batch.add(dql.DQLQuery(func=dql.uid(dql.GraphQLVariable(value='0x2')),
+                                                 query_filter=dql.has('dgraph.type'),
+                                                 fetch=['uid', '_unique_name']))
+            
+            search = batch.add("""query quicksearch($name: string) {
+                                    field1 as a(func: anyofterms(name, $name))
+                                    doi as f(func: eq(doi, $name))
+                                    data(func: uid(field1, doi)) @filter(eq(entry_review_status, "accepted")) {
+                                        uid doi
+                                    }
+                                }""", variables={'$name': 'derstandard'})
+
+        self.assertEqual(len(client.requests), 1)
+        query_string, variables = client.requests[0]
+
+        self.assertDictEqual(variables, {'$b0_value': '0x1', 
+                                         '$b1_value': '0x2', 
+                                         '$b2_name': 'derstandard'})
+        self.assertIn('b0_entry(func: uid($b0_value))', query_string)
+        self.assertIn('b2_field1 as b2_a(func: anyofterms(name, $b2_name))', query_string)
+        # predicates with the same name as value variables stay untouched
+        self.assertIn('b2_doi as b2_f(func: eq(doi, $b2_name))', query_string)
+        self.assertIn('uid(b2_field1, b2_doi)', query_string)
+
+        self.assertListEqual(preview.result['entry'], [{'uid': '0x1'}])
+        self.assertListEqual(unique_name.result['q'], [{'uid': '0x2'}])
+        self.assertListEqual(search.result['data'], [{'uid': '0x3'}])
+        self.assertListEqual(search.result['f'], [])
+
+    def test_batch_string_literals(self):
+        client = MockClient({'b0_q': [{'uid': '0x1'}], 'b1_q': []})
+
+        with QueryBatch(client) as batch:
+            batch.add("""query q($value: string) {
+                            u as var(func: eq(name, "u as q(func: uid($value)) {"))
+                            q(func: uid(u)) @filter(eq(title, "uid(u) \\"$value\\"")) { uid }
+                        }""", variables={'$value': 'test'})
+            other = batch.add('{ q(func: anyofterms(name, "q( $name")) { uid } }')
+
+        query_string, variables = client.requests[0]
+
+        self.assertDictEqual(variables, {'$b0_value': 'test'})
+        # content of string literals is not renamed
+        self.assertIn('b0_u as var(func: eq(name, "u as q(func: uid($value)) {"))', query_string)
+        self.assertIn('b0_q(func: uid(b0_u)) @filter(eq(title, "uid(u) \\"$value\\""))', query_string)
+        self.assertIn('b1_q(func: anyofterms(name, "q( $name"))', query_string)
+        self.assertListEqual(other.result['q'], [])
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2)
@@ -0,0 +1,102 @@
+# Benchmark: full DOM (`bs4(..., 'lxml')`) vs. streaming `HeadParser` for website probing
+#
+# Step 1: save some homepages (heavy news sites are most interesting)
+#   python3 tools/benchmark_html_head.py --record https://www.derstandard.at https://www.nzz.ch
+#
+# Step 2: run the benchmark on the saved homepages
+#   python3 tools/benchmark_html_head.py
+#
+# Homepages are stored as raw HTML files in `tools/benchmark_homepages/`,
+# you can also drop other saved pages in there.
+
+import sys
+import timeit
+import argparse
+import tracemalloc
+import urllib.parse
+from pathlib import Path
+from os.path import dirname
+
+sys.path.append(dirname(sys.path[0]))
+
+import requests
+from bs4 import BeautifulSoup as bs4
+from flask import Flask
+
+from meteor.add.external import USER_AGENT, opengraph, schemaorg
+from meteor.add.htmlhead import parse_head, CHUNK_SIZE, MAX_PAGE_BYTES
+
+HOMEPAGES = Path(__file__).parent / 'benchmark_homepages'
+
+
+def record(urls: list) -> None:
+    HOMEPAGES.mkdir(exist_ok=True)
+    for url in urls:
+        r = requests.get(url, headers={'user-agent': USER_AGENT}, timeout=30)
+        r.raise_for_status()
+        name = urllib.parse.urlparse(r.url).hostname
+        with open(HOMEPAGES / f'{name}.html', 'wb') as f:
+            f.write(r.content)
+        print(f'Saved {name}: {len(r.content) / 1024:.1f} KB')
+
+
+def legacy(raw: bytes) -> dict:
+    """ previous implementation of `parse_meta` and `find_feeds` """
+    soup = bs4(raw, 'lxml')
+    links = [link.get('href') for link in soup.find_all('link', rel='alternate')
+             if link.get('href') and ('rss' in (link.get('type') or '') or 'xml' in (link.get('type') or ''))]
+    links += [a.get('href') for a in soup.find_all('a')
+              if a.get('href') and any(hint in a.get('href') for hint in ('xml', 'rss', 'feed'))]
+    return {'opengraph': opengraph(soup), 'schemaorg': schemaorg(soup), 'links': links}
+
+
+def streaming(raw: bytes) -> dict:
+    chunks = (raw[i:i + CHUNK_SIZE] for i in range(0, len(raw), CHUNK_SIZE))
+    head = parse_head(chunks, anchors=True)
+    return {'opengraph': (head.opengraph.get('og:title'), head.opengraph.get('og:url')),
+            'links': head.feed_links(), 'bytes_read': head.bytes_read}
+
+
+def peak_memory(f, raw: bytes) -> float:
+    tracemalloc.start()
+    f(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+def benchmark(number: int) -> None:
+    files = sorted(HOMEPAGES.glob('*.html'))
+    if len(files) == 0:
+        print('No saved homepages found. Run with `--record <url> ...` first.')
+        return
+
+    print(f'Byte cap: {MAX_PAGE_BYTES / 1024:.0f} KB')
+    for path in files:
+        raw = path.read_bytes()
+
+        old, new = legacy(raw), streaming(raw)
+        same_opengraph = old['opengraph'] == new['opengraph']
+        # the head parser skips links in the body if the head has feed links
+        missed = len(set(old['links']) - set(new['links']))
+
+        t_legacy = timeit.timeit(lambda: legacy(raw), number=number)
+        t_stream = timeit.timeit(lambda: streaming(raw), number=number)
+        print(f'{path.stem:<30} {len(raw) / 1024:>8.1f} KB (read: {new["bytes_read"] / 1024:>7.1f} KB) | '
+              f'bs4: {t_legacy / number * 1000:>7.1f} ms, {peak_memory(legacy, raw):>6.1f} MB | '
+              f'head: {t_stream / number * 1000:>7.1f} ms, {peak_memory(streaming, raw):>6.1f} MB | '
+              f'speedup: {t_legacy / t_stream:>5.1f}x | '
+              f'same OpenGraph: {same_opengraph} | links only in bs4: {missed}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark parsing of website heads')
+    parser.add_argument('--record', nargs='+', metavar='URL', help='save homepages')
+    parser.add_argument('--number', type=int, default=10, help='repetitions per homepage')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record)
+    # `schemaorg` logs parsing errors with the app logger
+    with Flask(__name__).app_context():
+        benchmark(args.number)
@@ -0,0 +1,110 @@
+# Benchmark: legacy `DGraph.datetime_hook` vs. schema driven `SchemaDecoder`
+#
+# Step 1: record some representative responses from your local DGraph instance
+#   python3 tools/benchmark_json_decoder.py --record
+#
+# Step 2: run the benchmark on the recorded responses
+#   python3 tools/benchmark_json_decoder.py
+#
+# Responses are stored as raw JSON files in `tools/benchmark_responses/`,
+# you can also drop other recorded responses in there.
+
+import sys
+import json
+import timeit
+import argparse
+from pathlib import Path
+from os.path import dirname
+
+sys.path.append(dirname(sys.path[0]))
+
+import pydgraph
+
+from meteor.flaskdgraph.client import DGraph
+from meteor.flaskdgraph.decoder import SchemaDecoder, orjson
+# load all DGraph types into the Schema registry
+import meteor.main.model
+
+RESPONSES = Path(__file__).parent / 'benchmark_responses'
+
+queries = {
+    # similar to a large `/api/query` page
+    'query_page': """{
+        q(func: type(NewsSource), orderasc: name, first: 500) {
+            uid _unique_name name dgraph.type alternate_names description
+            _date_created date_founded audience_size @facets
+            country { uid name _unique_name }
+            channel { uid name _unique_name }
+        }
+    }""",
+    # ownership network
+    'ownership': """{
+        q(func: type(Organization), first: 200) @recurse(depth: 4) {
+            uid name _unique_name dgraph.type owns publishes _date_created
+        }
+    }""",
+    # detail views
+    'entries': """{
+        q(func: type(Dataset), first: 200) {
+            uid dgraph.type expand(_all_) { uid name _unique_name }
+        }
+    }""",
+}
+
+
+def record(endpoint: str) -> None:
+    RESPONSES.mkdir(exist_ok=True)
+    client_stub = pydgraph.DgraphClientStub(endpoint)
+    client = pydgraph.DgraphClient(client_stub)
+    for name, query_string in queries.items():
+        res = client.txn(read_only=True).query(query_string)
+        with open(RESPONSES / f'{name}.json', 'wb') as f:
+            f.write(res.json)
+        print(f'Recorded {name}: {len(res.json) / 1024:.1f} KB')
+    client_stub.close()
+
+
+def count_differences(a, b) -> int:
+    if isinstance(a, dict) and isinstance(b, dict):
+        return sum(count_differences(v, b.get(k)) for k, v in a.items())
+    if isinstance(a, list) and isinstance(b, list):
+        return sum(count_differences(x, y) for x, y in zip(a, b))
+    return int(a != b)
+
+
+def benchmark(number: int) -> None:
+    decoder = SchemaDecoder()
+    files = sorted(RESPONSES.glob('*.json'))
+    if len(files) == 0:
+        print('No recorded responses found. Run with `--record` first.')
+        return
+
+    print(f"orjson installed: {orjson is not None}")
+    for path in files:
+        raw = path.read_bytes()
+
+        # the legacy hook also converts strings that only look like dates
+        # (e.g., names), report how many values are decoded differently
+        legacy = json.loads(raw, object_hook=DGraph.datetime_hook)
+        fast = decoder.decode(raw)
+        differences = count_differences(legacy, fast)
+
+        t_legacy = timeit.timeit(lambda: json.loads(raw, object_hook=DGraph.datetime_hook), number=number)
+        t_fast = timeit.timeit(lambda: decoder.decode(raw), number=number)
+        print(f'{path.stem:<20} {len(raw) / 1024:>8.1f} KB | '
+              f'datetime_hook: {t_legacy / number * 1000:>8.2f} ms | '
+              f'SchemaDecoder: {t_fast / number * 1000:>8.2f} ms | '
+              f'speedup: {t_legacy / t_fast:>5.1f}x | '
+              f'differing values: {differences}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark JSON decoding of DGraph responses')
+    parser.add_argument('--record', action='store_true', help='record responses from DGraph')
+    parser.add_argument('--endpoint', type=str, default='localhost:9080')
+    parser.add_argument('--number', type=int, default=20, help='repetitions per response')
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.endpoint)
+    benchmark(args.number)
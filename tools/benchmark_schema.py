@@ -0,0 +1,50 @@
+# Benchmark: Schema accessors with `deepcopy` vs. the frozen, read-only registry
+#
+#   python3 tools/benchmark_schema.py
+#
+# The legacy accessors returned a deepcopy of the requested registry on every call.
+# The benchmark replays the same lookups on a deepcopy to show the removed overhead.
+
+import sys
+import timeit
+import argparse
+from copy import deepcopy
+from os.path import dirname
+
+sys.path.append(dirname(sys.path[0]))
+
+from meteor.flaskdgraph import Schema
+# load all DGraph types into the Schema registry
+import meteor.main.model
+
+
+accessors = {
+    'Schema.predicates()': (lambda: Schema.predicates(),
+                            lambda: deepcopy(dict(Schema.__predicates__))),
+    'Schema.get_predicates(NewsSource)': (lambda: Schema.get_predicates('NewsSource'),
+                                          lambda: deepcopy(dict(Schema.__types__['NewsSource']))),
+    'Schema.get_queryable_predicates()': (lambda: Schema.get_queryable_predicates(),
+                                          lambda: deepcopy(dict(Schema.__queryable_predicates__))),
+    'Schema.get_reverse_predicates(NewsSource)': (lambda: Schema.get_reverse_predicates('NewsSource'),
+                                                  lambda: deepcopy(dict(Schema.__explicit_reverse_relationship_predicates__['NewsSource']))),
+    'Schema.relationship_predicates()': (lambda: Schema.relationship_predicates(),
+                                         lambda: deepcopy(dict(Schema.__relationship_predicates__))),
+}
+
+
+def benchmark(number: int) -> None:
+    for name, (frozen, legacy) in accessors.items():
+        t_legacy = timeit.timeit(legacy, number=number)
+        t_frozen = timeit.timeit(frozen, number=number)
+        print(f'{name:<45} | '
+              f'deepcopy: {t_legacy / number * 1000:>8.3f} ms | '
+              f'read-only: {t_frozen / number * 1000:>8.4f} ms | '
+              f'speedup: {t_legacy / t_frozen:>8.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark Schema registry accessors')
+    parser.add_argument('--number', type=int, default=100, help='repetitions per accessor')
+    args = parser.parse_args()
+
+    benchmark(args.number)
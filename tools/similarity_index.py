@@ -0,0 +1,77 @@
+# Build the similarity index for `/view/similar/<uid>` and compare it with the DQL version
+#
+#   python3 tools/similarity_index.py build [--config config.json]
+#   python3 tools/similarity_index.py benchmark [--config config.json] [--sample 50]
+#
+# `build` recreates the index from DGraph and saves it to `SIMILARITY_INDEX_PATH`.
+# `benchmark` picks random accepted entries of all supported types and runs
+# `get_similar` (Jaccard similarity in DQL) and the index on each of them.
+
+import sys
+import time
+import random
+import argparse
+from os.path import dirname
+
+sys.path.append(dirname(sys.path[0]))
+
+from meteor import create_app, dgraph
+from meteor.api.view import get_similar
+from meteor.api.similarity import similarity_index, SIMILARITY_PREDICATES
+
+
+def build() -> None:
+    start = time.perf_counter()
+    similarity_index.build()
+    print(f'Built similarity index with {len(similarity_index.uids)} entries '
+          f'in {time.perf_counter() - start:.1f} s: {similarity_index.path()}')
+
+
+def benchmark(sample: int, first: int) -> None:
+    similarity_index.ensure_ready()
+    types = ', '.join(SIMILARITY_PREDICATES.keys())
+    type_filter = ' OR '.join(f'type({t})' for t in SIMILARITY_PREDICATES)
+    query_string = f'''{{ q(func: type(Entry)) @filter(eq(entry_review_status, "accepted") AND ({type_filter})) {{
+                            uid dgraph.type }} }}'''
+    entries = dgraph.query(query_string)['q']
+    entries = random.sample(entries, min(sample, len(entries)))
+    print(f'Comparing {len(entries)} entries ({types})')
+
+    t_dql, t_index, overlap = 0.0, 0.0, []
+    for entry in entries:
+        dgraph_type = [dt for dt in entry['dgraph.type'] if dt in SIMILARITY_PREDICATES][0]
+
+        start = time.perf_counter()
+        dql = get_similar(entry['uid'], SIMILARITY_PREDICATES[dgraph_type], first=first)
+        t_dql += time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = similarity_index.similar(entry['uid'], first=first)
+        t_index += time.perf_counter() - start
+
+        expected = {r['uid'] for r in dql}
+        if expected:
+            overlap.append(len(expected & {r['uid'] for r in index}) / len(expected))
+
+    n = max(len(entries), 1)
+    print(f'DQL:   {t_dql / n * 1000:>8.1f} ms per request')
+    print(f'Index: {t_index / n * 1000:>8.1f} ms per request')
+    print(f'Speedup: {t_dql / max(t_index, 1e-9):.1f}x')
+    if overlap:
+        print(f'Mean top-{first} overlap with DQL: {sum(overlap) / len(overlap):.1%}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build or benchmark the similarity index')
+    parser.add_argument('command', choices=['build', 'benchmark'])
+    parser.add_argument('--config', type=str, help='config file (json)')
+    parser.add_argument('--sample', type=int, default=50, help='number of entries to compare')
+    parser.add_argument('--first', type=int, default=10, help='number of similar entries')
+    args = parser.parse_args()
+
+    app = create_app(config_json=args.config) if args.config else create_app()
+    with app.app_context():
+        if args.command == 'build':
+            build()
+        else:
+            benchmark(args.sample, args.first)